@@ -0,0 +1,237 @@
+import os
+import math
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from extraction_pool import ExtractionQueueFull
+from sqlite_util import LocalSQLite
+
+
+class RateLimited(Exception):
+    """A client or EPIC bucket is empty; ``retry_after`` is the wait in whole seconds."""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(scope)
+        self.scope = scope
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class LimiterStore:
+    """Token buckets and counted concurrency slots.
+
+    ``take`` refills the bucket at ``rate`` tokens/second up to ``burst`` and
+    returns 0 if ``cost`` tokens were taken, else the seconds until they will be
+    available. With ``force`` the cost is always taken and the balance may go
+    negative: that is how a cost only known afterwards (OCR) is charged.
+    Slots are leased so a worker that dies holding one can't leak it forever.
+    """
+
+    def take(self, key: str, cost: float, rate: float, burst: float, force: bool = False) -> float:
+        raise NotImplementedError
+
+    def acquire_slot(self, name: str, limit: int, lease: float) -> Optional[str]:
+        raise NotImplementedError
+
+    def release_slot(self, name: str, slot_id: str):
+        raise NotImplementedError
+
+    @staticmethod
+    def _refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+        return min(burst, tokens + (now - updated) * rate)
+
+    @staticmethod
+    def _spend(tokens: float, cost: float, rate: float, burst: float, force: bool):
+        """(new balance, wait). A cost above the burst is admitted from a full bucket."""
+        needed = min(cost, burst)
+        if force or tokens >= needed:
+            return tokens - cost, 0.0
+        return tokens, (needed - tokens) / rate
+
+
+class MemoryLimiterStore(LimiterStore):
+    """Per-process state. Buckets are kept in LRU order and the least recently
+    used are dropped past ``max_buckets`` (a dropped bucket starts full again)."""
+
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._slots: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, cost, rate, burst, force=False):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens, wait = self._spend(self._refill(tokens, updated, now, rate, burst), cost, rate, burst, force)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def acquire_slot(self, name, limit, lease):
+        now = time.monotonic()
+        with self._lock:
+            slots = self._slots.setdefault(name, {})
+            for slot_id in [slot_id for slot_id, expires in slots.items() if expires < now]:
+                del slots[slot_id]
+            if len(slots) >= limit:
+                return None
+            slot_id = uuid.uuid4().hex
+            slots[slot_id] = now + lease
+            return slot_id
+
+    def release_slot(self, name, slot_id):
+        with self._lock:
+            self._slots.get(name, {}).pop(slot_id, None)
+
+
+class SQLiteLimiterStore(LimiterStore):
+    """Cross-process state in a SQLite file, so limits hold across Passenger workers."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS admission_slots (
+            name TEXT NOT NULL,
+            id TEXT NOT NULL,
+            expires REAL NOT NULL,
+            PRIMARY KEY (name, id)
+        );
+    """
+    PRUNE_EVERY = 1000  # takes between deletions of idle (long since refilled) buckets
+
+    def __init__(self, path: Path):
+        self._db = LocalSQLite(path, self.SCHEMA)
+        self._takes = 0
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._db.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def take(self, key, cost, rate, burst, force=False):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = self._refill(row["tokens"], row["updated"], now, rate, burst) if row else burst
+            tokens, wait = self._spend(tokens, cost, rate, burst, force)
+            conn.execute("INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - 3600,))
+        return wait
+
+    def acquire_slot(self, name, limit, lease):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM admission_slots WHERE name = ? AND expires < ?", (name, now))
+            held = conn.execute("SELECT COUNT(*) FROM admission_slots WHERE name = ?", (name,)).fetchone()[0]
+            if held >= limit:
+                return None
+            slot_id = uuid.uuid4().hex
+            conn.execute("INSERT INTO admission_slots (name, id, expires) VALUES (?, ?, ?)", (name, slot_id, now + lease))
+            return slot_id
+
+    def release_slot(self, name, slot_id):
+        self._db.connect().execute("DELETE FROM admission_slots WHERE name = ? AND id = ?", (name, slot_id))
+
+
+class AdmissionControl:
+    """Admission policy for document verification.
+
+    Each upload takes one token from its client IP's bucket and one from its
+    EPIC's bucket; a document that needed OCR is charged ``ocr_cost`` - 1 more
+    once that is known, so OCR-heavy clients run dry sooner. At most
+    ``max_extractions`` extractions run at once (across workers with the shared
+    store); past that ExtractionQueueFull is raised, like a full pool. A rate
+    of 0 disables that bucket.
+    """
+
+    def __init__(
+        self,
+        store: LimiterStore,
+        ip_rate: float,
+        ip_burst: float,
+        epic_rate: float,
+        epic_burst: float,
+        max_extractions: int,
+        extraction_lease: float,
+        ocr_cost: float = 5.0,
+    ):
+        self.store = store
+        self.buckets = {"ip": (ip_rate, ip_burst), "epic": (epic_rate, epic_burst)}
+        self.max_extractions = max_extractions
+        self.extraction_lease = extraction_lease
+        self.ocr_cost = ocr_cost
+
+    @classmethod
+    def from_env(cls, default_path: Path, extraction_lease: float) -> "AdmissionControl":
+        backend = os.getenv("ADMISSION_BACKEND", "memory").lower()
+        if backend == "memory":
+            store = MemoryLimiterStore()
+        elif backend == "sqlite":
+            store = SQLiteLimiterStore(Path(os.getenv("ADMISSION_STORE_PATH", default_path)))
+        else:
+            raise ValueError(f"Unknown ADMISSION_BACKEND: {backend}")
+        return cls(
+            store,
+            ip_rate=float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "30")) / 60,
+            ip_burst=float(os.getenv("RATE_LIMIT_IP_BURST", "10")),
+            epic_rate=float(os.getenv("RATE_LIMIT_EPIC_PER_MINUTE", "6")) / 60,
+            epic_burst=float(os.getenv("RATE_LIMIT_EPIC_BURST", "5")),
+            max_extractions=int(os.getenv("EXTRACTION_MAX_CONCURRENT", str((os.cpu_count() or 1) * 4))),
+            extraction_lease=extraction_lease,
+            ocr_cost=float(os.getenv("OCR_COST_WEIGHT", "5")),
+        )
+
+    def admit(self, scope: str, key: str, cost: float = 1.0, force: bool = False):
+        """Raises RateLimited when the bucket can't cover ``cost``."""
+        rate, burst = self.buckets[scope]
+        if rate <= 0 or not key:
+            return
+        wait = self.store.take(f"{scope}:{key}", cost, rate, burst, force)
+        if wait > 0:
+            raise RateLimited(scope, wait)
+
+    def charge_extraction(self, method: str, client_ip: Optional[str], epic: Optional[str]):
+        if method != "ocr" or self.ocr_cost <= 1:
+            return
+        for scope, key in (("ip", client_ip), ("epic", epic)):
+            self.admit(scope, key, self.ocr_cost - 1, force=True)
+
+    def acquire_extraction_slot(self, lease: Optional[float] = None) -> Optional[str]:
+        """Raises ExtractionQueueFull at the cap; pass the result to release_extraction_slot.
+        Both block on the store, so async callers run them off the event loop."""
+        if self.max_extractions <= 0:
+            return None
+        slot_id = self.store.acquire_slot("extraction", self.max_extractions, lease or self.extraction_lease)
+        if slot_id is None:
+            raise ExtractionQueueFull()
+        return slot_id
+
+    def release_extraction_slot(self, slot_id: Optional[str]):
+        if slot_id is not None:
+            self.store.release_slot("extraction", slot_id)
+
+    @contextmanager
+    def extraction_slot(self, lease: Optional[float] = None):
+        slot_id = self.acquire_extraction_slot(lease)
+        try:
+            yield
+        finally:
+            self.release_extraction_slot(slot_id)
@@ -0,0 +1,103 @@
+"""Fill members.epic from the stored voter-ID PDFs of members registered before
+the column existed (migrations/002_members_epic.sql).
+
+    python backfill_epics.py --workers 4 [--dry-run]
+
+Rows are read in id order in batches and their PDFs extracted in parallel
+processes. Safe to re-run: only rows whose epic is still NULL are touched. An
+EPIC already held by another member is reported as a conflict and left NULL.
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from dotenv import load_dotenv
+import mysql.connector
+
+import db
+from db import ConnectionPool
+from extraction import extract_epic_with_method
+from members import DUPLICATE_KEY_ERRNO
+
+
+def extract(pdf_path: str):
+    if not os.path.exists(pdf_path):
+        return None, "missing"
+    extraction = extract_epic_with_method(Path(pdf_path))
+    return extraction.epic, extraction.method
+
+
+def backfill(pool: ConnectionPool, workers: int, batch: int, dry_run: bool) -> dict:
+    counts = {"scanned": 0, "updated": 0, "not_found": 0, "missing": 0, "conflicts": 0}
+    last_id = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            conn = pool.acquire()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id, pdf_proof_path FROM members "
+                    "WHERE epic IS NULL AND pdf_proof_path IS NOT NULL AND id > %s ORDER BY id LIMIT %s",
+                    (last_id, batch),
+                )
+                rows = cursor.fetchall()
+                cursor.close()
+            finally:
+                db.release(conn)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            # Extraction runs with no connection held; results are written in one batch
+            results = list(executor.map(extract, [path for _, path in rows], chunksize=4))
+            conn = pool.acquire()
+            try:
+                cursor = conn.cursor()
+                for (member_id, pdf_path), (epic, method) in zip(rows, results):
+                    counts["scanned"] += 1
+                    if method == "missing":
+                        counts["missing"] += 1
+                        print(f"member {member_id}: file not found: {pdf_path}")
+                        continue
+                    if not epic:
+                        counts["not_found"] += 1
+                        print(f"member {member_id}: no EPIC found ({method})")
+                        continue
+                    if dry_run:
+                        counts["updated"] += 1
+                        continue
+                    try:
+                        cursor.execute("UPDATE members SET epic = %s WHERE id = %s AND epic IS NULL", (epic, member_id))
+                        counts["updated"] += cursor.rowcount
+                    except mysql.connector.Error as err:
+                        if err.errno != DUPLICATE_KEY_ERRNO:
+                            raise
+                        counts["conflicts"] += 1
+                        print(f"member {member_id}: EPIC {epic} is already registered to another member")
+                conn.commit()
+                cursor.close()
+            finally:
+                db.release(conn)
+            rate = counts["scanned"] / (time.perf_counter() - started)
+            print(f"... up to id {last_id}: {counts} ({rate:.1f} files/s)")
+    return counts
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Backfill members.epic from stored voter-ID PDFs.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--batch", type=int, default=200, help="members per batch")
+    parser.add_argument("--dry-run", action="store_true", help="extract and report without writing")
+    args = parser.parse_args()
+
+    pool = ConnectionPool.from_env(size=1, overflow=0, timeout=30)
+    counts = backfill(pool, max(1, args.workers), max(1, args.batch), args.dry_run)
+    print(f"Done{' (dry run)' if args.dry_run else ''}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import csv
+import io
+import uuid
+import hashlib
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from uploads import PARTIAL_SUFFIX, StreamedFile, discard_files, sniff_kind
+
+MANIFEST_NAME = "manifest.csv"
+ZIP_READ_CHUNK = 64 * 1024
+
+
+@dataclass
+class BatchItem:
+    index: int
+    filename: str
+    epic_number: str
+    upload: Optional[StreamedFile]  # None when the file was rejected before extraction
+    error: Optional[str] = None
+
+
+def parse_manifest(text: Optional[str]) -> Dict[str, str]:
+    """``filename,epic_number`` lines (header optional) -> {filename: EPIC}."""
+    manifest = {}
+    for row in csv.reader(io.StringIO(text or "")):
+        if len(row) < 2 or not row[0].strip():
+            continue
+        filename, epic_number = PurePosixPath(row[0].strip()).name, row[1].strip().upper()
+        if filename.lower() == "filename" and epic_number == "EPIC_NUMBER":
+            continue
+        manifest[filename] = epic_number
+    return manifest
+
+
+def _extract_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, directory: Path, max_bytes: int) -> StreamedFile:
+    # Sizes in the central directory can lie, so the limit is enforced on the bytes actually inflated.
+    path = directory / f".{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+    digest, size, head = hashlib.sha256(), 0, b""
+    try:
+        with archive.open(info) as source, path.open("wb") as target:
+            while True:
+                chunk = source.read(ZIP_READ_CHUNK)
+                if not chunk:
+                    break
+                if not head:
+                    head = chunk[:16]
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                target.write(chunk)
+        kind = sniff_kind(head)
+        if kind != "pdf":
+            raise ValueError("is not a PDF file")
+    except Exception:
+        discard_files([path])
+        raise
+    return StreamedFile(PurePosixPath(info.filename).name, path, kind, size, digest.hexdigest())
+
+
+def expand_zip(
+    archive_path: Path, directory: Path, max_items: int, max_bytes: int
+) -> Tuple[List[StreamedFile], Dict[str, str], Dict[str, str]]:
+    """Unpack the PDFs in an uploaded ZIP into ``directory``.
+
+    Blocking; run it on the file-I/O threads. Returns (files, manifest from an
+    optional manifest.csv inside the archive, {filename: reason} for members
+    that were skipped).
+    """
+    files, rejected, manifest = [], {}, {}
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir() and not PurePosixPath(info.filename).name.startswith(".")
+                and "__MACOSX" not in PurePosixPath(info.filename).parts
+            ]
+            for info in members:
+                name = PurePosixPath(info.filename).name
+                if name.lower() == MANIFEST_NAME:
+                    with archive.open(info) as source:
+                        manifest = parse_manifest(source.read(64 * 1024).decode("utf-8", "replace"))
+                    continue
+                if len(files) + len(rejected) >= max_items:
+                    raise HTTPException(status_code=413, detail=f"At most {max_items} documents per batch.")
+                try:
+                    files.append(_extract_member(archive, info, directory, max_bytes))
+                except (ValueError, zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+                    rejected[name] = str(e)
+    except zipfile.BadZipFile:
+        discard_files([upload.path for upload in files])
+        raise HTTPException(status_code=400, detail="archive is not a readable ZIP file.")
+    except BaseException:
+        discard_files([upload.path for upload in files])
+        raise
+    return files, manifest, rejected
+
+
+def build_items(uploads: List[StreamedFile], manifest: Dict[str, str], rejected: Dict[str, str]) -> List[BatchItem]:
+    """Pair each PDF with its EPIC: the manifest entry, else the file name (``ABC1234567.pdf``)."""
+    items = []
+    for upload in uploads:
+        epic_number = manifest.get(upload.filename) or PurePosixPath(upload.filename).stem.strip().upper()
+        items.append(BatchItem(len(items), upload.filename, epic_number, upload))
+    for filename, reason in rejected.items():
+        epic_number = manifest.get(filename) or PurePosixPath(filename).stem.strip().upper()
+        items.append(BatchItem(len(items), filename, epic_number, None, f"'{filename}' {reason}."))
+    return items
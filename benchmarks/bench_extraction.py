@@ -0,0 +1,85 @@
+"""Microbenchmarks for EPIC extraction: the text matcher alone and whole PDFs.
+
+    python -m benchmarks.bench_extraction --repeat 200
+
+OCR cases are skipped when neither tesserocr nor the tesseract binary is
+installed; OCR_ENGINE=pytesseract|tesserocr picks the engine to measure.
+"""
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import corpus, report  # noqa: E402
+from extraction import extract_epic_with_method, find_epic_in_text, ocr_engine  # noqa: E402
+
+SMALL_TEXT = "ELECTION COMMISSION OF INDIA\nIdentity Card\nEPIC No: ABC1234567\nName: Sample Member\n"
+
+
+def text_cases():
+    filler = "Instructions to the elector. Keep this card safe. 2024 Roll No 123456 Part 12\n"
+    return {
+        "small card": SMALL_TEXT,
+        "large dump, match at end": filler * 5000 + "EPIC No: XYZ7654321\n",
+        # Near-misses everywhere and no label: the worst case for backtracking patterns
+        "adversarial, no match": ("Identity Card " + "ABC123456 " * 200 + "EPIC No " * 50) * 5,
+    }
+
+
+def time_call(fn, arg, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100, help="runs per text case")
+    parser.add_argument("--pdfs", type=int, default=10, help="documents per PDF case")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --json run")
+    args = parser.parse_args()
+
+    results = []
+    for name, text in text_cases().items():
+        row = {"case": f"match: {name}", "chars": len(text), **report.summarise(time_call(find_epic_in_text, text, args.repeat))}
+        results.append(row)
+
+    variants = ["text"]
+    try:
+        engine = ocr_engine()
+    except Exception as e:
+        print(f"OCR engine unavailable ({e}): skipping OCR cases\n")
+    else:
+        if engine.name == "tesserocr" or shutil.which("tesseract"):
+            variants.append("scanned")
+            print(f"OCR engine: {engine.name}\n")
+        else:
+            print("tesseract not found: skipping OCR cases\n")
+    with tempfile.TemporaryDirectory(prefix="bsp-bench-") as workdir:
+        for variant in variants:
+            documents = corpus.build_corpus(args.pdfs, variant)
+            samples, misses = [], 0
+            for index, document in enumerate(documents):
+                path = Path(workdir) / f"{variant}-{index}.pdf"
+                path.write_bytes(document.pdf)
+                started = time.perf_counter()
+                result = extract_epic_with_method(path)
+                samples.append(time.perf_counter() - started)
+                misses += result.epic != document.epic
+            results.append({"case": f"pdf: {variant}", "misses": misses, **report.summarise(samples)})
+
+    report.print_table(results, ("case", "n", "chars", "p50_ms", "p95_ms", "p99_ms", "misses"))
+    report.write_results(args.json, results)
+    report.compare(args.compare, results, ("case",), "p50_ms")
+
+
+if __name__ == "__main__":
+    main()
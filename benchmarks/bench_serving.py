@@ -0,0 +1,145 @@
+"""Native uvicorn (serve.py) against the a2wsgi bridge (passenger_wsgi.py): the
+bench_workflow load sent over real HTTP to each server in turn.
+
+    python -m benchmarks.bench_serving --servers a2wsgi,uvicorn --concurrency 1,8,32 --flows 48
+
+Each server runs the app in one child process with MySQL replaced by SQLite.
+a2wsgi is served by a threaded wsgiref server standing in for Passenger's WSGI
+worker; uvicorn gets the settings serve.py would use (KEEPALIVE_SECONDS,
+LIMIT_CONCURRENCY, BACKLOG), with a single worker so both sides share one app.
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import httpx
+
+from benchmarks import corpus, report
+from benchmarks.bench_workflow import load_app, run_level
+
+SERVERS = ("a2wsgi", "uvicorn")
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def run_server(server: str, port: int, workdir: Path, app_module: str):
+    module = load_app(workdir, app_module)
+    if server == "uvicorn":
+        import uvicorn
+        from serve import server_settings, uvicorn_options
+
+        options = uvicorn_options(server_settings())
+        options.update(host="127.0.0.1", port=port, workers=1)
+        uvicorn.run(module.app, log_level="warning", access_log=False, **options)
+    else:
+        from a2wsgi import ASGIMiddleware
+
+        module.start_prewarm()  # as passenger_wsgi.py does; uvicorn runs the startup hook instead
+        with make_server("127.0.0.1", port, ASGIMiddleware(module.app), ThreadingWSGIServer, QuietHandler) as httpd:
+            httpd.serve_forever()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server: str, workdir: Path, app_module: str):
+    port = free_port()
+    child = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_serving", "--serve", server,
+         "--port", str(port), "--workdir", str(workdir), "--app", app_module],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,  # the app's per-request log lines; errors still reach stderr
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if child.poll() is not None:
+            raise RuntimeError(f"{server} server exited with code {child.returncode}")
+        try:
+            httpx.get(f"{base_url}/metrics", timeout=1)
+            return child, base_url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    child.kill()
+    raise RuntimeError(f"{server} server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", default=",".join(SERVERS), help="comma-separated: a2wsgi, uvicorn")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--flows", type=int, default=48, help="membership flows per level")
+    parser.add_argument("--variant", choices=("text", "scanned", "mixed"), default="text")
+    parser.add_argument("--photo", default="1200x1600", help="WxH of the uploaded JPEG")
+    parser.add_argument("--app", default=os.getenv("BENCH_APP_MODULE", "prod_main"), help="module exposing `app`")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --json run")
+    parser.add_argument("--serve", choices=SERVERS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        run_server(args.serve, args.port, Path(args.workdir), args.app)
+        return
+
+    servers = [server.strip() for server in args.servers.split(",") if server.strip()]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    width, height = (int(value) for value in args.photo.lower().split("x"))
+    photo = corpus.sample_photo(width, height)
+    print(f"variant={args.variant}; photo={len(photo) / 1e6:.1f} MB; flows/level={args.flows}\n")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bsp-bench-") as workdir:
+        for server in servers:
+            server_dir = Path(workdir) / server
+            server_dir.mkdir()
+            child, base_url = start_server(server, server_dir, args.app)
+            try:
+                # Untimed warm-up so neither side is measured paying for worker start-up
+                asyncio.run(run_level(None, corpus.build_corpus(2, args.variant, seed=99), photo, 1, base_url))
+                for index, level in enumerate(levels):
+                    # Same documents for both servers; fresh per level so the extraction cache stays cold
+                    documents = corpus.build_corpus(args.flows, args.variant, seed=index)
+                    for row in asyncio.run(run_level(None, documents, photo, level, base_url)):
+                        results.append({"server": server, **row})
+            finally:
+                child.terminate()
+                child.wait(timeout=30)
+
+    report.print_table(results, ("server", "concurrency", "endpoint", "n", "p50_ms", "p95_ms", "p99_ms", "rps", "errors"))
+    if len(servers) > 1:
+        totals = {(row["server"], row["concurrency"]): row["rps"] for row in results if row["endpoint"] == "TOTAL"}
+        baseline, other = servers[0], servers[1]
+        print()
+        for level in levels:
+            ratio = totals[(other, level)] / totals[(baseline, level)]
+            print(f"concurrency {level}: {other} {totals[(other, level)]:.1f} rps vs {baseline} "
+                  f"{totals[(baseline, level)]:.1f} rps ({ratio:.2f}x)")
+    report.write_results(args.json, results)
+    report.compare(
+        args.compare, [row for row in results if "p95_ms" in row], ("server", "concurrency", "endpoint"), "p95_ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
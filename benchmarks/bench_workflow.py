@@ -0,0 +1,133 @@
+"""End-to-end load test: /verify-document/ -> /submit-details/ -> /update-payment/.
+
+Drives the FastAPI app in-process over httpx's ASGI transport, with MySQL
+replaced by a SQLite file, and reports per-endpoint p50/p95/p99 latency and
+overall requests per second at each concurrency level.
+
+    python -m benchmarks.bench_workflow --concurrency 1,4,16 --flows 48 --variant text
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import importlib
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from benchmarks import corpus, report
+from benchmarks.sqlite_backend import SQLitePool
+
+ENDPOINTS = ("verify-document", "submit-details", "update-payment")
+
+
+def load_app(workdir: Path, module_name: str):
+    # Configure before import: the app reads its settings at import time.
+    os.environ["BASE_UPLOAD_DIR"] = str(workdir / "files")
+    os.environ["STATE_DIR"] = str(workdir / "state")
+    os.environ.setdefault("SESSION_STORE_BACKEND", "memory")
+    os.environ.setdefault("VERIFY_ASYNC_ENABLED", "false")  # the flows are synchronous; no shared session store needed
+    os.environ.pop("EXTRACTION_CACHE_PATH", None)
+    # Every flow comes from one address; leave the per-client buckets off unless asked for
+    os.environ.setdefault("RATE_LIMIT_IP_PER_MINUTE", "0")
+    os.environ.setdefault("RATE_LIMIT_EPIC_PER_MINUTE", "0")
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    module = importlib.import_module(module_name)
+    for directory in (module.TEMP_UPLOAD_DIR, module.PDF_UPLOAD_DIR, module.PHOTO_UPLOAD_DIR, module.PHOTO_THUMB_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+    module.DB_POOL = SQLitePool(workdir / "members.sqlite3")
+    return module
+
+
+async def run_flow(client, document, photo, latencies, failures):
+    async def timed(name, **request):
+        started = time.perf_counter()
+        response = await client.post(f"/{name}/", **request)
+        latencies[name].append(time.perf_counter() - started)
+        if response.status_code != 200:
+            failures[name][response.status_code] += 1
+            return None
+        return response.json()
+
+    verified = await timed(
+        "verify-document",
+        data={"epic_number": document.epic},
+        files={"pdf_file": ("voter_id.pdf", document.pdf, "application/pdf")},
+    )
+    if not verified:
+        return 1
+    submitted = await timed(
+        "submit-details",
+        data={"verification_token": verified["verification_token"]},
+        files={"photo_file": ("photo.jpg", photo, "image/jpeg")},
+    )
+    if not submitted:
+        return 2
+    await timed("update-payment", json={"member_id": submitted["member_id"], "status": "successful"})
+    return 3
+
+
+async def run_level(app, documents, photo, concurrency, base_url=None):
+    """In-process over ASGI, or against a running server when ``base_url`` is given."""
+    latencies = defaultdict(list)
+    failures = defaultdict(lambda: defaultdict(int))
+    gate = asyncio.Semaphore(concurrency)
+    if base_url:
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=concurrency))
+    else:
+        transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url or "http://bench", timeout=300) as client:
+        async def one(document):
+            async with gate:
+                return await run_flow(client, document, photo, latencies, failures)
+
+        started = time.perf_counter()
+        requests_made = sum(await asyncio.gather(*(one(document) for document in documents)))
+        wall = time.perf_counter() - started
+
+    rows = []
+    for name in ENDPOINTS:
+        row = {"concurrency": concurrency, "endpoint": name, **report.summarise(latencies[name])}
+        row["errors"] = ", ".join(f"{code}x{count}" for code, count in failures[name].items()) or "-"
+        rows.append(row)
+    rows.append({"concurrency": concurrency, "endpoint": "TOTAL", "n": requests_made, "rps": requests_made / wall})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--flows", type=int, default=32, help="membership flows per level")
+    parser.add_argument("--variant", choices=("text", "scanned", "mixed"), default="text")
+    parser.add_argument("--photo", default="3024x4032", help="WxH of the uploaded JPEG")
+    parser.add_argument("--app", default=os.getenv("BENCH_APP_MODULE", "prod_main"), help="module exposing `app`")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --json run")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    width, height = (int(value) for value in args.photo.lower().split("x"))
+    with tempfile.TemporaryDirectory(prefix="bsp-bench-") as workdir:
+        module = load_app(Path(workdir), args.app)
+        photo = corpus.sample_photo(width, height)
+        print(f"extraction: mode={module.EXTRACTION_POOL.mode} workers={module.EXTRACTION_POOL.workers}; "
+              f"variant={args.variant}; photo={len(photo) / 1e6:.1f} MB; flows/level={args.flows}\n")
+
+        results = []
+        for index, level in enumerate(levels):
+            # Fresh documents per level so no level is served from the extraction cache
+            documents = corpus.build_corpus(args.flows, args.variant, seed=index)
+            results.extend(asyncio.run(run_level(module.app, documents, photo, level)))
+        module.EXTRACTION_POOL.shutdown()
+
+    report.print_table(results, ("concurrency", "endpoint", "n", "p50_ms", "p95_ms", "p99_ms", "rps", "errors"))
+    report.write_results(args.json, results)
+    report.compare(args.compare, [row for row in results if "p95_ms" in row], ("concurrency", "endpoint"), "p95_ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Synthetic voter-ID documents for benchmarks.
+
+Every document gets its own EPIC so the extraction cache never short-circuits a
+measurement unless a benchmark reuses a document on purpose.
+"""
+import io
+import random
+import string
+from dataclasses import dataclass
+from typing import List
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+CARD_LINES = [
+    "ELECTION COMMISSION OF INDIA",
+    "Elector Photo Identity Card",
+    "EPIC No: {epic}",
+    "Name: {name}",
+    "Father's Name: Example Parent",
+    "Sex: M    Date of Birth: 01/01/1990",
+    "Address: 123, V.H. Road, Coimbatore - 641001",
+]
+
+
+@dataclass
+class SampleDocument:
+    epic: str
+    variant: str  # "text" or "scanned"
+    pdf: bytes
+
+
+def random_epic(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_uppercase, k=3)) + "".join(rng.choices(string.digits, k=7))
+
+
+def _card_page(doc, epic: str, name: str, filler_pages: int = 0):
+    page = doc.new_page(width=595, height=842)
+    y = 72
+    for line in CARD_LINES:
+        page.insert_text((72, y), line.format(epic=epic, name=name), fontsize=14)
+        y += 24
+    for _ in range(filler_pages):
+        filler = doc.new_page(width=595, height=842)
+        filler.insert_text((72, 72), "Instructions to the elector. " * 3, fontsize=10)
+
+
+def text_layer_pdf(epic: str, name: str = "Sample Member", filler_pages: int = 0) -> bytes:
+    with fitz.open() as doc:
+        _card_page(doc, epic, name, filler_pages)
+        return doc.tobytes()
+
+
+def scanned_pdf(epic: str, name: str = "Sample Member", dpi: int = 200) -> bytes:
+    """An image-only PDF, like a phone scan: the card is rasterised and the text layer dropped."""
+    with fitz.open(stream=text_layer_pdf(epic, name), filetype="pdf") as source, fitz.open() as scanned:
+        for page in source:
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            target = scanned.new_page(width=page.rect.width, height=page.rect.height)
+            target.insert_image(target.rect, stream=pix.tobytes("png"))
+        return scanned.tobytes(deflate=True)
+
+
+def build_corpus(count: int, variant: str = "text", seed: int = 7) -> List[SampleDocument]:
+    rng = random.Random(seed)
+    documents = []
+    for index in range(count):
+        kind = variant if variant != "mixed" else ("scanned" if index % 4 == 3 else "text")
+        epic = random_epic(rng)
+        pdf = scanned_pdf(epic) if kind == "scanned" else text_layer_pdf(epic)
+        documents.append(SampleDocument(epic, kind, pdf))
+    return documents
+
+
+def sample_photo(width: int = 3024, height: int = 4032, quality: int = 92) -> bytes:
+    """A phone-sized JPEG (about 12 MP) so photo normalisation is measured at realistic cost."""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 48)  # sensor-like noise keeps the JPEG phone-sized
+    image = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.FLIP_TOP_BOTTOM)))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
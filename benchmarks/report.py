@@ -0,0 +1,55 @@
+"""Percentiles, result tables and baseline comparison shared by the benchmarks."""
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarise(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    return {
+        "n": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": (sum(samples) / len(samples) * 1000) if samples else float("nan"),
+    }
+
+
+def print_table(rows: List[Dict], columns: Sequence[str]):
+    widths = {column: max(len(column), *(len(_cell(row.get(column))) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(_cell(row.get(column)).ljust(widths[column]) for column in columns))
+
+
+def _cell(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return "" if value is None else str(value)
+
+
+def write_results(path: Optional[str], results: List[Dict]):
+    if path:
+        Path(path).write_text(json.dumps(results, indent=2))
+
+
+def compare(baseline_path: Optional[str], results: List[Dict], key: Sequence[str], metric: str):
+    """Print the relative change of ``metric`` for every row also present in the baseline."""
+    if not baseline_path:
+        return
+    baseline = {tuple(row.get(k) for k in key): row for row in json.loads(Path(baseline_path).read_text())}
+    print(f"\nChange in {metric} vs {baseline_path} (negative is faster):")
+    for row in results:
+        before = baseline.get(tuple(row.get(k) for k in key))
+        if before and before.get(metric):
+            delta = (row[metric] - before[metric]) / before[metric] * 100
+            print(f"  {' / '.join(str(row.get(k)) for k in key)}: {before[metric]:.2f} -> {row[metric]:.2f} ({delta:+.1f}%)")
@@ -0,0 +1,145 @@
+"""SQLite stand-in for the MySQL pool, covering the mysql.connector surface the app uses.
+
+Only good for benchmarks: it translates %s placeholders and nothing else, so it
+measures the app's own overhead rather than MySQL's.
+"""
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+import mysql.connector
+
+MEMBERS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS members (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        membership_no TEXT,
+        epic TEXT UNIQUE,
+        name TEXT NOT NULL,
+        profession TEXT,
+        designation TEXT,
+        mandal TEXT,
+        dob TEXT,
+        blood_group TEXT,
+        contact_no TEXT,
+        address TEXT,
+        pdf_proof_path TEXT,
+        photo_path TEXT,
+        photo_thumb_path TEXT,
+        status TEXT,
+        active_no TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_members_mandal_status_blood ON members (mandal, status, blood_group);
+    CREATE INDEX IF NOT EXISTS idx_members_status_blood ON members (status, blood_group);
+    CREATE INDEX IF NOT EXISTS idx_members_membership_no ON members (membership_no);
+    CREATE INDEX IF NOT EXISTS idx_members_pdf_proof_path ON members (pdf_proof_path);
+    CREATE INDEX IF NOT EXISTS idx_members_photo_path ON members (photo_path);
+    CREATE INDEX IF NOT EXISTS idx_members_photo_thumb_path ON members (photo_thumb_path);
+    CREATE INDEX IF NOT EXISTS idx_members_created_at ON members (created_at);
+    CREATE TABLE IF NOT EXISTS payment_callbacks (
+        idempotency_key TEXT PRIMARY KEY,
+        member_id INTEGER NOT NULL,
+        payment_status TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        member_status TEXT,
+        received_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+
+@contextmanager
+def _mysql_errors():
+    # Unique-key violations surface as MySQL's ER_DUP_ENTRY, which the app handles
+    try:
+        yield
+    except sqlite3.IntegrityError as e:
+        raise mysql.connector.IntegrityError(msg=str(e), errno=1062) from e
+
+
+class SQLiteCursor:
+    def __init__(self, conn: sqlite3.Connection, dictionary: bool = False):
+        self._cursor = conn.cursor()
+        self._dictionary = dictionary
+
+    @staticmethod
+    def _sql(sql: str) -> str:
+        return sql.replace("%s", "?")
+
+    def execute(self, sql, params=()):
+        self._first_id = None
+        with _mysql_errors():
+            self._cursor.execute(self._sql(sql), tuple(str(p) if hasattr(p, "isoformat") else p for p in params))
+
+    def executemany(self, sql, rows):
+        rows = [tuple(str(p) if hasattr(p, "isoformat") else p for p in row) for row in rows]
+        first = None
+        for row in rows:
+            with _mysql_errors():
+                self._cursor.execute(self._sql(sql), row)
+            first = first or self._cursor.lastrowid
+        self._first_id = first
+
+    @property
+    def lastrowid(self):
+        return getattr(self, "_first_id", None) or self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, path: Path):
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+
+    def cursor(self, dictionary=False, **_options):
+        return SQLiteCursor(self._conn, dictionary=dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLitePool:
+    """Drop-in for db.ConnectionPool: ``acquire()`` returns a fresh connection."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with sqlite3.connect(str(self.path)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(MEMBERS_SCHEMA)
+
+    def acquire(self):
+        return SQLiteConnection(self.path)
+
+    def connect_unpooled(self):
+        return SQLiteConnection(self.path)
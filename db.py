@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+
+import mysql.connector
+from mysql.connector import pooling
+
+
+class DatabaseBusy(Exception):
+    """Every pooled and overflow connection stayed in use for the whole wait."""
+
+
+def db_config_from_env() -> dict:
+    return {
+        "host": os.getenv("DATABASE_HOST"),
+        "user": os.getenv("DATABASE_USERNAME"),
+        "password": os.getenv("DATABASE_PASSWORD"),
+        "database": os.getenv("DATABASE_NAME"),
+        "connection_timeout": int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "10")),
+    }
+
+
+class _OverflowConnection:
+    """A plain connection opened past the pool size; closing it frees the overflow slot."""
+
+    def __init__(self, cnx, slots: threading.BoundedSemaphore):
+        self._cnx = cnx
+        self._slots = slots
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def close(self):
+        cnx, self._cnx = self._cnx, None
+        if cnx is None:
+            return
+        try:
+            cnx.close()
+        finally:
+            self._slots.release()
+
+
+class ConnectionPool:
+    """mysql.connector pool with overflow and a bounded wait.
+
+    Checked-out connections are health-checked by mysql.connector itself: a dead
+    socket is pinged and reconnected before it is handed out. Once ``size`` pooled
+    and ``overflow`` extra connections are busy, ``acquire`` waits up to
+    ``timeout`` seconds and then raises DatabaseBusy instead of piling more
+    connections onto the server's max_connections.
+    """
+
+    def __init__(self, config: dict, size: int = 5, overflow: int = 5, timeout: float = 2.0, name: str = "bsp_pool"):
+        self.config = config
+        self.size = max(1, min(size, pooling.CNX_POOL_MAXSIZE))
+        self.timeout = timeout
+        self.name = name
+        self._overflow = threading.BoundedSemaphore(overflow) if overflow > 0 else None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **overrides) -> "ConnectionPool":
+        options = {
+            "size": int(os.getenv("DB_POOL_SIZE", "5")),
+            "overflow": int(os.getenv("DB_POOL_OVERFLOW", "5")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "2")),
+        }
+        options.update(overrides)
+        return cls(db_config_from_env(), **options)
+
+    def _get_pool(self) -> pooling.MySQLConnectionPool:
+        # Created on first use: building the pool opens all `size` connections.
+        with self._lock:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(pool_name=self.name, pool_size=self.size, **self.config)
+            return self._pool
+
+    def connect_unpooled(self):
+        """A plain connection outside the pool and its overflow, for long streaming
+        reads such as exports that shouldn't hold a request's slot; the caller closes it."""
+        return mysql.connector.connect(**self.config)
+
+    def acquire(self):
+        """Blocking checkout. Raises mysql.connector.Error if the server is unreachable."""
+        pool = self._get_pool()
+        deadline = time.monotonic() + self.timeout
+        delay = 0.01
+        while True:
+            try:
+                return pool.get_connection()
+            except pooling.PoolError:
+                pass
+            if self._overflow is not None and self._overflow.acquire(blocking=False):
+                try:
+                    return _OverflowConnection(mysql.connector.connect(**self.config), self._overflow)
+                except BaseException:
+                    self._overflow.release()
+                    raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DatabaseBusy()
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.2)
+
+
+def release(conn):
+    """Return a connection to its pool (or close an overflow one), never raising."""
+    if conn is None:
+        return
+    try:
+        conn.close()
+    except mysql.connector.Error as err:
+        print(f"Error releasing database connection: {err}")
@@ -0,0 +1,75 @@
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+# An EPIC number is three letters followed by seven digits. OCR often reads
+# digits as look-alike letters, so the digit section also accepts O, I and S
+# and maps them back. Everything is one precompiled alternation scanned once
+# with bounded quantifiers only, so matching stays linear in the text length. The
+# leading word boundary and first-character lookahead let most positions fail fast.
+_SCANNER = re.compile(
+    r"\b(?=[EeIiA-Z])(?:"
+    r"(?P<label>(?i:EPIC\s{0,3}No|Identity\s{1,3}Card))"
+    r"|(?P<letters>[A-Z]{3}) ?(?P<digits>[0-9OIS]{7})\b)"
+)
+_DIGIT_FIXES = str.maketrans("OIS", "015")
+
+# Scoring: a well-formed number anywhere is a plausible hit; one shortly after an
+# "EPIC No" / "Identity Card" label (the first one after it) almost certainly is.
+# Each corrected character costs confidence, and repeats of the same number
+# (front and back of the card) add a little.
+BASE_CONFIDENCE = 0.6
+NEAR_LABEL_BONUS = 0.35
+AFTER_LABEL_BONUS = 0.2
+LABEL_WINDOW = 120
+CORRECTION_PENALTY = 0.15
+REPEAT_BONUS = 0.05
+MIN_CONFIDENCE = 0.3
+
+
+class EpicCandidate(NamedTuple):
+    epic: str
+    confidence: float
+    position: int  # offset of the first occurrence
+    corrections: int  # O/I/S characters mapped to 0/1/5
+
+
+def find_epic_candidates(text: Optional[str]) -> List[EpicCandidate]:
+    """Every EPIC-shaped token in ``text``, best first, above MIN_CONFIDENCE."""
+    if not text:
+        return []
+    last_label_end = None
+    label_claimed = False
+    seen: Dict[str, list] = {}
+    for match in _SCANNER.finditer(text):
+        if match.group("label"):
+            last_label_end, label_claimed = match.end(), False
+            continue
+        digits = match.group("digits")
+        epic = match.group("letters") + digits.translate(_DIGIT_FIXES)
+        corrections = sum(digit in "OIS" for digit in digits)
+        score = BASE_CONFIDENCE - CORRECTION_PENALTY * corrections
+        if last_label_end is not None:
+            # Only the first number after a label counts as the labelled one
+            near = not label_claimed and match.start() - last_label_end <= LABEL_WINDOW
+            score += NEAR_LABEL_BONUS if near else AFTER_LABEL_BONUS
+            label_claimed = True
+        entry = seen.get(epic)
+        if entry is None:
+            seen[epic] = [score, match.start(), corrections, 0]
+        else:
+            entry[0] = max(entry[0], score)
+            entry[2] = min(entry[2], corrections)
+            entry[3] += 1
+
+    candidates = [
+        EpicCandidate(epic, round(min(1.0, score + REPEAT_BONUS * min(repeats, 3)), 3), position, corrections)
+        for epic, (score, position, corrections, repeats) in seen.items()
+    ]
+    candidates = [candidate for candidate in candidates if candidate.confidence >= MIN_CONFIDENCE]
+    candidates.sort(key=lambda candidate: (-candidate.confidence, candidate.position))
+    return candidates
+
+
+def best_epic(text: Optional[str]) -> Optional[EpicCandidate]:
+    candidates = find_epic_candidates(text)
+    return candidates[0] if candidates else None
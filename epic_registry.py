@@ -0,0 +1,44 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class RegisteredEpicCache:
+    """LRU of EPIC numbers known to be registered, in front of the indexed lookup.
+
+    Only positives are cached: an EPIC missing here is always checked against
+    uq_members_epic. Entries expire after ``ttl`` seconds, which bounds how long
+    another worker's deletion (a failed payment) can go unnoticed; deletions in
+    this process call ``discard`` straight away.
+    """
+
+    def __init__(self, max_entries: int = 50000, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, epic: str) -> bool:
+        with self._lock:
+            added = self._entries.get(epic)
+            if added is None:
+                return False
+            if time.monotonic() - added > self.ttl:
+                del self._entries[epic]
+                return False
+            self._entries.move_to_end(epic)
+            return True
+
+    def add(self, epic: str):
+        with self._lock:
+            self._entries[epic] = time.monotonic()
+            self._entries.move_to_end(epic)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, epic: str):
+        with self._lock:
+            self._entries.pop(epic, None)
+
+    def __len__(self):
+        return len(self._entries)
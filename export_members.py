@@ -0,0 +1,332 @@
+"""Stream the members table to CSV, NDJSON or Parquet in constant memory.
+
+    python export_members.py --format csv --output members.csv [--status active] [--mandal NAME]
+        [--created-from 2026-01-01] [--created-until 2026-02-01] [--after-id N [--append]]
+
+Rows are read in id order from an unbuffered (server-side) cursor, BATCH_SIZE at
+a time, and each batch is encoded and written before the next one is fetched,
+so neither the client nor the server holds the result set. Every format leads
+with the id column: an interrupted export resumes with --after-id set to the
+last id written (after_id on GET /members/export/), and --append adds the rest
+to an existing CSV or NDJSON file. Parquet needs pyarrow (optional) and is
+written one row group per batch, its schema taken from the result's column
+types. created_at, used by the date filters, is added
+by migrations/006_members_created_at.sql.
+"""
+import io
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from mysql.connector.constants import FieldFlag, FieldType
+
+from members import SEARCH_COLUMNS
+
+# The search API's columns: everything but the internal file paths
+EXPORT_COLUMNS = SEARCH_COLUMNS
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+
+class ExportUnavailable(Exception):
+    """The requested format's optional dependency isn't installed."""
+
+
+def export_query(
+    status: Optional[str] = None,
+    mandal: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_until: Optional[datetime] = None,
+    after_id: int = 0,
+) -> Tuple[str, tuple]:
+    """``created_from`` is inclusive and ``created_until`` exclusive. Walks the
+    primary key in order, so nothing is sorted or materialised server-side."""
+    conditions, params = ["id > %s"], [after_id]
+    for condition, value in (
+        ("status = %s", status),
+        ("mandal = %s", mandal),
+        ("created_at >= %s", created_from),
+        ("created_at < %s", created_until),
+    ):
+        if value is not None:
+            conditions.append(condition)
+            params.append(value)
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM members WHERE {' AND '.join(conditions)} ORDER BY id"
+    return sql, tuple(params)
+
+
+def iter_batches(cursor, batch_size: int) -> Iterator[List[tuple]]:
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+
+class ExportEncoder:
+    name = ""
+
+    def __init__(self, columns: Sequence[str], header: bool = True):
+        self.columns = list(columns)
+        self.header = header
+
+    def start(self, description: Sequence[tuple] = ()) -> bytes:
+        """``description`` is the executed query's ``cursor.description``."""
+        return b""
+
+    def encode(self, rows: List[tuple]) -> bytes:
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class CsvEncoder(ExportEncoder):
+    name = "csv"
+
+    def __init__(self, columns, header=True):
+        super().__init__(columns, header)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def start(self, description=()):
+        if self.header:
+            self._writer.writerow(self.columns)
+        return self._drain()
+
+    def encode(self, rows):
+        self._writer.writerows(rows)
+        return self._drain()
+
+
+class NdjsonEncoder(ExportEncoder):
+    name = "ndjson"
+
+    def encode(self, rows):
+        lines = (json.dumps(dict(zip(self.columns, row)), default=str, separators=(",", ":")) for row in rows)
+        return ("\n".join(lines) + "\n").encode()
+
+
+class _ChunkSink:
+    """Write-only file object for ParquetWriter; drain() hands over what it wrote since."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+_INTEGER_TYPES = {FieldType.TINY, FieldType.SHORT, FieldType.INT24, FieldType.LONG, FieldType.LONGLONG, FieldType.YEAR}
+_BLOB_TYPES = {
+    FieldType.TINY_BLOB, FieldType.MEDIUM_BLOB, FieldType.LONG_BLOB, FieldType.BLOB,
+    FieldType.VAR_STRING, FieldType.STRING, FieldType.VARCHAR,
+}
+
+
+def arrow_type(pa, type_code: int, flags: int = 0):
+    """The Arrow type for a MySQL result column, as the connector returns its values.
+
+    The column description carries no DECIMAL precision, so decimals (like any
+    type not listed here) are written as strings.
+    """
+    if type_code in _INTEGER_TYPES:
+        return pa.uint64() if type_code == FieldType.LONGLONG and flags & FieldFlag.UNSIGNED else pa.int64()
+    if type_code == FieldType.BIT:
+        return pa.uint64()
+    if type_code == FieldType.FLOAT:
+        return pa.float32()
+    if type_code == FieldType.DOUBLE:
+        return pa.float64()
+    if type_code in (FieldType.DATE, FieldType.NEWDATE):
+        return pa.date32()
+    if type_code in (FieldType.DATETIME, FieldType.TIMESTAMP):
+        # TIMESTAMP comes back as a naive datetime in the session time zone
+        return pa.timestamp("us")
+    if type_code == FieldType.TIME:
+        return pa.duration("us")
+    if type_code in _BLOB_TYPES and flags & FieldFlag.BINARY:
+        return pa.binary()  # BINARY, VARBINARY and BLOB; TEXT shares the type code without the flag
+    return pa.string()
+
+
+class ParquetEncoder(ExportEncoder):
+    name = "parquet"
+
+    def __init__(self, columns, header=True):
+        super().__init__(columns, header)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ExportUnavailable("Parquet export needs pyarrow (pip install pyarrow).")
+        self._pa = pa
+        self._pq = pq
+        self._schema = None
+        self._writer = None
+        self._sink = _ChunkSink()
+
+    def start(self, description=()):
+        # The writer needs the schema up front, and only the executed query knows the column types
+        self._schema = self._pa.schema([
+            (column, arrow_type(self._pa, field[1], field[7] if len(field) > 7 else 0))
+            for column, field in zip(self.columns, description)
+        ])
+        self._writer = self._pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+        return self._sink.drain()
+
+    def _array(self, values, field):
+        if field.type == self._pa.string():
+            values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+        return self._pa.array(values, type=field.type)
+
+    def encode(self, rows):
+        arrays = [self._array(values, field) for values, field in zip(zip(*rows), self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self):
+        self._writer.close()  # the footer: a Parquet file is only readable once this is written
+        return self._sink.drain()
+
+
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder, "parquet": ParquetEncoder}
+
+
+class MemberExport:
+    """The encoded export as an iterable of byte chunks, one per batch.
+
+    Owns ``conn`` (a dedicated connection, not a pooled one) and closes it when
+    iteration ends, fails or is abandoned; ``close`` is idempotent so a caller
+    can also call it as a backstop.
+    """
+
+    def __init__(
+        self,
+        conn,
+        encoder: ExportEncoder,
+        query: Tuple[str, tuple],
+        batch_size: int = BATCH_SIZE,
+        on_close: Optional[Callable[["MemberExport"], None]] = None,
+    ):
+        self.conn = conn
+        self.encoder = encoder
+        self.query = query
+        self.batch_size = batch_size
+        self.on_close = on_close
+        self.rows = 0
+        self.last_id = None
+        self.completed = False
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        try:
+            cursor = self.conn.cursor(buffered=False)
+            cursor.execute(*self.query)
+            yield self.encoder.start(cursor.description)
+            for rows in iter_batches(cursor, self.batch_size):
+                self.rows += len(rows)
+                self.last_id = rows[-1][0]
+                yield self.encoder.encode(rows)
+            # An abandoned export leaves rows unread; closing its connection discards them
+            cursor.close()
+            yield self.encoder.finish()
+            self.completed = True
+        finally:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            conn, self.conn = self.conn, None
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except Exception as e:
+            print(f"Error closing export connection: {e}")
+        if self.on_close:
+            self.on_close(self)
+
+
+def create_encoder(fmt: str, header: bool = True) -> ExportEncoder:
+    """Raises ExportUnavailable when Parquet is asked for without pyarrow."""
+    return ENCODERS[fmt](EXPORT_COLUMNS, header)
+
+
+def main():
+    from dotenv import load_dotenv
+    from db import ConnectionPool
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=sorted(ENCODERS), default="csv")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    parser.add_argument("--status")
+    parser.add_argument("--mandal")
+    parser.add_argument("--created-from", type=datetime.fromisoformat, help="inclusive, e.g. 2026-01-01")
+    parser.add_argument("--created-until", type=datetime.fromisoformat, help="exclusive")
+    parser.add_argument("--after-id", type=int, default=0, help="resume after this member id")
+    parser.add_argument("--append", action="store_true", help="add to an existing CSV/NDJSON file, without a header")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="rows per fetch and per write")
+    args = parser.parse_args()
+    if args.append and (args.format == "parquet" or not args.output):
+        parser.error("--append needs --output and a CSV or NDJSON format")
+
+    try:
+        encoder = create_encoder(args.format, header=not args.append)
+    except ExportUnavailable as e:
+        parser.error(str(e))
+    query = export_query(args.status, args.mandal, args.created_from, args.created_until, args.after_id)
+    conn = ConnectionPool.from_env(size=1, overflow=0).connect_unpooled()
+    export = MemberExport(conn, encoder, query, max(1, args.batch))
+    out = open(args.output, "ab" if args.append else "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in export:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+        # stdout may be the export itself
+        print(
+            f"{'Exported' if export.completed else 'Stopped after'} {export.rows} members "
+            f"(last id {export.last_id}) in {time.perf_counter() - export.started:.1f}s",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
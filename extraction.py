@@ -0,0 +1,195 @@
+import os
+import time
+import importlib
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+from epic_matcher import EpicCandidate, best_epic
+from ocr_engine import OcrEngine, create_ocr_engine, self_test
+
+# Kept free of FastAPI/app state so extraction worker processes can import it cheaply.
+# PyMuPDF, Pillow and pytesseract are imported on first use (or by the prewarm
+# thread, see load_pdf_stack): together they dominate a cold start, and requests
+# such as payment callbacks never touch them.
+
+# OCR tuning: render DPIs tried in order per page, and a Tesseract setup limited to
+# EPIC characters with sparse-text segmentation (psm 11; psm 7 suits tight crops).
+OCR_DPI_STAGES = tuple(int(dpi) for dpi in os.getenv("OCR_DPI_STAGES", "150,300").split(",") if dpi.strip())
+OCR_PSM = os.getenv("OCR_PSM", "11")
+OCR_CHAR_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+OCR_CONFIG = f"--psm {OCR_PSM} -c tessedit_char_whitelist={OCR_CHAR_WHITELIST}"
+
+# Pre-flight limits, checked against the PDF structure before anything is rendered.
+# Together they bound one extraction to PDF_MAX_PAGES text reads plus at most
+# OCR_MAX_PAGES x len(OCR_DPI_STAGES) renders of at most OCR_MAX_PIXMAP_MB each.
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_MAX_PAGE_INCHES = float(os.getenv("PDF_MAX_PAGE_INCHES", "50"))  # longest side of any page
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "3"))  # a voter ID is one or two pages
+OCR_MAX_PIXMAP_MB = float(os.getenv("OCR_MAX_PIXMAP_MB", "64"))  # per render; DPI is lowered to fit
+
+class EpicExtraction(NamedTuple):
+    epic: Optional[str]
+    # "text" (text layer), "ocr", "rejected" by the pre-flight screening, or
+    # "error" when the PDF could not be processed
+    method: str
+    # Filled in by the worker and reported by the caller; metrics can't be recorded
+    # directly from a pool process. Cache hits carry none of these.
+    pages_scanned: int = 0
+    timings: Optional[Dict[str, float]] = None
+    confidence: Optional[float] = None
+    detail: Optional[str] = None  # why the document was rejected
+    screening: Optional[Dict[str, object]] = None
+
+class PdfScreening(NamedTuple):
+    pages: int
+    text_pages: Tuple[int, ...] = ()  # page numbers with fonts, searched through the text layer
+    ocr_pages: Tuple[Tuple[int, Tuple[int, ...]], ...] = ()  # (page number, DPI stages), capped
+    ocr_megapixels: float = 0.0  # worst case, if every OCR stage of every page runs
+    rejected: Optional[str] = None
+
+    def summary(self) -> Dict[str, object]:
+        path = "+".join(name for name, used in (("text", self.text_pages), ("ocr", self.ocr_pages)) if used)
+        return {
+            "pages": self.pages, "path": path or "none", "ocr_pages": len(self.ocr_pages),
+            "ocr_megapixels": round(self.ocr_megapixels, 1),
+        }
+
+def load_pdf_stack():
+    for module in ("fitz", "PIL.Image", "pytesseract"):
+        importlib.import_module(module)
+
+_ocr_engine: Optional[OcrEngine] = None
+_ocr_engine_pid = None
+
+def ocr_engine() -> OcrEngine:
+    # One per process: a forked pool worker must not reuse its parent's Tesseract handle
+    global _ocr_engine, _ocr_engine_pid
+    if _ocr_engine is None or _ocr_engine_pid != os.getpid():
+        _ocr_engine = create_ocr_engine(int(OCR_PSM), OCR_CHAR_WHITELIST, OCR_CONFIG)
+        _ocr_engine_pid = os.getpid()
+    return _ocr_engine
+
+def check_ocr_engine() -> str:
+    """Build this process's OCR engine and run it once; raises if it can't OCR."""
+    return self_test(ocr_engine())
+
+def prewarm_worker():
+    """Run once in each extraction worker: imports, plus the OCR engine's model load
+    and a test recognition, so a broken engine fails readiness rather than uploads."""
+    load_pdf_stack()
+    check_ocr_engine()
+
+def find_epic_in_text(text: Optional[str]) -> Optional[str]:
+    candidate = best_epic(text)
+    return candidate.epic if candidate else None
+
+class _StageTimer:
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    def add(self, stage: str, started: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - started
+
+    def match(self, text: str) -> Optional[EpicCandidate]:
+        started = time.perf_counter()
+        try:
+            return best_epic(text)
+        finally:
+            self.add("match", started)
+
+def _ocr_page(page, dpi: int, timer: _StageTimer) -> str:
+    import fitz  # PyMuPDF
+
+    engine = ocr_engine()
+    started = time.perf_counter()
+    # Grayscale, no alpha: one byte per pixel, handed to the engine as is
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    timer.add("render", started)
+    started = time.perf_counter()
+    try:
+        return engine.recognise(pix.samples_mv, pix.width, pix.height, pix.stride, dpi)
+    finally:
+        timer.add("ocr", started)
+
+def _open_pdf(source: Union[Path, bytes]):
+    import fitz  # PyMuPDF
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")  # parsed from memory, nothing on disk
+    return fitz.open(source)
+
+def _ocr_stages(width: float, height: float) -> Tuple[int, ...]:
+    # Grayscale is one byte per pixel; cap the DPI so a render stays within the budget
+    ceiling = int(72 * (OCR_MAX_PIXMAP_MB * 1024 * 1024 / max(width * height, 1.0)) ** 0.5)
+    return tuple(dict.fromkeys(min(dpi, ceiling) for dpi in OCR_DPI_STAGES))
+
+def screen_pdf(doc) -> PdfScreening:
+    """Plan an extraction from the document structure alone: page count, page
+    boxes, encryption and each page's font and image resources. No content
+    stream is decoded and nothing is rendered."""
+    pages = doc.page_count
+    if doc.needs_pass:
+        return PdfScreening(pages, rejected="The PDF is password-protected.")
+    if pages == 0:
+        return PdfScreening(pages, rejected="The PDF has no pages.")
+    if pages > PDF_MAX_PAGES:
+        return PdfScreening(pages, rejected=f"The PDF has {pages} pages; at most {PDF_MAX_PAGES} are accepted.")
+    text_pages, scans, font_only = [], [], []
+    for page in doc:
+        rect = page.rect
+        if max(rect.width, rect.height) / 72 > PDF_MAX_PAGE_INCHES:
+            return PdfScreening(
+                pages, rejected=f"Page {page.number + 1} is larger than {PDF_MAX_PAGE_INCHES:g} inches."
+            )
+        has_fonts = bool(page.get_fonts())
+        if has_fonts:
+            text_pages.append(page.number)
+        # Scans carry images; a page with neither fonts nor images may be text drawn as outlines.
+        # Font-only pages are OCR'd last: their text layer can be garbled by a broken font encoding.
+        if page.get_images(full=True) or not has_fonts:
+            scans.append((page.number, rect))
+        else:
+            font_only.append((page.number, rect))
+    ocr_pages, megapixels = [], 0.0
+    for number, rect in (scans + font_only)[:OCR_MAX_PAGES]:
+        stages = _ocr_stages(rect.width, rect.height)
+        ocr_pages.append((number, stages))
+        megapixels += sum(rect.width * rect.height * (dpi / 72) ** 2 for dpi in stages) / 1e6
+    return PdfScreening(pages, tuple(text_pages), tuple(ocr_pages), megapixels)
+
+def extract_epic_with_method(source: Union[Path, bytes]) -> EpicExtraction:
+    timer = _StageTimer()
+    pages = 0
+    try:
+        with _open_pdf(source) as doc:
+            started = time.perf_counter()
+            screening = screen_pdf(doc)
+            timer.add("screen", started)
+            summary = screening.summary()
+            if screening.rejected:
+                return EpicExtraction(None, "rejected", 0, timer.timings, detail=screening.rejected, screening=summary)
+            # Text layer first: cheap, and stops at the first page that has the number.
+            for number in screening.text_pages:
+                pages += 1
+                started = time.perf_counter()
+                text = doc[number].get_text()
+                timer.add("text", started)
+                found = timer.match(text)
+                if found:
+                    return EpicExtraction(found.epic, "text", pages, timer.timings, found.confidence, screening=summary)
+            # Staged OCR fallback: page by page, re-rendering at a higher DPI only on a miss.
+            pages = 0
+            for number, stages in screening.ocr_pages:
+                pages += 1
+                page = doc[number]
+                for dpi in stages:
+                    found = timer.match(_ocr_page(page, dpi, timer))
+                    if found:
+                        return EpicExtraction(found.epic, "ocr", pages, timer.timings, found.confidence, screening=summary)
+        return EpicExtraction(None, "ocr", pages, timer.timings, screening=summary)
+    except Exception as e:
+        print(f"PDF processing error: {e}")
+        return EpicExtraction(None, "error", pages, timer.timings)
+
+def extract_epic_from_pdf(pdf_path: Path) -> Optional[str]:
+    return extract_epic_with_method(pdf_path).epic
@@ -0,0 +1,96 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from extraction import EpicExtraction
+from sqlite_util import LocalSQLite
+
+
+class ExtractionCache:
+    """SHA-256 of an uploaded PDF -> EpicExtraction.
+
+    An LRU bounded by ``max_entries`` with a TTL, optionally backed by a SQLite
+    file so results survive restarts and are shared between workers. Failed
+    extractions ("error") are never stored, since they may be transient, nor
+    are screening rejections, whose limits are configuration.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS extraction_cache (
+            digest TEXT PRIMARY KEY,
+            epic TEXT,
+            method TEXT NOT NULL,
+            created REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_extraction_cache_created ON extraction_cache (created);
+    """
+    PRUNE_EVERY = 256
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400.0, path: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = LocalSQLite(path, self.SCHEMA) if path else None
+        self._puts = 0
+
+    @classmethod
+    def from_env(cls) -> "ExtractionCache":
+        path = os.getenv("EXTRACTION_CACHE_PATH")
+        return cls(
+            max_entries=int(os.getenv("EXTRACTION_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", "86400")),
+            path=Path(path) if path else None,
+        )
+
+    def get(self, digest: str) -> Optional[EpicExtraction]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry:
+                result, created = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(digest)
+                    return result
+                del self._entries[digest]
+        if self._disk is None:
+            return None
+        row = self._disk.connect().execute(
+            "SELECT epic, method, created FROM extraction_cache WHERE digest = ? AND created >= ?",
+            (digest, now - self.ttl),
+        ).fetchone()
+        if not row:
+            return None
+        result = EpicExtraction(row["epic"], row["method"])
+        self._remember(digest, result, row["created"])
+        return result
+
+    def put(self, digest: str, result: EpicExtraction):
+        if result.method in ("error", "rejected"):
+            return
+        result = EpicExtraction(result.epic, result.method)  # drop per-run stats
+        now = time.time()
+        self._remember(digest, result, now)
+        if self._disk is None:
+            return
+        conn = self._disk.connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO extraction_cache (digest, epic, method, created) VALUES (?, ?, ?, ?)",
+            (digest, result.epic, result.method, now),
+        )
+        self._puts += 1
+        if self._puts % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM extraction_cache WHERE created < ?", (now - self.ttl,))
+
+    def _remember(self, digest, result, created):
+        with self._lock:
+            self._entries[digest] = (result, created)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,142 @@
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ExtractionQueueFull(Exception):
+    pass
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+class ExtractionPool:
+    """Bounded executor for CPU-heavy PDF/OCR work.
+
+    A slot is held from submission until the job really finishes, so a job that
+    outlives its caller's timeout still counts against ``max_pending``.
+
+    Worker processes are not forked from the app: by the time the pool starts,
+    the janitor, reaper, job and prewarm threads are running, and a fork can
+    copy a lock one of them holds into a child that then never gets it back.
+    They come from a forkserver (or spawn) and import what they need themselves.
+    """
+
+    def __init__(
+        self, workers: int, max_pending: int, timeout: float, mode: str = "process", start_method: str = "forkserver"
+    ):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown extraction mode: {mode}")
+        if start_method not in multiprocessing.get_all_start_methods() or start_method == "fork":
+            raise ValueError(f"Unsupported extraction start method: {start_method}")
+        self.start_method = start_method
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self.timeout = timeout
+        self.mode = mode
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(
+        cls, prefix: str = "EXTRACTION", default_workers: int = None, default_timeout: float = 60
+    ) -> "ExtractionPool":
+        # A second pool (e.g. prefix "JOB_EXTRACTION") gets its own <prefix>_* settings.
+        workers = int(os.getenv(f"{prefix}_WORKERS", default_workers or os.cpu_count() or 1))
+        return cls(
+            workers=workers,
+            max_pending=int(os.getenv(f"{prefix}_MAX_PENDING", workers * 4)),
+            timeout=float(os.getenv(f"{prefix}_TIMEOUT_SECONDS", default_timeout)),
+            mode=os.getenv(f"{prefix}_MODE", os.getenv("EXTRACTION_MODE", "process")).lower(),
+            start_method=os.getenv("EXTRACTION_START_METHOD", "forkserver").lower(),
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context(self.start_method)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extract")
+            return self._executor
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _reset(self, broken):
+        # A worker died (e.g. OOM-killed mid-render); replace the executor once.
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExtractionQueueFull()
+            self._pending += 1
+        executor = self.start()
+        try:
+            future = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError):
+            self._reset(executor)
+            executor = self.start()
+            try:
+                future = executor.submit(fn, *args)
+            except BaseException:
+                self._release()
+                raise
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return executor, future
+
+    async def run(self, fn, *args):
+        executor, future = self._submit(fn, *args)
+        try:
+            # Cancelling the wrapper only drops jobs that have not started yet.
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise ExtractionTimeout() from None
+        except BrokenProcessPool:
+            self._reset(executor)
+            raise
+
+    def prewarm(self, fn) -> int:
+        """Start the workers and run ``fn`` once per worker slot, so the first real
+        job doesn't pay for process start-up and imports."""
+        futures = [self._submit(fn)[1] for _ in range(self.workers)]
+        for future in futures:
+            future.result(self.timeout)
+        return len(futures)
+
+    def run_sync(self, fn, *args):
+        """Blocking variant of ``run`` for background threads."""
+        executor, future = self._submit(fn, *args)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise ExtractionTimeout() from None
+        except BrokenProcessPool:
+            self._reset(executor)
+            raise
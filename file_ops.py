@@ -0,0 +1,175 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlite_util import LocalSQLite
+
+# Dedicated threads for filesystem calls, so slow NFS round-trips never run on
+# the event loop and never compete with the DB threadpool.
+FILE_IO_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FILE_IO_WORKERS", "8")), thread_name_prefix="file-io"
+)
+
+
+async def run_file_io(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(FILE_IO_EXECUTOR, fn, *args)
+
+
+class FileJanitor:
+    """Durable, retrying file deletion.
+
+    ``enqueue`` only hands paths to the janitor thread in memory, so callers on
+    the event loop never wait on SQLite or the filesystem. The thread journals
+    them to SQLite before anything is removed, so a deletion requested before a
+    restart still happens (paths not yet journalled at a crash are lost; the
+    session reaper's stale sweep covers temporary uploads). It then drains the
+    journal, retrying failures with exponential backoff; entries that keep
+    failing after ``max_attempts`` stay in the journal for inspection.
+
+    ``hold`` guards files other requests may share: given a batch of due paths
+    for which ``shared`` is true (all of them without ``shared``) it returns
+    those that must not be removed yet, mapped to None (still in use for good;
+    dropped from the journal) or the time to look again. If it raises, each path
+    is asked again on its own, and only the ones that still fail are retried
+    later like a failed deletion.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pending_deletions (
+            path TEXT PRIMARY KEY,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt REAL NOT NULL,
+            last_error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_pending_deletions_due ON pending_deletions (next_attempt);
+    """
+    BATCH = 200
+
+    def __init__(
+        self,
+        journal_path: Path,
+        interval: float = 30.0,
+        max_attempts: int = 8,
+        remove=os.remove,
+        hold: Optional[Callable[[List[str]], Dict[str, Optional[float]]]] = None,
+        shared: Optional[Callable[[str], bool]] = None,
+    ):
+        self._db = LocalSQLite(journal_path, self.SCHEMA)
+        self.remove = remove  # e.g. a storage backend's delete, for non-local refs
+        self.hold = hold
+        self.shared = shared
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self._incoming = []  # handed over by enqueue, journalled by the thread
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="file-janitor", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def enqueue(self, paths: Iterable[Path]):
+        """Non-blocking: no I/O happens on the caller's thread."""
+        paths = [str(path) for path in paths if path]
+        if not paths:
+            return
+        with self._lock:
+            self._incoming.extend(paths)
+        self.start()
+        self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            incoming = len(self._incoming)
+        return incoming + self._db.connect().execute("SELECT COUNT(*) FROM pending_deletions").fetchone()[0]
+
+    def journal(self):
+        """Persist paths handed over by enqueue."""
+        with self._lock:
+            paths, self._incoming = self._incoming, []
+        if paths:
+            now = time.time()
+            self._db.connect().executemany(
+                "INSERT OR IGNORE INTO pending_deletions (path, next_attempt) VALUES (?, ?)",
+                [(path, now) for path in paths],
+            )
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.journal()
+                while self.drain() == self.BATCH:
+                    pass
+            except Exception as e:
+                print(f"File janitor error: {e}")
+            self._wake.wait(self.interval)
+        try:
+            self.journal()  # whatever arrived during shutdown is deleted after the restart
+        except Exception as e:
+            print(f"File janitor error: {e}")
+
+    def drain(self) -> int:
+        conn = self._db.connect()
+        due = conn.execute(
+            "SELECT path, attempts FROM pending_deletions WHERE next_attempt <= ? AND attempts < ? "
+            "ORDER BY next_attempt LIMIT ?",
+            (time.time(), self.max_attempts, self.BATCH),
+        ).fetchall()
+        held, unchecked = self._held([row["path"] for row in due])
+        for row in due:
+            if row["path"] in held:
+                retry_at = held[row["path"]]
+                if retry_at is None:
+                    conn.execute("DELETE FROM pending_deletions WHERE path = ?", (row["path"],))
+                else:
+                    conn.execute("UPDATE pending_deletions SET next_attempt = ? WHERE path = ?", (retry_at, row["path"]))
+                continue
+            try:
+                if row["path"] in unchecked:
+                    raise unchecked[row["path"]]
+                self.remove(row["path"])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                attempts = row["attempts"] + 1
+                conn.execute(
+                    "UPDATE pending_deletions SET attempts = ?, next_attempt = ?, last_error = ? WHERE path = ?",
+                    (attempts, time.time() + min(self.interval * 2 ** attempts, 3600), str(e), row["path"]),
+                )
+                print(f"Error deleting file {row['path']} (attempt {attempts}): {e}")
+                continue
+            conn.execute("DELETE FROM pending_deletions WHERE path = ?", (row["path"],))
+        return len(due)
+
+    def _held(self, paths: List[str]) -> Tuple[Dict[str, Optional[float]], Dict[str, Exception]]:
+        """``hold`` for the shared paths, plus the error for each one it couldn't answer."""
+        if self.hold is None:
+            return {}, {}
+        shared = [path for path in paths if self.shared is None or self.shared(path)]
+        if not shared:
+            return {}, {}
+        try:
+            return self.hold(shared), {}
+        except Exception:
+            pass
+        held, unchecked = {}, {}
+        for path in shared:
+            try:
+                held.update(self.hold([path]))
+            except Exception as e:
+                unchecked[path] = e
+        return held, unchecked
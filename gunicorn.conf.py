@@ -0,0 +1,33 @@
+# gunicorn -c gunicorn.conf.py
+# Same environment settings as serve.py; gunicorn supervises the uvicorn worker
+# processes (restarts crashed ones, graceful reloads on HUP).
+import os
+
+from dotenv import load_dotenv
+from uvicorn.workers import UvicornWorker
+
+from serve import server_settings
+
+load_dotenv()
+_settings = server_settings()
+
+
+class TunedUvicornWorker(UvicornWorker):
+    # gunicorn has no setting that reaches uvicorn's limit_concurrency
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "limit_concurrency": _settings["limit_concurrency"],
+        "proxy_headers": True,
+    }
+
+
+wsgi_app = _settings["app"]
+bind = f"{_settings['host']}:{_settings['port']}"
+workers = _settings["workers"]
+worker_class = TunedUvicornWorker
+keepalive = _settings["keepalive"]
+backlog = _settings["backlog"]
+forwarded_allow_ips = _settings["forwarded_allow_ips"]
+graceful_timeout = _settings["graceful_timeout"]
+# Heartbeat timeout; OCR runs in the extraction pool, so a healthy worker always answers
+timeout = int(os.getenv("WORKER_TIMEOUT_SECONDS", "120"))
@@ -0,0 +1,205 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+MEMBER_INSERT_SQL = """
+    INSERT INTO members
+    (name, profession, designation, mandal, dob, blood_group, contact_no,
+     address, pdf_proof_path, photo_path, photo_thumb_path, status, active_no, epic)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# MySQL ER_DUP_ENTRY; raised against uq_members_epic when an EPIC registers twice
+DUPLICATE_KEY_ERRNO = 1062
+
+# Rows per multi-row INSERT in bulk imports; keeps each statement well under max_allowed_packet.
+BULK_INSERT_CHUNK = 500
+
+# Columns the search API may return (file paths stay internal). "id" is always
+# included: it is the pagination key. created_at comes from migrations/006.
+SEARCH_COLUMNS = (
+    "id", "membership_no", "epic", "name", "profession", "designation", "mandal", "dob",
+    "blood_group", "contact_no", "address", "status", "active_no", "created_at",
+)
+# The only columns search_members filters on (equality), each covered by migrations/005
+SEARCH_FILTERS = ("mandal", "status", "blood_group", "membership_no")
+SEARCH_DEFAULT_COLUMNS = ("id", "membership_no", "name", "mandal", "blood_group", "status")
+
+
+class DuplicateEpic(Exception):
+    """The EPIC number already belongs to a member."""
+
+
+def _is_duplicate_epic(err: Exception) -> bool:
+    return getattr(err, "errno", None) == DUPLICATE_KEY_ERRNO and "epic" in str(err)
+
+
+def epic_registered(conn, epic: str) -> bool:
+    """Point lookup on uq_members_epic."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1 FROM members WHERE epic = %s LIMIT 1", (epic,))
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+
+def referenced_files(conn, refs: Sequence[str]) -> Set[str]:
+    """The refs some member row still points at (indexed by migrations/003)."""
+    refs = list(refs)
+    if not refs:
+        return set()
+    placeholders = ", ".join(["%s"] * len(refs))
+    found = set()
+    cursor = conn.cursor()
+    try:
+        for column in ("pdf_proof_path", "photo_path", "photo_thumb_path"):
+            cursor.execute(f"SELECT DISTINCT {column} FROM members WHERE {column} IN ({placeholders})", refs)
+            found.update(row[0] for row in cursor.fetchall())
+        return found
+    finally:
+        cursor.close()
+
+
+def membership_prefix(now: datetime = None) -> str:
+    now = now or datetime.utcnow()
+    return f"BSP-{now.year}{now.month:02d}-"
+
+
+def generate_membership_no(new_member_id: int) -> str:
+    return f"{membership_prefix()}{new_member_id:06d}"
+
+
+def insert_member(conn, values: Sequence) -> Tuple[int, str]:
+    """Insert one member and stamp its membership number in a single transaction.
+
+    The number is derived from the AUTO_INCREMENT id, so it still needs a second
+    statement, but both land in one commit: no reader ever sees the row without
+    a membership number. Rolls back and re-raises on any database error, as
+    DuplicateEpic when the EPIC (the last value) is already registered.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(MEMBER_INSERT_SQL, values)
+        new_member_id = cursor.lastrowid
+        membership_no = generate_membership_no(new_member_id)
+        cursor.execute("UPDATE members SET membership_no = %s WHERE id = %s", (membership_no, new_member_id))
+        conn.commit()
+        return new_member_id, membership_no
+    except Exception as err:
+        conn.rollback()
+        if _is_duplicate_epic(err):
+            raise DuplicateEpic(values[-1]) from err
+        raise
+    finally:
+        cursor.close()
+
+
+def bulk_insert_members(conn, rows: List[Sequence]) -> List[Tuple[int, str]]:
+    """Insert many members in one transaction with executemany.
+
+    mysql.connector folds each executemany chunk into a single multi-row INSERT.
+    Its ids need not be consecutive (innodb_autoinc_lock_mode=2 interleaves
+    concurrent inserts), so the new rows are read back by their unique EPIC and
+    each is stamped with one CASE UPDATE per chunk, in the same format as
+    generate_membership_no. Rows without an EPIC (paper forms) can't be read
+    back and are inserted one at a time. Returns (id, membership_no) in input order.
+    """
+    prefix = membership_prefix()
+    ids: List[Optional[int]] = [None] * len(rows)
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(rows), BULK_INSERT_CHUNK):
+            positions = range(start, min(start + BULK_INSERT_CHUNK, len(rows)))
+            with_epic = [i for i in positions if rows[i][-1]]
+            if with_epic:
+                # A repeated EPIC fails the unique key here, before the read-back
+                cursor.executemany(MEMBER_INSERT_SQL, [rows[i] for i in with_epic])
+                by_epic = {rows[i][-1]: i for i in with_epic}
+                placeholders = ", ".join(["%s"] * len(by_epic))
+                cursor.execute(f"SELECT id, epic FROM members WHERE epic IN ({placeholders})", list(by_epic))
+                for member_id, epic in cursor.fetchall():
+                    ids[by_epic[epic]] = member_id
+            for i in positions:
+                if not rows[i][-1]:
+                    cursor.execute(MEMBER_INSERT_SQL, rows[i])
+                    ids[i] = cursor.lastrowid
+            chunk_ids = [ids[i] for i in positions]
+            cases = " ".join(["WHEN %s THEN %s"] * len(chunk_ids))
+            placeholders = ", ".join(["%s"] * len(chunk_ids))
+            params = [value for member_id in chunk_ids for value in (member_id, f"{prefix}{member_id:06d}")]
+            cursor.execute(
+                f"UPDATE members SET membership_no = CASE id {cases} END "
+                f"WHERE id IN ({placeholders}) AND membership_no IS NULL",
+                params + chunk_ids,
+            )
+        conn.commit()
+        return [(member_id, f"{prefix}{member_id:06d}") for member_id in ids]
+    except Exception as err:
+        conn.rollback()
+        if _is_duplicate_epic(err):
+            raise DuplicateEpic(str(err)) from err
+        raise
+    finally:
+        cursor.close()
+
+
+class InvalidCursor(Exception):
+    """A search cursor that wasn't issued by search_members."""
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id = data["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as err:
+        raise InvalidCursor(cursor) from err
+    if not isinstance(last_id, int):
+        raise InvalidCursor(cursor)
+    return last_id
+
+
+def search_members(
+    conn, filters: Dict[str, object], columns: Sequence[str], limit: int, cursor: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of members matching all ``filters`` (equality), in id order.
+
+    Keyset pagination: the cursor carries the last id returned and the next page
+    starts after it (``id > %s``), so a deep page costs the same as the first
+    and rows inserted meanwhile never shift the pages. With every filter an
+    equality on a leading index column, InnoDB walks the index in id order (the
+    primary key is the implicit last column) and stops after ``limit`` + 1
+    rows. Returns (rows, next cursor or None on the last page).
+    """
+    columns = ["id"] + [column for column in columns if column != "id"]
+    unknown = [column for column in columns if column not in SEARCH_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown member columns: {', '.join(unknown)}")
+    unindexed = [column for column in filters if column not in SEARCH_FILTERS]
+    if unindexed:
+        raise ValueError(f"Members can't be filtered by: {', '.join(unindexed)}")
+    conditions, params = [], []
+    for column, value in filters.items():
+        conditions.append(f"{column} = %s")
+        params.append(value)
+    if cursor:
+        conditions.append("id > %s")
+        params.append(decode_cursor(cursor))
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    db_cursor = conn.cursor(dictionary=True)
+    try:
+        db_cursor.execute(
+            f"SELECT {', '.join(columns)} FROM members {where}ORDER BY id LIMIT %s", (*params, limit + 1)
+        )
+        rows = db_cursor.fetchall()
+    finally:
+        db_cursor.close()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1]["id"])
+    return rows, None
@@ -0,0 +1,273 @@
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Sequence, Tuple
+
+# Minimal Prometheus text-format metrics, kept dependency-free. Values are per
+# process: with several Passenger workers each scrape sees one worker's numbers.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> str:
+        return f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> str:
+        with self._lock:
+            items = list(self._values.items())
+        lines = [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+        return self.header() + "".join(line + "\n" for line in lines)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # per-bucket counts, then +Inf count, then sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        with self._lock:
+            items = [(key, list(counts)) for key, counts in self._values.items()]
+        lines = []
+        for key, counts in items:
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {count}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {counts[len(self.buckets)]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(counts[-1])}")
+        return self.header() + "".join(line + "\n" for line in lines)
+
+
+class Gauge(_Metric):
+    """Sampled at scrape time from a callback, e.g. a queue length."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, read: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.read = read
+
+    def render(self) -> str:
+        try:
+            value = self.read()
+        except Exception as e:
+            return self.header() + f"# error reading {self.name}: {e}\n"
+        return self.header() + f"{self.name} {_format_value(value)}\n"
+
+
+class GaugeSampler:
+    """Reads slow gauge callbacks (SQLite counts) on a background thread every
+    ``interval`` seconds, so a scrape only returns the last value and never
+    waits on I/O. A callback that fails keeps its previous value."""
+
+    def __init__(self, interval: float = 15.0):
+        self.interval = interval
+        self._reads = []
+        self._values = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def cached(self, read: Callable[[], float]) -> Callable[[], float]:
+        key = len(self._reads)
+        self._reads.append(read)
+
+        def value():
+            with self._lock:
+                if key not in self._values:
+                    raise LookupError("not sampled yet")
+                return self._values[key]
+
+        return value
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="gauge-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            self.refresh()
+            if self._stop.wait(self.interval):
+                return
+
+    def refresh(self):
+        for key, read in enumerate(list(self._reads)):
+            try:
+                value = read()
+            except Exception as e:
+                print(f"Gauge sampler error: {e}")
+                continue
+            with self._lock:
+                self._values[key] = value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, read) -> Gauge:
+        return self.register(Gauge(name, documentation, read))
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics)
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "bsp_http_request_seconds", "Request latency by route and status.", ("route", "method", "status")
+)
+UPLOAD_SECONDS = REGISTRY.histogram(
+    "bsp_upload_seconds", "Time to receive and store a multipart upload.", ("endpoint",)
+)
+UPLOAD_BYTES = REGISTRY.counter("bsp_upload_bytes_total", "Bytes accepted from file uploads.", ("field",))
+EXTRACTIONS = REGISTRY.counter(
+    "bsp_extractions_total", "EPIC extractions by method and whether they came from the cache.", ("method", "source")
+)
+EXTRACTION_SECONDS = REGISTRY.histogram(
+    "bsp_extraction_seconds", "End-to-end extraction time including queueing.", ("method",)
+)
+EXTRACTION_STAGE_SECONDS = REGISTRY.histogram(
+    "bsp_extraction_stage_seconds", "Time spent per extraction stage (text, render, ocr, match).", ("stage",)
+)
+EXTRACTION_PAGES = REGISTRY.histogram(
+    "bsp_extraction_pages_scanned", "Pages examined per extraction.", ("method",), buckets=(1, 2, 3, 5, 10, 25, 50)
+)
+EPIC_PRECHECKS = REGISTRY.counter(
+    "bsp_epic_precheck_total", "Duplicate-EPIC pre-checks by outcome (cache, registered, new, skipped).", ("result",)
+)
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "bsp_admission_rejections_total", "Verification requests shed by admission control (ip, epic, capacity).", ("scope",)
+)
+PAYMENT_CALLBACKS = REGISTRY.counter(
+    "bsp_payment_callbacks_total", "Payment results by outcome (applied, unchanged, conflict, not_found, replayed).", ("outcome",)
+)
+DB_SECONDS = REGISTRY.histogram("bsp_db_seconds", "Database time by operation.", ("operation",))
+FILE_IO_SECONDS = REGISTRY.histogram("bsp_file_io_seconds", "Filesystem time by operation.", ("operation",))
+
+
+_event_logger = logging.getLogger("bsp.events")
+if not _event_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _event_logger.addHandler(_handler)
+    _event_logger.setLevel(logging.INFO)
+    _event_logger.propagate = False
+
+
+def log_event(event: str, **fields):
+    """One JSON object per line, for log search rather than eyeballing."""
+    record = {"ts": round(time.time(), 3), "event": event}
+    record.update(fields)
+    _event_logger.info(json.dumps(record, default=str, separators=(",", ":")))
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, route=route, method=scope["method"], status=status["code"]
+            )
@@ -0,0 +1,112 @@
+"""Move members' files from the old flat upload directories into the
+content-addressed storage layout (storage.py) and repoint their rows.
+
+    python migrate_storage.py [--dry-run] [--batch 200]
+
+Each file is linked (or copied) into the store first, the row is updated and
+committed, and only then is the old file deleted, so an interrupted run leaves
+every row pointing at a file that exists. Safe to re-run: rows already in the
+new layout are skipped. Uses the same environment as the app (settings.py and
+STORAGE_BACKEND), without importing it.
+"""
+import time
+import argparse
+from pathlib import Path
+
+import mysql.connector
+
+import db
+from db import ConnectionPool
+from settings import STORAGE_NAMESPACES
+from storage import create_storage
+
+# (column, namespace); thumbnails are keyed by their photo's digest like new uploads
+COLUMNS = (("pdf_proof_path", "proofs"), ("photo_path", "photos"), ("photo_thumb_path", "thumbs"))
+
+
+def migrate_row(storage, row: dict, dry_run: bool):
+    """Returns ({column: new ref}, [old paths to delete], [problems])."""
+    updates, old_files, problems = {}, [], []
+    photo_digest = None
+    for column, namespace in COLUMNS:
+        ref = row.get(column)
+        if not ref or storage.is_content_addressed(ref):
+            continue
+        if not storage.exists(ref):
+            problems.append(f"{column} missing: {ref}")
+            continue
+        extension = Path(ref).suffix.lower()
+        if dry_run:
+            updates[column] = f"<{namespace}{extension}>"
+            continue
+        digest = photo_digest if namespace == "thumbs" else None
+        stored = storage.put_file(ref, namespace, extension, digest=digest, keep_source=True)
+        if namespace == "photos":
+            photo_digest = stored.digest
+        updates[column] = stored.ref
+        old_files.append(ref)
+    return updates, old_files, problems
+
+
+def migrate(pool, storage, batch: int, dry_run: bool) -> dict:
+    counts = {"rows": 0, "files": 0, "missing": 0}
+    last_id = 0
+    started = time.perf_counter()
+    while True:
+        conn = pool.acquire()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                "SELECT id, pdf_proof_path, photo_path, photo_thumb_path FROM members "
+                "WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch),
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            old_files = []
+            for row in rows:
+                updates, stale, problems = migrate_row(storage, row, dry_run)
+                for problem in problems:
+                    print(f"member {row['id']}: {problem}")
+                counts["missing"] += len(problems)
+                if not updates:
+                    continue
+                counts["rows"] += 1
+                counts["files"] += len(updates)
+                if not dry_run:
+                    assignments = ", ".join(f"{column} = %s" for column in updates)
+                    cursor.execute(f"UPDATE members SET {assignments} WHERE id = %s", (*updates.values(), row["id"]))
+                    old_files.extend(stale)
+            conn.commit()
+            cursor.close()
+        finally:
+            db.release(conn)
+        # Old copies go only after the new refs are committed
+        for path in old_files:
+            try:
+                storage.delete(path)
+            except OSError as e:
+                print(f"Could not delete {path}: {e}")
+        print(f"... up to id {last_id}: {counts} ({time.perf_counter() - started:.1f}s)")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate member files into content-addressed storage.")
+    parser.add_argument("--batch", type=int, default=200, help="members per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move without changing anything")
+    args = parser.parse_args()
+
+    pool = ConnectionPool.from_env(size=1, overflow=0, timeout=30)
+    try:
+        counts = migrate(pool, create_storage(STORAGE_NAMESPACES), max(1, args.batch), args.dry_run)
+    except mysql.connector.Error as err:
+        print(f"Database error: {err}")
+        raise SystemExit(1)
+    print(f"Done{' (dry run)' if args.dry_run else ''}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
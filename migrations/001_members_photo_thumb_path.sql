@@ -0,0 +1,3 @@
+-- Normalised member photos get a small thumbnail alongside the resized original.
+ALTER TABLE members
+    ADD COLUMN photo_thumb_path VARCHAR(512) NULL AFTER photo_path;
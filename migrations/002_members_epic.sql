@@ -0,0 +1,6 @@
+-- The verified EPIC number, unique across members so one voter ID registers once.
+-- Existing rows stay NULL (MySQL allows any number of NULLs in a unique index)
+-- until backfill_epics.py reads them from their stored pdf_proof_path files.
+ALTER TABLE members
+    ADD COLUMN epic CHAR(10) NULL AFTER membership_no,
+    ADD UNIQUE INDEX uq_members_epic (epic);
@@ -0,0 +1,8 @@
+-- Stored files are content-addressed and shared by every member with identical
+-- content, so the file janitor checks that no row still points at a file before
+-- deleting it (see held_files in prod_main.py). These indexes make that check
+-- a lookup per file instead of a table scan.
+ALTER TABLE members
+    ADD INDEX idx_members_pdf_proof_path (pdf_proof_path(255)),
+    ADD INDEX idx_members_photo_path (photo_path(255)),
+    ADD INDEX idx_members_photo_thumb_path (photo_thumb_path(255));
@@ -0,0 +1,19 @@
+-- Payment gateway callbacks already applied, keyed by the gateway's idempotency
+-- key (or transaction id): a retried callback is answered from here with one
+-- primary-key read instead of touching members again.
+-- Failed payments now move the member to status 'failed' (EPIC and file paths
+-- cleared) instead of deleting the row, so a late callback finds a final state.
+CREATE TABLE payment_callbacks (
+    idempotency_key VARCHAR(128) NOT NULL PRIMARY KEY,
+    member_id INT NOT NULL,
+    payment_status VARCHAR(16) NOT NULL,
+    outcome VARCHAR(16) NOT NULL,
+    member_status VARCHAR(32) NULL,
+    received_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_payment_callbacks_member (member_id)
+);
+
+-- The status column must accept 'failed' (it may have been an ENUM of
+-- 'pending_payment'/'active' or a shorter VARCHAR); widen it explicitly.
+ALTER TABLE members
+    MODIFY status VARCHAR(32) NOT NULL DEFAULT 'pending_payment';
@@ -0,0 +1,11 @@
+-- Secondary indexes for the member search API (GET /members/). Every filter is
+-- an equality and results are ordered by id, which InnoDB appends to each
+-- secondary index, so a search on a leading prefix of an index reads only the
+-- rows it returns: e.g. active O- donors in a mandal walk
+-- idx_members_mandal_status_blood from the cursor's id onwards.
+-- A filter set that skips a leading column (say mandal + blood_group) still
+-- narrows by mandal but sorts that mandal's matches before paging.
+ALTER TABLE members
+    ADD INDEX idx_members_mandal_status_blood (mandal, status, blood_group),
+    ADD INDEX idx_members_status_blood (status, blood_group),
+    ADD INDEX idx_members_membership_no (membership_no);
@@ -0,0 +1,6 @@
+-- When each member registered. The search API returns it and the export
+-- (export_members.py, GET /members/export/) filters on it by date range.
+-- Existing rows get the time of the migration; registrations record their own.
+ALTER TABLE members
+    ADD COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ADD INDEX idx_members_created_at (created_at);
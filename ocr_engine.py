@@ -0,0 +1,109 @@
+import os
+import threading
+
+# Pages reach the engine as raw 8-bit grayscale samples straight from the PyMuPDF
+# pixmap (no PNG encode/decode). tesserocr keeps one TessBaseAPI, with the
+# language model loaded, alive per worker thread; pytesseract, which spawns the
+# tesseract binary per page, is the fallback when tesserocr isn't installed.
+# OCR_ENGINE: auto (default), tesserocr or pytesseract.
+
+
+class OcrEngine:
+    name = ""
+
+    def recognise(self, samples, width: int, height: int, stride: int, dpi: int) -> str:
+        raise NotImplementedError
+
+
+class TesserocrEngine(OcrEngine):
+    name = "tesserocr"
+
+    def __init__(self, psm: int, whitelist: str, lang: str = "eng"):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self.psm = psm
+        self.whitelist = whitelist
+        self.lang = lang
+        self._local = threading.local()  # a TessBaseAPI isn't thread-safe; thread-mode pools get one each
+        self._bytes_only = False  # builds whose SetImageBytes refuses a memoryview
+        self._api()  # fail here, not on the first page, if the language data is missing
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            # psm is a plain int; tesserocr.PSM is a namespace of constants, not a constructor
+            api = self._tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm)
+            api.SetVariable("tessedit_char_whitelist", self.whitelist)
+            self._local.api = api
+        return api
+
+    def recognise(self, samples, width, height, stride, dpi):
+        api = self._api()
+        # The pixmap's buffer as is; Tesseract copies it into its own image anyway
+        if not self._bytes_only:
+            try:
+                api.SetImageBytes(samples, width, height, 1, stride)
+            except TypeError:
+                self._bytes_only = True
+        if self._bytes_only:
+            api.SetImageBytes(bytes(samples), width, height, 1, stride)
+        api.SetSourceResolution(dpi)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()  # drops the page image and results, keeps the loaded model
+
+
+class PytesseractEngine(OcrEngine):
+    name = "pytesseract"
+
+    def __init__(self, config: str, lang: str = "eng"):
+        self.config = config
+        self.lang = lang
+
+    def recognise(self, samples, width, height, stride, dpi):
+        from PIL import Image
+        import pytesseract
+
+        # A view onto the pixmap's buffer; nothing is decoded or copied here
+        image = Image.frombuffer("L", (width, height), samples, "raw", "L", stride, 1)
+        image.info["dpi"] = (dpi, dpi)
+        return pytesseract.image_to_string(image, lang=self.lang, config=self.config)
+
+
+def self_test(engine: OcrEngine) -> str:
+    """Recognise a tiny blank page once; raises if the engine can't actually run."""
+    size = 32
+    engine.recognise(bytes([255]) * size * size, size, size, size, 72)
+    return engine.name
+
+
+def create_ocr_engine(psm: int, whitelist: str, config: str) -> OcrEngine:
+    choice = os.getenv("OCR_ENGINE", "auto").lower()
+    if choice not in ("auto", "tesserocr", "pytesseract"):
+        raise ValueError(f"Unknown OCR_ENGINE: {choice}")
+    if choice in ("auto", "tesserocr"):
+        try:
+            engine = TesserocrEngine(psm, whitelist)
+            self_test(engine)
+            return engine
+        except Exception as e:
+            if choice == "tesserocr":
+                raise
+            print(f"tesserocr unavailable ({e}); using pytesseract")
+    return PytesseractEngine(config)
+
+
+def tesseract_version() -> str:
+    try:
+        if os.getenv("OCR_ENGINE", "auto").lower() == "pytesseract":
+            raise ImportError
+        import tesserocr
+
+        return f"tesserocr {tesserocr.tesseract_version().splitlines()[0]}"
+    except ImportError:
+        import pytesseract
+
+        # Runs the binary once, which also pulls it and its traineddata into the page cache
+        return f"pytesseract {pytesseract.get_tesseract_version()}"
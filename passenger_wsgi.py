@@ -1,5 +1,8 @@
 import os
 import sys
+import time
+
+STARTED = time.perf_counter()
 
 # Absolute path to the application root (folder containing main.py and .env)
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -24,7 +27,12 @@ except Exception:
 from a2wsgi import ASGIMiddleware
 
 # Import the FastAPI app from main.py (must be in the same folder as this file)
-from main import app  # FastAPI instance
+from main import app, start_prewarm  # FastAPI instance
 
 # WSGI callable for Passenger
 application = ASGIMiddleware(app)
+
+# Lifespan events don't fire under a2wsgi: warm the DB pool and PDF/OCR stack in a
+# background thread (PREWARM=false to skip) while the first requests are served.
+start_prewarm()
+print(f"Passenger startup: ready to serve in {time.perf_counter() - STARTED:.2f}s")
@@ -0,0 +1,221 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from members import DUPLICATE_KEY_ERRNO
+
+# Gateway result -> member status. Only pending_payment members move, and each
+# move is a single conditional UPDATE, so retried, reordered or concurrent
+# callbacks can't re-apply a transition or undo a finished one (a late
+# "failed" never deletes an active member).
+TRANSITIONS = {"successful": "active", "failed": "failed"}
+FILE_COLUMNS = ("pdf_proof_path", "photo_path", "photo_thumb_path")
+
+
+class PaymentOutcome(NamedTuple):
+    member_id: int
+    # applied, unchanged (already in that state), conflict (in the other final state), not_found,
+    # or key_reused (the idempotency key belongs to another member's or another status's callback)
+    outcome: str
+    member_status: Optional[str]
+    replayed: bool = False  # answered from payment_callbacks by idempotency key
+    files: Tuple[str, ...] = ()  # to delete once committed (failed payments)
+    epic: Optional[str] = None  # released by a failed payment
+
+
+class ConcurrentPaymentUpdate(Exception):
+    """A member in a reconciliation batch changed state mid-transaction; nothing was applied."""
+
+
+def _placeholders(values: Sequence) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def _replayed(row: dict, member_id: int, gateway_status: str) -> PaymentOutcome:
+    # A key is only a replay of the same callback; reused for anything else, it answers nothing
+    if row["member_id"] != member_id or row["payment_status"] != gateway_status:
+        return PaymentOutcome(member_id, "key_reused", None)
+    return PaymentOutcome(row["member_id"], row["outcome"], row["member_status"], replayed=True)
+
+
+def _recorded(cursor, key: str, member_id: int, gateway_status: str) -> Optional[PaymentOutcome]:
+    cursor.execute(
+        "SELECT member_id, payment_status, outcome, member_status FROM payment_callbacks WHERE idempotency_key = %s",
+        (key,),
+    )
+    row = cursor.fetchone()
+    return _replayed(row, member_id, gateway_status) if row else None
+
+
+def _unapplied(member_id: int, target: str, current: Optional[str]) -> PaymentOutcome:
+    if current is None:
+        return PaymentOutcome(member_id, "not_found", None)
+    return PaymentOutcome(member_id, "unchanged" if current == target else "conflict", current)
+
+
+def _fail_members(cursor, rows: Sequence[dict]) -> Dict[int, Tuple[str, ...]]:
+    """Clear EPIC and file columns of members just moved to 'failed' and return
+    the files to delete per member. The row stays as a record of the failed payment;
+    its EPIC is freed so the voter can register again."""
+    ids = [row["id"] for row in rows]
+    cursor.execute(
+        "UPDATE members SET epic = NULL, pdf_proof_path = NULL, photo_path = NULL, photo_thumb_path = NULL "
+        f"WHERE id IN ({_placeholders(ids)})",
+        ids,
+    )
+    # Identical photos are stored once; keep the file while another member uses it.
+    photos = sorted({row["photo_path"] for row in rows if row.get("photo_path")})
+    shared = set()
+    if photos:
+        cursor.execute(
+            f"SELECT DISTINCT photo_path FROM members WHERE photo_path IN ({_placeholders(photos)})",
+            photos,
+        )
+        shared = {row["photo_path"] for row in cursor.fetchall()}
+    files = {}
+    for row in rows:
+        columns = ("pdf_proof_path",) if row.get("photo_path") in shared else FILE_COLUMNS
+        files[row["id"]] = tuple(row[column] for column in columns if row.get(column))
+    return files
+
+
+def apply_payment(conn, member_id: int, gateway_status: str, idempotency_key: Optional[str] = None) -> PaymentOutcome:
+    """Apply one gateway callback and commit.
+
+    With an idempotency key, a key seen before is answered from payment_callbacks
+    (one indexed read) and the member is not touched; a key recorded for another
+    member or status gives "key_reused". Otherwise the hot path is a
+    single conditional UPDATE; only a failed payment reads the row back, to find
+    the files to delete. Rolls back and re-raises on database errors.
+    """
+    target = TRANSITIONS[gateway_status]
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if idempotency_key:
+            recorded = _recorded(cursor, idempotency_key, member_id, gateway_status)
+            if recorded:
+                return recorded
+
+        cursor.execute(
+            "UPDATE members SET status = %s WHERE id = %s AND status = 'pending_payment'", (target, member_id)
+        )
+        if cursor.rowcount == 1:
+            outcome = PaymentOutcome(member_id, "applied", target)
+            if target == "failed":
+                # The UPDATE holds the row lock, so nothing can change it before commit
+                cursor.execute(
+                    "SELECT id, epic, pdf_proof_path, photo_path, photo_thumb_path FROM members WHERE id = %s",
+                    (member_id,),
+                )
+                row = cursor.fetchone()
+                files = _fail_members(cursor, [row])[member_id]
+                outcome = outcome._replace(files=files, epic=row["epic"])
+        else:
+            cursor.execute("SELECT status FROM members WHERE id = %s", (member_id,))
+            row = cursor.fetchone()
+            outcome = _unapplied(member_id, target, row["status"] if row else None)
+
+        if idempotency_key:
+            try:
+                cursor.execute(
+                    "INSERT INTO payment_callbacks (idempotency_key, member_id, payment_status, outcome, member_status) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    (idempotency_key, member_id, gateway_status, outcome.outcome, outcome.member_status),
+                )
+            except Exception as err:
+                if getattr(err, "errno", None) != DUPLICATE_KEY_ERRNO:
+                    raise
+                # The same callback raced us and committed first; answer with its result
+                conn.rollback()
+                return _recorded(cursor, idempotency_key, member_id, gateway_status)
+        conn.commit()
+        return outcome
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def reconcile_payments(conn, payments: Sequence[Tuple[int, str, Optional[str]]]) -> List[PaymentOutcome]:
+    """Apply many (member_id, gateway_status, idempotency_key) results in one transaction.
+
+    Current states are read with one query, transitions are worked out in order
+    (a later entry for the same member sees the earlier one), and then applied
+    with one UPDATE per target status plus one multi-row insert of the new
+    idempotency keys. Raises ConcurrentPaymentUpdate, after rolling back, if a
+    member changed state in between; the whole batch can simply be retried.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        keys = sorted({key for _, _, key in payments if key})
+        recorded = {}
+        if keys:
+            cursor.execute(
+                "SELECT idempotency_key, member_id, payment_status, outcome, member_status FROM payment_callbacks "
+                f"WHERE idempotency_key IN ({_placeholders(keys)})",
+                keys,
+            )
+            recorded = {row["idempotency_key"]: row for row in cursor.fetchall()}
+
+        member_ids = sorted({member_id for member_id, _, _ in payments})
+        cursor.execute(
+            "SELECT id, status, epic, pdf_proof_path, photo_path, photo_thumb_path FROM members "
+            f"WHERE id IN ({_placeholders(member_ids)})",
+            member_ids,
+        )
+        members = {row["id"]: row for row in cursor.fetchall()}
+        states = {member_id: row["status"] for member_id, row in members.items()}
+
+        outcomes, callbacks, moves = [], [], {"active": [], "failed": []}
+        for member_id, gateway_status, key in payments:
+            if key and key in recorded:
+                outcomes.append(_replayed(recorded[key], member_id, gateway_status))
+                continue
+            target = TRANSITIONS[gateway_status]
+            current = states.get(member_id)
+            if current == "pending_payment":
+                states[member_id] = target
+                moves[target].append(member_id)
+                outcome = PaymentOutcome(member_id, "applied", target)
+            else:
+                outcome = _unapplied(member_id, target, current)
+            outcomes.append(outcome)
+            if key:
+                # A repeated key later in the batch
+                recorded[key] = {
+                    "member_id": member_id, "payment_status": gateway_status,
+                    "outcome": outcome.outcome, "member_status": outcome.member_status,
+                }
+                callbacks.append((key, member_id, gateway_status, outcome.outcome, outcome.member_status))
+
+        for target, ids in moves.items():
+            if not ids:
+                continue
+            cursor.execute(
+                "UPDATE members SET status = %s WHERE status = 'pending_payment' "
+                f"AND id IN ({_placeholders(ids)})",
+                (target, *ids),
+            )
+            if cursor.rowcount != len(ids):
+                raise ConcurrentPaymentUpdate()
+        files = _fail_members(cursor, [members[member_id] for member_id in moves["failed"]]) if moves["failed"] else {}
+        if callbacks:
+            cursor.executemany(
+                "INSERT INTO payment_callbacks (idempotency_key, member_id, payment_status, outcome, member_status) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                callbacks,
+            )
+        conn.commit()
+    except Exception as err:
+        conn.rollback()
+        if getattr(err, "errno", None) == DUPLICATE_KEY_ERRNO:
+            raise ConcurrentPaymentUpdate() from err  # a key was recorded by a callback meanwhile
+        raise
+    finally:
+        cursor.close()
+
+    return [
+        outcome._replace(files=files[outcome.member_id], epic=members[outcome.member_id]["epic"])
+        if outcome.outcome == "applied" and outcome.member_status == "failed" and not outcome.replayed
+        else outcome
+        for outcome in outcomes
+    ]
@@ -0,0 +1,88 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Refuse decompression bombs well before Pillow's default 178 MP hard limit.
+MAX_IMAGE_PIXELS = int(os.getenv("PHOTO_MAX_PIXELS", str(60_000_000)))
+
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp"}
+
+
+class InvalidPhoto(Exception):
+    pass
+
+
+@dataclass
+class PhotoSettings:
+    max_size: int = 1600
+    thumb_size: int = 256
+    format: str = "JPEG"
+    quality: int = 85
+
+    @classmethod
+    def from_env(cls) -> "PhotoSettings":
+        settings = cls(
+            max_size=int(os.getenv("PHOTO_MAX_SIZE", "1600")),
+            thumb_size=int(os.getenv("PHOTO_THUMB_SIZE", "256")),
+            format=os.getenv("PHOTO_FORMAT", "JPEG").upper(),
+            quality=int(os.getenv("PHOTO_QUALITY", "85")),
+        )
+        if settings.format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported PHOTO_FORMAT: {settings.format}")
+        return settings
+
+    @property
+    def extension(self) -> str:
+        return FORMAT_EXTENSIONS[self.format]
+
+
+def _pillow():
+    # Imported on first use so processes that never see a photo don't pay for Pillow at startup
+    from PIL import Image, ImageOps
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    return Image, ImageOps
+
+
+def _save(image: "Image.Image", path: Path, settings: PhotoSettings):
+    # Written under a temp name and renamed, so a reader never sees half a file.
+    # No exif/icc arguments are passed, which strips all metadata.
+    partial = path.with_name(f".{path.name}.part")
+    options = {"quality": settings.quality, "optimize": True}
+    if settings.format == "JPEG":
+        options["progressive"] = True
+    image.save(partial, settings.format, **options)
+    os.replace(partial, path)
+
+
+def normalise_photo(source: Path, photo_path: Path, thumb_path: Path, settings: PhotoSettings) -> Tuple[Path, Path]:
+    """Validate, orient, downscale and re-encode an uploaded photo plus a thumbnail.
+
+    Blocking and CPU-bound; run it off the event loop. Raises InvalidPhoto if
+    the upload cannot be decoded.
+    """
+    Image, ImageOps = _pillow()
+    try:
+        with Image.open(source) as image:
+            # JPEG decoders can scale by 1/2..1/8 while decoding, far cheaper than a full decode + resize.
+            image.draft("RGB", (settings.max_size, settings.max_size))
+            image.load()
+            image = ImageOps.exif_transpose(image)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidPhoto(str(e)) from e
+
+    if image.mode != "RGB":
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+
+    image.thumbnail((settings.max_size, settings.max_size), Image.LANCZOS)
+    _save(image, photo_path, settings)
+    thumb_path.parent.mkdir(parents=True, exist_ok=True)  # startup hooks don't run under a2wsgi
+    image.thumbnail((settings.thumb_size, settings.thumb_size), Image.LANCZOS)
+    _save(image, thumb_path, settings)
+    return photo_path, thumb_path
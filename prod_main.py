@@ -1,33 +1,95 @@
 import os
-import io
-import re
+import hmac
+import json
+import time
 import uuid
-import shutil
 import enum
+import asyncio
+import threading
 from pathlib import Path
-from datetime import date, datetime, timedelta
-from typing import Annotated, List, Optional
+from datetime import date, datetime
+from typing import Annotated, List, Literal, Optional, Set, Union
+
+STARTUP_STARTED = time.perf_counter()
 
-import fitz  # PyMuPDF
-from PIL import Image
-import pytesseract
-from dotenv import load_dotenv
 import mysql.connector
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+
+import db
+from admission import RateLimited
+from batch_uploads import build_items, expand_zip, parse_manifest
+from db import DatabaseBusy
+from extraction import check_ocr_engine, extract_epic_with_method, load_pdf_stack, prewarm_worker
+from export_members import EXPORT_MEDIA_TYPES, ExportUnavailable, MemberExport, create_encoder, export_query
+from file_ops import run_file_io
+import metrics
+from metrics import DB_SECONDS, FILE_IO_SECONDS, log_event
+from ocr_engine import tesseract_version
+from extraction_pool import ExtractionQueueFull, ExtractionTimeout
+from photos import InvalidPhoto, PhotoSettings, normalise_photo
+from epic_registry import RegisteredEpicCache
+from members import (
+    SEARCH_COLUMNS, SEARCH_DEFAULT_COLUMNS, DuplicateEpic, InvalidCursor, bulk_insert_members, epic_registered,
+    insert_member, search_members,
+)
+from payments import TRANSITIONS, ConcurrentPaymentUpdate, apply_payment, reconcile_payments
+from uploads import PARTIAL_SUFFIX, FileRule, multipart_openapi, read_streaming_form
+from settings import JOB_UPLOAD_DIR, PDF_UPLOAD_DIR, PHOTO_THUMB_DIR, PHOTO_UPLOAD_DIR, TEMP_UPLOAD_DIR
+from verification_jobs import FINISHED
+from verification_service import (
+    ADMISSION, DB_POOL, EXTRACTION_CACHE, EXTRACTION_POOL, FILE_JANITOR, JOB_EXTRACTION_POOL, JOB_WORKER,
+    SESSION_REAPER, STORAGE, VERIFICATION_JOBS, VERIFICATION_SESSIONS, VERIFY_ASYNC_ENABLED, cleanup_files,
+    epic_mismatch_detail, open_verification_session, report_extraction,
+)
+from warmup import Prewarmer
+
+PHOTO_SETTINGS = PhotoSettings.from_env()
+
+# Per-file upload limits, enforced while the request body streams in
+MAX_PDF_UPLOAD_BYTES = int(float(os.getenv("MAX_PDF_UPLOAD_MB", "10")) * 1024 * 1024)
+# PDFs up to this size are verified from memory and written to disk only once the EPIC matches
+PDF_MEMORY_MAX_BYTES = int(float(os.getenv("PDF_MEMORY_MAX_MB", "5")) * 1024 * 1024)
+MAX_PHOTO_UPLOAD_BYTES = int(float(os.getenv("MAX_PHOTO_UPLOAD_MB", "15")) * 1024 * 1024)
+
+# Batch verification: documents per request and total request size (files or one ZIP)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+MAX_BATCH_UPLOAD_BYTES = int(float(os.getenv("MAX_BATCH_UPLOAD_MB", "200")) * 1024 * 1024)
+# Concurrent extractions per batch (default: one per extraction worker) and retries when the queue is full
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "0"))
+BATCH_BUSY_RETRIES = int(os.getenv("BATCH_BUSY_RETRIES", "3"))
+
+# Asynchronous verification (the queue and its workers live in verification_service)
+VERIFY_ASYNC_DEFAULT = os.getenv("VERIFY_ASYNC_DEFAULT", "false").lower() in ("1", "true", "yes")
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "25"))
 
-# Load environment variables
-load_dotenv()
+# Member exports stream from their own connection; this caps how many run at once
+EXPORT_SLOTS = threading.BoundedSemaphore(int(os.getenv("EXPORT_MAX_CONCURRENT", "2")))
 
-# Base upload folder definition
-BASE_UPLOAD_DIR = Path(os.getenv("BASE_UPLOAD_DIR", "/home/mfnssihw/user_verification/volunteers_files"))
-TEMP_UPLOAD_DIR = Path(os.getenv("TEMP_UPLOAD_DIR", BASE_UPLOAD_DIR / "tmp"))
-PDF_UPLOAD_DIR = Path(os.getenv("PDF_UPLOAD_DIR", BASE_UPLOAD_DIR / "voterid_proof"))
-PHOTO_UPLOAD_DIR = Path(os.getenv("PHOTO_UPLOAD_DIR", BASE_UPLOAD_DIR / "photos"))
+# Already-registered EPICs, so repeat registrations are refused before any PDF work
+REGISTERED_EPICS = RegisteredEpicCache(
+    max_entries=int(os.getenv("EPIC_CACHE_SIZE", "50000")),
+    ttl=float(os.getenv("EPIC_CACHE_TTL_SECONDS", "600")),
+)
+DUPLICATE_EPIC_DETAIL = "This EPIC number is already registered."
+
+# Cold starts only load what payment callbacks need; the PDF/OCR stack, Tesseract and
+# the DB pool are warmed in the background (DB first) and reported by /ready.
+PREWARM_ENABLED = os.getenv("PREWARM", "true").lower() in ("1", "true", "yes")
+PREWARMER = Prewarmer([
+    ("db", lambda: db.release(DB_POOL.acquire())),
+    ("pdf_stack", load_pdf_stack),
+    ("tesseract", lambda: {"version": tesseract_version(), "engine": check_ocr_engine()}),
+    ("extraction_pool", lambda: {"workers": EXTRACTION_POOL.prewarm(prewarm_worker)}),
+])
 
-# In-memory state
-VERIFICATION_SESSIONS = {}
+def start_prewarm():
+    if PREWARM_ENABLED:
+        PREWARMER.start()
 
 # FastAPI app
 app = FastAPI(
@@ -35,6 +97,45 @@ app = FastAPI(
     description="A multi-step API for document verification, member creation, and payment handling.",
     version="2.2.3",
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Gauges backed by a SQLite COUNT are read on the sampler thread, not per scrape
+GAUGE_SAMPLER = metrics.GaugeSampler(interval=float(os.getenv("METRICS_SAMPLE_SECONDS", "15")))
+metrics.REGISTRY.gauge(
+    "bsp_verification_sessions", "Live verification sessions.", GAUGE_SAMPLER.cached(lambda: len(VERIFICATION_SESSIONS))
+)
+metrics.REGISTRY.gauge("bsp_extraction_jobs_pending", "Queued or running extraction jobs.", lambda: EXTRACTION_POOL.pending)
+metrics.REGISTRY.gauge("bsp_extraction_cache_entries", "In-memory extraction cache entries.", lambda: len(EXTRACTION_CACHE))
+metrics.REGISTRY.gauge(
+    "bsp_verification_jobs_backlog", "Queued or running verification jobs.", GAUGE_SAMPLER.cached(VERIFICATION_JOBS.backlog)
+)
+metrics.REGISTRY.gauge("bsp_startup_seconds", "Time taken to import and build the app.", lambda: STARTUP_SECONDS)
+metrics.REGISTRY.gauge("bsp_prewarm_ready", "1 once every prewarm step has succeeded.", lambda: int(PREWARMER.ready))
+metrics.REGISTRY.gauge(
+    "bsp_pending_file_deletions", "File deletions waiting in the janitor journal.", GAUGE_SAMPLER.cached(FILE_JANITOR.pending)
+)
+
+@app.exception_handler(DatabaseBusy)
+async def database_busy_handler(request: Request, exc: DatabaseBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy. Please retry shortly."},
+        headers={"Retry-After": "2"},
+    )
+
+RATE_LIMITED_DETAIL = {
+    "ip": "Too many verification requests from this address. Please retry later.",
+    "epic": "Too many verification attempts for this EPIC number. Please retry later.",
+}
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, exc: RateLimited):
+    metrics.ADMISSION_REJECTIONS.inc(scope=exc.scope)
+    return JSONResponse(
+        status_code=429,
+        content={"detail": RATE_LIMITED_DETAIL[exc.scope]},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 # Enums and Models
 class BloodGroup(str, enum.Enum):
@@ -57,182 +158,454 @@ class MemberCreate(BaseModel):
     contact_no: Optional[str] = Field("9876543210", description="10-digit Contact Number", pattern=r"^\d{10}$")
     address: Optional[str] = Field("123, V.H. Road, Coimbatore - 641001", description="Address")
 
+class MemberImport(BaseModel):
+    # Digitised paper form; no Swagger sample defaults so missing values stay NULL
+    name: str = Field(..., description="Full Name")
+    profession: Optional[str] = None
+    designation: Optional[str] = None
+    mandal: Optional[str] = None
+    dob: Optional[date] = None
+    blood_group: Optional[BloodGroup] = None
+    contact_no: Optional[str] = Field(None, pattern=r"^\d{10}$")
+    address: Optional[str] = None
+    pdf_proof_path: Optional[str] = None
+    photo_path: Optional[str] = None
+    photo_thumb_path: Optional[str] = None
+    epic: Optional[str] = Field(None, pattern=r"^[A-Z]{3}[0-9]{7}$", description="Verified EPIC number")
+    status: Literal["pending_payment", "active"] = "active"
+
 class PaymentUpdate(BaseModel):
     member_id: int
     status: str  # "successful" or "failed"
+    # Gateway transaction/event id; the Idempotency-Key header takes precedence
+    idempotency_key: Optional[str] = Field(None, max_length=128)
+
+class PaymentReconcileItem(BaseModel):
+    member_id: int
+    status: Literal["successful", "failed"]
+    idempotency_key: Optional[str] = Field(None, max_length=128)
 
 # DB and filesystem helpers
-def get_db_connection():
+async def get_db_connection():
+    # Checkout may wait for a free pooled connection, so keep it off the event loop.
+    # DatabaseBusy propagates to database_busy_handler (503 + Retry-After).
     try:
-        return mysql.connector.connect(
-            host=os.getenv("DATABASE_HOST"),
-            user=os.getenv("DATABASE_USERNAME"),
-            password=os.getenv("DATABASE_PASSWORD"),
-            database=os.getenv("DATABASE_NAME"),
-        )
+        with DB_SECONDS.time(operation="acquire"):
+            return await run_in_threadpool(DB_POOL.acquire)
     except mysql.connector.Error as err:
         print(f"Database connection error: {err}")
         return None
 
-def cleanup_files(files_to_delete: List[Path]):
-    for file_path in files_to_delete:
-        try:
-            if file_path and file_path.exists():
-                os.remove(file_path)
-        except OSError as e:
-            print(f"Error deleting file {file_path}: {e}")
-
-# PDF/EPIC helpers
-def find_epic_in_text(text: Optional[str]) -> Optional[str]:
-    if not text:
-        return None
-    patterns = [
-        r"(?i)(?:EPIC No|Identity Card)\s*.*?\s*\b([A-Z]{3}[0-9]{7})\b",
-        r"\b([A-Z]{3}[0-9]{7})\b",
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, re.DOTALL)
-        if match:
-            return match.group(1).strip().replace(" ", "")
-    return None
-
-def extract_epic_from_pdf(pdf_path: Path) -> Optional[str]:
+def member_values(member, pdf_proof_path, photo_path, photo_thumb_path, status: str, epic: Optional[str]) -> tuple:
+    return (
+        member.name, member.profession, member.designation,
+        member.mandal, member.dob,
+        member.blood_group.value if member.blood_group else None,
+        member.contact_no, member.address,
+        str(pdf_proof_path) if pdf_proof_path else None,
+        str(photo_path) if photo_path else None,
+        str(photo_thumb_path) if photo_thumb_path else None,
+        status, None, epic,
+    )
+
+async def epic_already_registered(epic: str) -> bool:
+    # Fails open: if the database can't answer, the unique index still stops the insert.
+    if epic in REGISTERED_EPICS:
+        metrics.EPIC_PRECHECKS.inc(result="cache")
+        return True
     try:
-        doc = fitz.open(pdf_path)
-        full_text = "".join(page.get_text() for page in doc)
-        epic = find_epic_in_text(full_text)
-        if epic:
-            doc.close()
-            return epic
-        # OCR fallback
-        ocr_text = ""
-        for page in doc:
-            pix = page.get_pixmap(dpi=300)
-            img_data = pix.tobytes("png")
-            pil_image = Image.open(io.BytesIO(img_data))
-            ocr_text += pytesseract.image_to_string(pil_image, lang="eng")
-        doc.close()
-        return find_epic_in_text(ocr_text)
-    except Exception as e:
-        print(f"PDF processing error: {e}")
-        return None
+        conn = await get_db_connection()
+    except DatabaseBusy:
+        conn = None
+    if not conn:
+        metrics.EPIC_PRECHECKS.inc(result="skipped")
+        return False
+    try:
+        with DB_SECONDS.time(operation="epic_lookup"):
+            registered = await run_in_threadpool(epic_registered, conn, epic)
+    except mysql.connector.Error as err:
+        print(f"EPIC lookup error: {err}")
+        metrics.EPIC_PRECHECKS.inc(result="skipped")
+        return False
+    finally:
+        db.release(conn)
+    metrics.EPIC_PRECHECKS.inc(result="registered" if registered else "new")
+    if registered:
+        REGISTERED_EPICS.add(epic)
+    return registered
+
+def require_admin_key(x_admin_key: Annotated[Optional[str], Header()] = None):
+    expected = os.getenv("ADMIN_API_KEY")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_KEY is not set).")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin key.")
+
+def created_refs(*stored) -> List[str]:
+    return [stored_file.ref for stored_file in stored if stored_file.created]
+
+def store_photo(photo_stage: Path, thumb_stage: Path):
+    # The thumbnail is keyed by its photo's digest, so one lookup finds both
+    photo_file = STORAGE.put_file(photo_stage, "photos", PHOTO_SETTINGS.extension)
+    thumb_file = STORAGE.put_file(thumb_stage, "thumbs", PHOTO_SETTINGS.extension, digest=photo_file.digest)
+    return photo_file, thumb_file
+
+# Verification helpers shared by the single and batch endpoints
+async def extract_epic_cached(
+    pdf_source: Union[Path, bytes], pdf_digest: str, pdf_size: int, entered_epic: str, client_ip: Optional[str] = None
+):
+    # Raises ExtractionQueueFull (pool or global cap full) / ExtractionTimeout from the pool.
+    # With client_ip, an OCR extraction is charged to the client's and the EPIC's buckets.
+    started = time.perf_counter()
+    extraction, source = await run_file_io(EXTRACTION_CACHE.get, pdf_digest), "cache"
+    if extraction is None:
+        slot_id = await run_file_io(ADMISSION.acquire_extraction_slot)
+        try:
+            extraction, source = await EXTRACTION_POOL.run(extract_epic_with_method, pdf_source), "worker"
+        finally:
+            await run_file_io(ADMISSION.release_extraction_slot, slot_id)
+        await run_file_io(EXTRACTION_CACHE.put, pdf_digest, extraction)
+        if client_ip:
+            await run_file_io(ADMISSION.charge_extraction, extraction.method, client_ip, entered_epic)
+    report_extraction(extraction, source, time.perf_counter() - started, pdf_size, entered_epic)
+    return extraction
+
+def commit_job_upload(upload) -> Path:
+    JOB_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)  # startup hooks don't run under a2wsgi
+    return upload.commit(JOB_UPLOAD_DIR / f"{uuid.uuid4()}.pdf")
 
 # Startup
 @app.on_event("startup")
 def on_startup():
     print("Ensuring upload directories exist...")
-    for dir_path in [TEMP_UPLOAD_DIR, PDF_UPLOAD_DIR, PHOTO_UPLOAD_DIR]:
+    for dir_path in [TEMP_UPLOAD_DIR, JOB_UPLOAD_DIR, PDF_UPLOAD_DIR, PHOTO_UPLOAD_DIR, PHOTO_THUMB_DIR]:
         try:
             os.makedirs(dir_path, exist_ok=True)
         except Exception as e:
             print(f"Failed to create directory {dir_path}: {e}")
             raise
     print("Upload directories are ready.")
+    EXTRACTION_POOL.start()
+    SESSION_REAPER.start()
+    FILE_JANITOR.start()
+    JOB_WORKER.start()
+    GAUGE_SAMPLER.start()
+    start_prewarm()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    SESSION_REAPER.stop()
+    FILE_JANITOR.stop()
+    JOB_WORKER.stop()
+    GAUGE_SAMPLER.stop()
+    EXTRACTION_POOL.shutdown(wait=False)
+    JOB_EXTRACTION_POOL.shutdown(wait=False)
 
 # Endpoints
-@app.post("/verify-document/")
-async def verify_document_endpoint(
-    epic_number: Annotated[str, Form()],
-    pdf_file: Annotated[UploadFile, File()],
-):
-    safe_epic = epic_number.strip().upper()
-    temp_pdf_path = TEMP_UPLOAD_DIR / f"{uuid.uuid4()}_{Path(pdf_file.filename).name}"
+@app.post(
+    "/verify-document/",
+    openapi_extra=multipart_openapi(
+        {
+            "epic_number": "EPIC number printed on the voter ID",
+            "async": "true to queue the document and get a job ID (202) instead of waiting for OCR",
+        },
+        ("pdf_file",),
+        optional=("async",),
+    ),
+)
+async def verify_document_endpoint(request: Request):
+    # No-ops once running; lifespan events don't fire under a2wsgi
+    SESSION_REAPER.start()
+    FILE_JANITOR.start()
+    JOB_WORKER.start()
+    # Behind uvicorn's proxy_headers or Passenger this is the real client address
+    client_ip = request.client.host if request.client else None
+    await run_file_io(ADMISSION.admit, "ip", client_ip)  # before the upload is read
+    with metrics.UPLOAD_SECONDS.time(endpoint="verify-document"):
+        fields, files = await read_streaming_form(
+            request,
+            {"pdf_file": FileRule(TEMP_UPLOAD_DIR, MAX_PDF_UPLOAD_BYTES, ("pdf",), memory_bytes=PDF_MEMORY_MAX_BYTES)},
+        )
+    pdf_upload = files.get("pdf_file")
+    if not fields.get("epic_number") or pdf_upload is None:
+        cleanup_files([upload.path for upload in files.values()])
+        raise HTTPException(status_code=422, detail="Both epic_number and pdf_file are required.")
+
+    safe_epic = fields["epic_number"].strip().upper()
     try:
-        with temp_pdf_path.open("wb") as buffer:
-            shutil.copyfileobj(pdf_file.file, buffer)
-    finally:
-        pdf_file.file.close()
-
-    extracted_epic = extract_epic_from_pdf(temp_pdf_path)
-    if not extracted_epic or safe_epic != extracted_epic:
-        cleanup_files([temp_pdf_path])
-        detail = "Could not extract a matching EPIC number from the PDF."
-        if extracted_epic:
-            detail = f"Mismatch: Entered EPIC '{safe_epic}' does not match PDF EPIC '{extracted_epic}'."
-        raise HTTPException(status_code=400, detail=detail)
-
-    token = str(uuid.uuid4())
-    VERIFICATION_SESSIONS[token] = {
-        "temp_pdf_path": temp_pdf_path,
-        "epic": extracted_epic,
-        "expiry": datetime.utcnow() + timedelta(minutes=15),
-    }
+        await run_file_io(ADMISSION.admit, "epic", safe_epic)
+    except RateLimited:
+        cleanup_files([pdf_upload.path])
+        raise
+    if await epic_already_registered(safe_epic):
+        cleanup_files([pdf_upload.path])
+        raise HTTPException(status_code=409, detail=DUPLICATE_EPIC_DETAIL)
+    metrics.UPLOAD_BYTES.inc(pdf_upload.size, field="pdf_file")
+    run_async = VERIFY_ASYNC_DEFAULT or "respond-async" in request.headers.get("prefer", "").lower()
+    if "async" in fields:
+        run_async = fields["async"].strip().lower() in ("1", "true", "yes")
+    if run_async and VERIFY_ASYNC_ENABLED and await run_file_io(EXTRACTION_CACHE.get, pdf_upload.sha256) is None:
+        # Nothing cached: queue it and answer at once instead of holding the request through OCR
+        with FILE_IO_SECONDS.time(operation="commit_upload"):
+            job_pdf_path = await run_file_io(commit_job_upload, pdf_upload)
+        job_id = await run_file_io(
+            VERIFICATION_JOBS.enqueue, safe_epic, job_pdf_path, pdf_upload.sha256, pdf_upload.size, client_ip
+        )
+        JOB_WORKER.wake()
+        status_url = str(request.url_for("verification_job_status_endpoint", job_id=job_id))
+        return JSONResponse(
+            status_code=202,
+            content={"message": "Document queued for verification.", "job_id": job_id, "status_url": status_url},
+            headers={"Location": status_url},
+        )
+    try:
+        # From memory when the upload fits, else from its .part file
+        extraction = await extract_epic_cached(
+            pdf_upload.source, pdf_upload.sha256, pdf_upload.size, safe_epic, client_ip=client_ip
+        )
+    except ExtractionQueueFull:
+        cleanup_files([pdf_upload.path])
+        metrics.ADMISSION_REJECTIONS.inc(scope="capacity")
+        raise HTTPException(
+            status_code=503,
+            detail="Document verification is busy. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    except ExtractionTimeout:
+        cleanup_files([pdf_upload.path])
+        raise HTTPException(status_code=504, detail="Document processing timed out. Please try again.")
+    detail = epic_mismatch_detail(safe_epic, extraction)
+    if detail:
+        cleanup_files([pdf_upload.path])
+        raise HTTPException(status_code=422 if extraction.method == "rejected" else 400, detail=detail)
+
+    # Only a verified document is persisted
+    with FILE_IO_SECONDS.time(operation="commit_upload"):
+        temp_pdf_path = await run_file_io(pdf_upload.commit, TEMP_UPLOAD_DIR / f"{uuid.uuid4()}.pdf")
+    token, _ = await run_file_io(open_verification_session, temp_pdf_path, extraction.epic, pdf_upload.sha256)
     return {
         "message": "Verification successful. Use this token to submit member details.",
         "verification_token": token,
     }
 
-def generate_membership_no(new_member_id: int) -> str:
-    now = datetime.utcnow()
-    return f"BSP-{now.year}{now.month:02d}-{new_member_id:06d}"
+@app.get("/verification-jobs/{job_id}")
+async def verification_job_status_endpoint(job_id: str, wait: float = 0):
+    """Job status; with ``wait`` (seconds) the call long-polls until the job finishes."""
+    deadline = time.monotonic() + min(max(wait, 0), JOB_MAX_WAIT_SECONDS)
+    delay = 0.2
+    while True:
+        job = await run_file_io(VERIFICATION_JOBS.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired verification job.")
+        if job["status"] in FINISHED or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay = min(delay * 2, 1.0)
+
+    response = {"job_id": job_id, "status": job["status"], "attempts": job["attempts"]}
+    if job["status"] == "queued":
+        response["queue_position"] = await run_file_io(VERIFICATION_JOBS.position, job_id)
+    if job["status"] in FINISHED or job["result"]:
+        response.update(job["result"] or {})
+    return response
+
+async def verify_batch_item(item, gate: asyncio.Semaphore, running: Set[int]) -> dict:
+    running.add(item.index)
+    result = {"index": item.index, "filename": item.filename, "epic_number": item.epic_number}
+    if item.upload is None:
+        return {**result, "status": "rejected", "detail": item.error}
+    temp_pdf_path, keep = item.upload.path, False
+    try:
+        if await epic_already_registered(item.epic_number):
+            return {**result, "status": "duplicate", "detail": DUPLICATE_EPIC_DETAIL}
+        async with gate:
+            # Committed only when its turn comes, so the reaper's clock starts here
+            temp_pdf_path = await run_file_io(item.upload.commit, TEMP_UPLOAD_DIR / f"{uuid.uuid4()}.pdf")
+            for attempt in range(BATCH_BUSY_RETRIES + 1):
+                try:
+                    extraction = await extract_epic_cached(
+                        temp_pdf_path, item.upload.sha256, item.upload.size, item.epic_number
+                    )
+                    break
+                except ExtractionQueueFull:
+                    # Interactive uploads share the pool; back off rather than fail the item
+                    if attempt == BATCH_BUSY_RETRIES:
+                        return {**result, "status": "busy", "detail": "Document verification is busy. Retry this item."}
+                    await asyncio.sleep(2 ** attempt)
+        detail = epic_mismatch_detail(item.epic_number, extraction)
+        if detail:
+            status = "rejected" if extraction.method == "rejected" else "mismatch" if extraction.epic else "not_found"
+            return {**result, "status": status, "detail": detail}
+        token, expiry = await run_file_io(
+            open_verification_session, temp_pdf_path, extraction.epic, item.upload.sha256
+        )
+        keep = True
+        return {**result, "status": "verified", "verification_token": token, "expires_at": expiry.isoformat() + "Z"}
+    except ExtractionTimeout:
+        return {**result, "status": "timeout", "detail": "Document processing timed out."}
+    finally:
+        if not keep:
+            cleanup_files([temp_pdf_path])
 
-@app.post("/submit-details/")
+async def stream_batch_results(items):
+    # Extractions fan out across the pool, at most BATCH_CONCURRENCY at a time per batch,
+    # and each result is written as an NDJSON line as soon as it completes.
+    gate = asyncio.Semaphore(BATCH_CONCURRENCY or EXTRACTION_POOL.workers)
+    running = set()
+    tasks = [asyncio.ensure_future(verify_batch_item(item, gate, running)) for item in items]
+    counts = {}
+    started = time.perf_counter()
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            yield json.dumps(result) + "\n"
+        log_event("batch_verification", items=len(items), seconds=round(time.perf_counter() - started, 4), **counts)
+        yield json.dumps({"summary": {"total": len(items), **counts}}) + "\n"
+    finally:
+        # Client went away mid-stream: stop the remaining items. A started item cleans up
+        # its own file; one cancelled before it ran never reaches that finally.
+        for task in tasks:
+            task.cancel()
+        cleanup_files([item.upload.path for item in items if item.upload and item.index not in running])
+
+@app.post(
+    "/verify-documents/batch/",
+    dependencies=[Depends(require_admin_key)],
+    openapi_extra=multipart_openapi(
+        {"manifest": "Optional CSV lines 'filename,epic_number'; otherwise each file is named <EPIC>.pdf"},
+        ("pdf_files", "archive"),
+        optional=("manifest", "pdf_files", "archive"),
+        multiple=("pdf_files",),
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "One JSON result per line, then a summary."}
+    },
+)
+async def verify_documents_batch_endpoint(request: Request):
+    SESSION_REAPER.start()
+    FILE_JANITOR.start()
+    with metrics.UPLOAD_SECONDS.time(endpoint="verify-documents-batch"):
+        fields, files = await read_streaming_form(
+            request,
+            {
+                "pdf_files": FileRule(TEMP_UPLOAD_DIR, MAX_PDF_UPLOAD_BYTES, ("pdf",), max_files=BATCH_MAX_ITEMS),
+                "archive": FileRule(TEMP_UPLOAD_DIR, MAX_BATCH_UPLOAD_BYTES, ("zip",)),
+            },
+            max_total_bytes=MAX_BATCH_UPLOAD_BYTES,
+        )
+    uploads = files.get("pdf_files", [])
+    archive = files.get("archive")
+    manifest, rejected = {}, {}
+    if archive is not None:
+        metrics.UPLOAD_BYTES.inc(archive.size, field="archive")
+        try:
+            with FILE_IO_SECONDS.time(operation="expand_zip"):
+                extracted, manifest, rejected = await run_file_io(
+                    expand_zip, archive.path, TEMP_UPLOAD_DIR, BATCH_MAX_ITEMS - len(uploads), MAX_PDF_UPLOAD_BYTES
+                )
+        except HTTPException:
+            cleanup_files([upload.path for upload in uploads])
+            raise
+        finally:
+            cleanup_files([archive.path])
+        uploads = uploads + extracted
+    manifest.update(parse_manifest(fields.get("manifest")))
+    if not uploads and not rejected:
+        raise HTTPException(status_code=422, detail="Upload pdf_files or a ZIP archive of PDFs.")
+    metrics.UPLOAD_BYTES.inc(sum(upload.size for upload in files.get("pdf_files", [])), field="pdf_files")
+
+    items = build_items(uploads, manifest, rejected)
+    return StreamingResponse(stream_batch_results(items), media_type="application/x-ndjson")
+
+@app.post(
+    "/submit-details/",
+    openapi_extra=multipart_openapi({"verification_token": "Token returned by /verify-document/"}, ("photo_file",)),
+)
 async def submit_details_endpoint(
-    verification_token: Annotated[str, Form()],
-    photo_file: Annotated[UploadFile, File()],
+    request: Request,
     member_data: MemberCreate = Depends(),
 ):
-    session = VERIFICATION_SESSIONS.get(verification_token)
-    if not session or session["expiry"] < datetime.utcnow():
+    with metrics.UPLOAD_SECONDS.time(endpoint="submit-details"):
+        fields, files = await read_streaming_form(
+            request, {"photo_file": FileRule(PHOTO_UPLOAD_DIR, MAX_PHOTO_UPLOAD_BYTES, ("jpeg", "png"))}
+        )
+    verification_token = fields.get("verification_token")
+    photo_upload = files.get("photo_file")
+    if not verification_token or photo_upload is None:
+        cleanup_files([upload.path for upload in files.values()])
+        raise HTTPException(status_code=422, detail="Both verification_token and photo_file are required.")
+
+    # Claim the token up front so a concurrent submit on another worker cannot reuse it
+    session = await run_file_io(VERIFICATION_SESSIONS.pop, verification_token)
+    if session and session["expiry"] < datetime.utcnow():
+        cleanup_files([session["temp_pdf_path"]])
+        session = None
+    if not session:
+        cleanup_files([photo_upload.path])
         raise HTTPException(status_code=401, detail="Invalid or expired verification token. Please verify again.")
 
     temp_pdf_path = session["temp_pdf_path"]
     epic_number = session["epic"]
-    unique_id = str(uuid.uuid4().hex)[:8]
 
-    pdf_filename = f"{epic_number}_{unique_id}_{temp_pdf_path.name}"
-    permanent_pdf_path = PDF_UPLOAD_DIR / pdf_filename
-    print(f"Moving PDF {temp_pdf_path} -> {permanent_pdf_path}")
-    shutil.move(str(temp_pdf_path), str(permanent_pdf_path))
+    try:
+        with FILE_IO_SECONDS.time(operation="store_pdf"):
+            pdf_file = await run_file_io(
+                STORAGE.put_file, temp_pdf_path, "proofs", ".pdf", session.get("pdf_digest")
+            )
+    except FileNotFoundError:
+        print(f"Verified PDF {temp_pdf_path} is gone")
+        cleanup_files([photo_upload.path])
+        raise HTTPException(status_code=401, detail="Invalid or expired verification token. Please verify again.")
+    print(f"Stored PDF {temp_pdf_path} -> {pdf_file.ref}")
 
-    photo_filename = f"{epic_number}_{unique_id}_{Path(photo_file.filename).name}"
-    permanent_photo_path = PHOTO_UPLOAD_DIR / photo_filename
-    print(f"Saving photo -> {permanent_photo_path}")
+    # Normalised into staging files beside the upload, then stored under their own digest
+    staging = PHOTO_UPLOAD_DIR / f".{uuid.uuid4().hex}"
+    photo_stage, thumb_stage = Path(f"{staging}-photo{PARTIAL_SUFFIX}"), Path(f"{staging}-thumb{PARTIAL_SUFFIX}")
+    metrics.UPLOAD_BYTES.inc(photo_upload.size, field="photo_file")
     try:
-        with permanent_photo_path.open("wb") as buffer:
-            shutil.copyfileobj(photo_file.file, buffer)
+        with FILE_IO_SECONDS.time(operation="normalise_photo"):
+            await run_file_io(normalise_photo, photo_upload.path, photo_stage, thumb_stage, PHOTO_SETTINGS)
+        with FILE_IO_SECONDS.time(operation="store_photo"):
+            photo_file, thumb_file = await run_file_io(store_photo, photo_stage, thumb_stage)
+    except InvalidPhoto as e:
+        print(f"Rejected photo upload: {e}")
+        cleanup_files(created_refs(pdf_file) + [photo_stage, thumb_stage])
+        raise HTTPException(status_code=415, detail="photo_file is not a readable image.")
     finally:
-        photo_file.file.close()
+        cleanup_files([photo_upload.path])
+    print(f"Stored photo -> {photo_file.ref}")
+    # Only files this request created are removed on failure; deduplicated ones belong to others too
+    stored_files = created_refs(pdf_file, photo_file, thumb_file)
 
-    conn = get_db_connection()
+    try:
+        conn = await get_db_connection()
+    except DatabaseBusy:
+        cleanup_files(stored_files)
+        raise
     if not conn:
-        cleanup_files([permanent_pdf_path, permanent_photo_path])
+        cleanup_files(stored_files)
         raise HTTPException(status_code=503, detail="Database service is unavailable.")
 
-    cursor = None
     try:
-        cursor = conn.cursor()
-        sql_insert = """
-            INSERT INTO members
-            (name, profession, designation, mandal, dob, blood_group, contact_no,
-             address, pdf_proof_path, photo_path, status, active_no)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        values_insert = (
-            member_data.name, member_data.profession, member_data.designation,
-            member_data.mandal, member_data.dob,
-            member_data.blood_group.value if member_data.blood_group else None,
-            member_data.contact_no, member_data.address, str(permanent_pdf_path),
-            str(permanent_photo_path), "pending_payment", None,
+        values_insert = member_values(
+            member_data, pdf_file.ref, photo_file.ref, thumb_file.ref, "pending_payment", epic_number
         )
-        cursor.execute(sql_insert, values_insert)
-        new_member_id = cursor.lastrowid
-        conn.commit()
-
-        generated_membership_no = generate_membership_no(new_member_id)
-        cursor.execute("UPDATE members SET membership_no = %s WHERE id = %s", (generated_membership_no, new_member_id))
-        conn.commit()
+        with DB_SECONDS.time(operation="insert_member"):
+            new_member_id, generated_membership_no = insert_member(conn, values_insert)
+        REGISTERED_EPICS.add(epic_number)
+    except DuplicateEpic:
+        # Registered by a concurrent submit, or on a worker whose cache hadn't seen it
+        cleanup_files(stored_files)
+        REGISTERED_EPICS.add(epic_number)
+        raise HTTPException(status_code=409, detail=DUPLICATE_EPIC_DETAIL)
     except mysql.connector.Error as err:
-        cleanup_files([permanent_pdf_path, permanent_photo_path])
+        cleanup_files(stored_files)
         print(f"DB error: {err}")
         raise HTTPException(status_code=500, detail="Failed to create member in the database.")
     finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
-        if verification_token in VERIFICATION_SESSIONS:
-            del VERIFICATION_SESSIONS[verification_token]
+        db.release(conn)
 
     return {
         "message": "Details submitted. Proceed to payment.",
@@ -240,40 +613,235 @@ async def submit_details_endpoint(
         "membership_no": generated_membership_no,
     }
 
+def payment_response(outcome, gateway_status: str) -> dict:
+    if outcome.outcome == "not_found":
+        raise HTTPException(status_code=404, detail="Member not found.")
+    if outcome.outcome == "key_reused":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Idempotency key was already used for a different callback; '{gateway_status}' for member "
+            f"{outcome.member_id} ignored.",
+        )
+    if outcome.outcome == "conflict":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Member {outcome.member_id} is already {outcome.member_status}; '{gateway_status}' callback ignored.",
+        )
+    if outcome.member_status == "active":
+        message = f"Payment successful. Member {outcome.member_id} is now active."
+    else:
+        message = f"Payment failed. Member {outcome.member_id} is marked failed and associated files have been deleted."
+    return {"message": message, "outcome": outcome.outcome, "replayed": outcome.replayed}
+
+def release_failed_payment(outcome):
+    # After commit: the row no longer references these files, and the EPIC may register again
+    if outcome.files:
+        cleanup_files(list(outcome.files))
+    if outcome.epic:
+        REGISTERED_EPICS.discard(outcome.epic)
+
 @app.post("/update-payment/")
-async def update_payment_endpoint(update_data: PaymentUpdate):
-    conn = get_db_connection()
+async def update_payment_endpoint(
+    update_data: PaymentUpdate, idempotency_key: Annotated[Optional[str], Header(max_length=128)] = None
+):
+    gateway_status = update_data.status.lower()
+    if gateway_status not in TRANSITIONS:
+        raise HTTPException(status_code=400, detail="Invalid status. Must be 'successful' or 'failed'.")
+    key = idempotency_key or update_data.idempotency_key
+    conn = await get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Database service is unavailable.")
+    try:
+        with DB_SECONDS.time(operation="update_payment"):
+            outcome = await run_in_threadpool(apply_payment, conn, update_data.member_id, gateway_status, key)
+    except mysql.connector.Error as err:
+        print(f"Payment update error: {err}")
+        raise HTTPException(status_code=500, detail="A database error occurred.")
+    finally:
+        db.release(conn)
+
+    metrics.PAYMENT_CALLBACKS.inc(outcome="replayed" if outcome.replayed else outcome.outcome)
+    release_failed_payment(outcome)
+    return payment_response(outcome, gateway_status)
+
+@app.post("/payments/reconcile/", dependencies=[Depends(require_admin_key)])
+async def reconcile_payments_endpoint(payments: List[PaymentReconcileItem]):
+    """Apply a gateway settlement report in one transaction; one result per entry, in order."""
+    max_items = int(os.getenv("PAYMENT_RECONCILE_MAX_ITEMS", "1000"))
+    if not payments:
+        raise HTTPException(status_code=400, detail="No payments to reconcile.")
+    if len(payments) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} payments per reconciliation.")
+
+    conn = await get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Database service is unavailable.")
+    items = [(p.member_id, p.status, p.idempotency_key) for p in payments]
+    try:
+        with DB_SECONDS.time(operation="reconcile_payments"):
+            outcomes = await run_in_threadpool(reconcile_payments, conn, items)
+    except ConcurrentPaymentUpdate:
+        raise HTTPException(
+            status_code=409, detail="Some members changed state during reconciliation; nothing was applied. Retry."
+        )
+    except mysql.connector.Error as err:
+        print(f"Payment reconciliation error: {err}")
+        raise HTTPException(status_code=500, detail="Reconciliation failed; nothing was applied.")
+    finally:
+        db.release(conn)
+
+    counts = {}
+    for outcome in outcomes:
+        label = "replayed" if outcome.replayed else outcome.outcome
+        counts[label] = counts.get(label, 0) + 1
+        metrics.PAYMENT_CALLBACKS.inc(outcome=label)
+        release_failed_payment(outcome)
+    return {
+        "summary": counts,
+        "results": [
+            {
+                "member_id": outcome.member_id,
+                "outcome": outcome.outcome,
+                "member_status": outcome.member_status,
+                "replayed": outcome.replayed,
+            }
+            for outcome in outcomes
+        ],
+    }
+
+@app.post("/members/bulk-import/", dependencies=[Depends(require_admin_key)])
+async def bulk_import_members_endpoint(members: List[MemberImport]):
+    max_rows = int(os.getenv("BULK_IMPORT_MAX_ROWS", "5000"))
+    if not members:
+        raise HTTPException(status_code=400, detail="No members to import.")
+    if len(members) > max_rows:
+        raise HTTPException(status_code=413, detail=f"At most {max_rows} members per import.")
+
+    conn = await get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Database service is unavailable.")
+    try:
+        rows = [member_values(m, m.pdf_proof_path, m.photo_path, m.photo_thumb_path, m.status, m.epic) for m in members]
+        with DB_SECONDS.time(operation="bulk_insert_members"):
+            created = await run_in_threadpool(bulk_insert_members, conn, rows)
+    except DuplicateEpic as err:
+        print(f"Bulk import rejected: {err}")
+        raise HTTPException(
+            status_code=409, detail="An EPIC in the import is already registered; no members were created."
+        )
+    except mysql.connector.Error as err:
+        print(f"Bulk import error: {err}")
+        raise HTTPException(status_code=500, detail="Bulk import failed; no members were created.")
+    finally:
+        db.release(conn)
+
+    return {
+        "message": f"Imported {len(created)} members.",
+        "members": [{"member_id": member_id, "membership_no": number} for member_id, number in created],
+    }
+
+@app.get("/members/", dependencies=[Depends(require_admin_key)])
+async def search_members_endpoint(
+    mandal: Optional[str] = None,
+    status: Optional[Literal["pending_payment", "active", "failed"]] = None,
+    blood_group: Optional[BloodGroup] = None,
+    membership_no: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    limit: int = Query(50, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    """Members matching every given filter, in id order, one page at a time."""
+    max_limit = int(os.getenv("MEMBER_SEARCH_MAX_LIMIT", "500"))
+    if limit > max_limit:
+        raise HTTPException(status_code=400, detail=f"limit must be at most {max_limit}.")
+    columns = [column.strip() for column in fields.split(",") if column.strip()] if fields else SEARCH_DEFAULT_COLUMNS
+    unknown = [column for column in columns if column not in SEARCH_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(SEARCH_COLUMNS)}."
+        )
+    filters = {
+        "mandal": mandal,
+        "status": status,
+        "blood_group": blood_group.value if blood_group else None,
+        "membership_no": membership_no,
+    }
+    filters = {column: value for column, value in filters.items() if value is not None}
+
+    conn = await get_db_connection()
     if not conn:
         raise HTTPException(status_code=503, detail="Database service is unavailable.")
-    cursor = None
     try:
-        cursor = conn.cursor(dictionary=True)
-        if update_data.status.lower() == "successful":
-            cursor.execute("UPDATE members SET status = 'active' WHERE id = %s", (update_data.member_id,))
-            conn.commit()
-            return {"message": f"Payment successful. Member {update_data.member_id} is now active."}
-        elif update_data.status.lower() == "failed":
-            cursor.execute("SELECT pdf_proof_path, photo_path FROM members WHERE id = %s", (update_data.member_id,))
-            record = cursor.fetchone()
-            if record:
-                files_to_delete = []
-                if record.get("pdf_proof_path"):
-                    files_to_delete.append(Path(record["pdf_proof_path"]))
-                if record.get("photo_path"):
-                    files_to_delete.append(Path(record["photo_path"]))
-                cleanup_files(files_to_delete)
-                cursor.execute("DELETE FROM members WHERE id = %s", (update_data.member_id,))
-                conn.commit()
-                return {"message": f"Payment failed. Member {update_data.member_id} and associated files have been deleted."}
-            else:
-                raise HTTPException(status_code=404, detail="Member not found.")
-        else:
-            raise HTTPException(status_code=400, detail="Invalid status. Must be 'successful' or 'failed'.")
+        with DB_SECONDS.time(operation="search_members"):
+            rows, next_cursor = await run_in_threadpool(search_members, conn, filters, columns, limit, cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
     except mysql.connector.Error as err:
-        print(f"Database update/delete error: {err}")
+        print(f"Member search error: {err}")
         raise HTTPException(status_code=500, detail="A database error occurred.")
     finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
+        db.release(conn)
+    return {"members": rows, "next_cursor": next_cursor}
+
+def finish_member_export(export: MemberExport):
+    EXPORT_SLOTS.release()
+    log_event(
+        "member_export", format=export.encoder.name, rows=export.rows, last_id=export.last_id,
+        completed=export.completed, seconds=round(time.perf_counter() - export.started, 3),
+    )
+
+@app.get("/members/export/", dependencies=[Depends(require_admin_key)])
+async def export_members_endpoint(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    status: Optional[Literal["pending_payment", "active", "failed"]] = None,
+    mandal: Optional[str] = None,
+    created_from: Optional[datetime] = Query(None, description="Inclusive"),
+    created_until: Optional[datetime] = Query(None, description="Exclusive"),
+    after_id: int = Query(0, ge=0, description="Resume after the last id received"),
+):
+    """Stream members in id order; memory use is one batch however large the table."""
+    try:
+        encoder = create_encoder(format)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not EXPORT_SLOTS.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503, detail="Too many exports are running. Please retry shortly.", headers={"Retry-After": "30"}
+        )
+    try:
+        conn = await run_in_threadpool(DB_POOL.connect_unpooled)
+    except mysql.connector.Error as err:
+        EXPORT_SLOTS.release()
+        print(f"Export connection error: {err}")
+        raise HTTPException(status_code=503, detail="Database service is unavailable.")
+
+    export = MemberExport(
+        conn, encoder, export_query(status, mandal, created_from, created_until, after_id), on_close=finish_member_export
+    )
+    return StreamingResponse(
+        export,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="members.{format}"'},
+        background=BackgroundTask(export.close),  # also runs if the client goes away before the first chunk
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    GAUGE_SAMPLER.start()  # no-op once running; lifespan events don't fire under a2wsgi
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/ready", include_in_schema=False)
+async def readiness_endpoint():
+    # 503 until the DB pool, PDF stack and Tesseract are warm; polling also (re)starts the warm-up
+    start_prewarm()
+    return JSONResponse(
+        status_code=200 if PREWARMER.ready else 503,
+        content={
+            "ready": PREWARMER.ready,
+            "startup_seconds": round(STARTUP_SECONDS, 3),
+            "components": PREWARMER.status,
+        },
+    )
+
+STARTUP_SECONDS = time.perf_counter() - STARTUP_STARTED
+print(f"Startup: app built in {STARTUP_SECONDS:.2f}s (prewarm {'on' if PREWARM_ENABLED else 'off'})")
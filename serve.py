@@ -0,0 +1,65 @@
+"""Serve the app natively over ASGI with uvicorn, instead of through the a2wsgi
+bridge in passenger_wsgi.py, wherever the host can run a long-lived process.
+
+    python serve.py                                  # uvicorn
+    gunicorn -c gunicorn.conf.py                     # gunicorn managing uvicorn workers (pip install gunicorn)
+
+Tuned from the environment (defaults in brackets):
+    APP_MODULE [prod_main:app]   HOST [127.0.0.1]   PORT [8000]
+    WEB_CONCURRENCY [1]          worker processes; each runs its own extraction pool
+    KEEPALIVE_SECONDS [5]        idle keep-alive before a connection is closed
+    LIMIT_CONCURRENCY [none]     open connections/requests per worker before 503s
+    BACKLOG [2048]               listen() queue for connections not yet accepted
+    FORWARDED_ALLOW_IPS [127.0.0.1]  proxies trusted for X-Forwarded-For
+    GRACEFUL_TIMEOUT_SECONDS [30]    time in-flight requests get on shutdown/restart
+"""
+import os
+
+from dotenv import load_dotenv
+
+
+def server_settings() -> dict:
+    limit = os.getenv("LIMIT_CONCURRENCY")
+    return {
+        "app": os.getenv("APP_MODULE", "prod_main:app"),
+        "host": os.getenv("HOST", "127.0.0.1"),
+        "port": int(os.getenv("PORT", "8000")),
+        "workers": int(os.getenv("WEB_CONCURRENCY", "1")),
+        "keepalive": int(os.getenv("KEEPALIVE_SECONDS", "5")),
+        "limit_concurrency": int(limit) if limit else None,
+        "backlog": int(os.getenv("BACKLOG", "2048")),
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        "graceful_timeout": int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30")),
+    }
+
+
+def uvicorn_options(settings: dict) -> dict:
+    return {
+        "host": settings["host"],
+        "port": settings["port"],
+        "workers": settings["workers"],
+        "timeout_keep_alive": settings["keepalive"],
+        "limit_concurrency": settings["limit_concurrency"],
+        "backlog": settings["backlog"],
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings["forwarded_allow_ips"],
+        "timeout_graceful_shutdown": settings["graceful_timeout"],
+    }
+
+
+def main():
+    load_dotenv()
+    import uvicorn
+
+    settings = server_settings()
+    print(
+        f"Serving {settings['app']} on {settings['host']}:{settings['port']} with {settings['workers']} worker(s), "
+        f"keep-alive {settings['keepalive']}s, limit-concurrency {settings['limit_concurrency'] or 'none'}, "
+        f"backlog {settings['backlog']}"
+    )
+    # An import string (not the app object) so uvicorn can spawn several workers
+    uvicorn.run(settings["app"], **uvicorn_options(settings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import os
+import sqlite3
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from sqlite_util import LocalSQLite
+
+# A verification session is {"temp_pdf_path": Path, "epic": str, "expiry": datetime (UTC),
+# "pdf_digest": SHA-256 hex computed while the PDF was uploaded, or None}.
+Session = Dict[str, object]
+
+
+class SessionStore:
+    """Token -> verification session, with TTL eviction.
+
+    ``on_evict`` is called with every session dropped without being claimed
+    (expired or pushed out by the size bound) so its temp file can be removed.
+    """
+
+    def __init__(self, on_evict: Optional[Callable[[Session], None]] = None):
+        self.on_evict = on_evict
+
+    def put(self, token: str, session: Session):
+        raise NotImplementedError
+
+    def get(self, token: str) -> Optional[Session]:
+        raise NotImplementedError
+
+    def pop(self, token: str) -> Optional[Session]:
+        """Atomically claim a session; returns it even if expired."""
+        raise NotImplementedError
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, token: str) -> bool:
+        return self.get(token) is not None
+
+    def _evicted(self, sessions: List[Session]):
+        if self.on_evict:
+            for session in sessions:
+                self.on_evict(session)
+
+
+class MemorySessionStore(SessionStore):
+    """Single-process store. Entries are kept in insertion order, which is also
+    expiry order because every session gets the same TTL."""
+
+    def __init__(self, max_entries: int = 10000, on_evict=None):
+        super().__init__(on_evict)
+        self.max_entries = max_entries
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, token, session):
+        evicted = []
+        with self._lock:
+            self._sessions[token] = session
+            self._sessions.move_to_end(token)
+            evicted.extend(self._expire_locked(datetime.utcnow()))
+            while len(self._sessions) > self.max_entries:
+                evicted.append(self._sessions.popitem(last=False)[1])
+        self._evicted(evicted)
+
+    def get(self, token):
+        with self._lock:
+            session = self._sessions.get(token)
+        if session and session["expiry"] >= datetime.utcnow():
+            return session
+        return None
+
+    def pop(self, token):
+        with self._lock:
+            return self._sessions.pop(token, None)
+
+    def sweep(self, now=None):
+        with self._lock:
+            evicted = self._expire_locked(now or datetime.utcnow())
+        self._evicted(evicted)
+        return len(evicted)
+
+    def _expire_locked(self, now):
+        evicted = []
+        while self._sessions:
+            token, session = next(iter(self._sessions.items()))
+            if session["expiry"] >= now:
+                break
+            evicted.append(self._sessions.pop(token))
+        return evicted
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Cross-process store backed by a SQLite file on local disk (STATE_DIR), so
+    ``/submit-details/`` can land on any Passenger worker on the host. Calls block
+    on SQLite; async callers go through ``run_file_io``."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS verification_sessions (
+            token TEXT PRIMARY KEY,
+            epic TEXT NOT NULL,
+            temp_pdf_path TEXT NOT NULL,
+            pdf_digest TEXT,
+            expiry REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_verification_sessions_expiry ON verification_sessions (expiry);
+    """
+
+    def __init__(self, path: Path, on_evict=None):
+        super().__init__(on_evict)
+        self._db = LocalSQLite(path, self.SCHEMA)
+        conn = self._db.connect()
+        if "pdf_digest" not in {row["name"] for row in conn.execute("PRAGMA table_info(verification_sessions)")}:
+            try:
+                conn.execute("ALTER TABLE verification_sessions ADD COLUMN pdf_digest TEXT")
+            except sqlite3.OperationalError as e:
+                if "duplicate column" not in str(e):  # another worker added it first
+                    raise
+
+    @staticmethod
+    def _to_session(row) -> Session:
+        return {
+            "temp_pdf_path": Path(row["temp_pdf_path"]),
+            "epic": row["epic"],
+            "expiry": datetime.utcfromtimestamp(row["expiry"]),
+            "pdf_digest": row["pdf_digest"],
+        }
+
+    @staticmethod
+    def _timestamp(moment: datetime) -> float:
+        return (moment - datetime(1970, 1, 1)).total_seconds()
+
+    def put(self, token, session):
+        self._db.connect().execute(
+            "INSERT OR REPLACE INTO verification_sessions (token, epic, temp_pdf_path, pdf_digest, expiry) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                token, session["epic"], str(session["temp_pdf_path"]), session.get("pdf_digest"),
+                self._timestamp(session["expiry"]),
+            ),
+        )
+
+    def get(self, token):
+        row = self._db.connect().execute(
+            "SELECT * FROM verification_sessions WHERE token = ? AND expiry >= ?",
+            (token, self._timestamp(datetime.utcnow())),
+        ).fetchone()
+        return self._to_session(row) if row else None
+
+    def pop(self, token):
+        conn = self._db.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM verification_sessions WHERE token = ?", (token,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM verification_sessions WHERE token = ?", (token,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self._to_session(row) if row else None
+
+    def sweep(self, now=None):
+        cutoff = self._timestamp(now or datetime.utcnow())
+        conn = self._db.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT * FROM verification_sessions WHERE expiry < ?", (cutoff,)).fetchall()
+            conn.execute("DELETE FROM verification_sessions WHERE expiry < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._evicted([self._to_session(row) for row in rows])
+        return len(rows)
+
+    def __len__(self):
+        return self._db.connect().execute("SELECT COUNT(*) FROM verification_sessions").fetchone()[0]
+
+
+def create_session_store(default_path: Path, on_evict=None, default_backend: str = "memory") -> SessionStore:
+    backend = os.getenv("SESSION_STORE_BACKEND", default_backend).lower()
+    if backend == "memory":
+        return MemorySessionStore(int(os.getenv("SESSION_MAX_ENTRIES", "10000")), on_evict=on_evict)
+    if backend == "sqlite":
+        return SQLiteSessionStore(Path(os.getenv("SESSION_STORE_PATH", default_path)), on_evict=on_evict)
+    raise ValueError(f"Unknown SESSION_STORE_BACKEND: {backend}")
+
+
+class SessionReaper:
+    """Daemon thread that sweeps expired sessions and deletes temp uploads older
+    than the session TTL; no live session can reference such a file, so this also
+    catches files orphaned by a crashed or restarted worker. Stale ``*.part``
+    files left in ``partial_dirs`` by interrupted uploads are removed the same way."""
+
+    def __init__(self, store: SessionStore, temp_dir: Path, ttl: timedelta, interval: float = 60.0, partial_dirs=()):
+        self.store = store
+        self.temp_dir = Path(temp_dir)
+        self.partial_dirs = [Path(path) for path in partial_dirs]
+        self.ttl = ttl
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="session-reaper", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"Session reaper error: {e}")
+
+    def reap(self) -> int:
+        removed = self.store.sweep()
+        cutoff = time.time() - self.ttl.total_seconds() - self.interval
+        removed += self._remove_stale(self.temp_dir, cutoff)
+        for directory in self.partial_dirs:
+            removed += self._remove_stale(directory, cutoff, suffix=".part")
+        return removed
+
+    @staticmethod
+    def _remove_stale(directory: Path, cutoff: float, suffix: str = "") -> int:
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for entry in entries:
+            try:
+                if entry.name.endswith(suffix) and entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                print(f"Error deleting orphaned temp file {entry.path}: {e}")
+        return removed
@@ -0,0 +1,22 @@
+"""Directories shared by the web app (prod_main) and the standalone scripts,
+read from the environment (and .env) on import."""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Base upload folder definition
+BASE_UPLOAD_DIR = Path(os.getenv("BASE_UPLOAD_DIR", "/home/mfnssihw/user_verification/volunteers_files"))
+TEMP_UPLOAD_DIR = Path(os.getenv("TEMP_UPLOAD_DIR", BASE_UPLOAD_DIR / "tmp"))
+PDF_UPLOAD_DIR = Path(os.getenv("PDF_UPLOAD_DIR", BASE_UPLOAD_DIR / "voterid_proof"))
+PHOTO_UPLOAD_DIR = Path(os.getenv("PHOTO_UPLOAD_DIR", BASE_UPLOAD_DIR / "photos"))
+PHOTO_THUMB_DIR = Path(os.getenv("PHOTO_THUMB_DIR", PHOTO_UPLOAD_DIR / "thumbs"))
+# Storage namespaces for kept files (see storage.create_storage)
+STORAGE_NAMESPACES = {"proofs": PDF_UPLOAD_DIR, "photos": PHOTO_UPLOAD_DIR, "thumbs": PHOTO_THUMB_DIR}
+# Queued verification jobs keep their PDFs here, outside the session reaper's reach
+JOB_UPLOAD_DIR = Path(os.getenv("JOB_UPLOAD_DIR", TEMP_UPLOAD_DIR / "jobs"))
+# SQLite state (sessions, jobs, rate limits, janitor journal) runs in WAL mode, which
+# needs shared memory and working locks: keep it on local disk, not the NFS upload volume
+STATE_DIR = Path(os.getenv("STATE_DIR", Path(__file__).resolve().parent / "state"))
@@ -0,0 +1,31 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class LocalSQLite:
+    """One SQLite connection per thread on a shared file.
+
+    Several Passenger workers can open the same file; WAL mode keeps readers
+    from blocking the writer and ``busy_timeout`` queues competing writers.
+    WAL relies on shared memory and POSIX locks, so the file must live on a
+    local filesystem, never on NFS.
+    """
+
+    def __init__(self, path: Path, schema: str = ""):
+        self.path = Path(path)
+        self.schema = schema
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if self.schema:
+                conn.executescript(self.schema)
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,230 @@
+import os
+import re
+import errno
+import shutil
+import hashlib
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+# Stored files are named by the SHA-256 of their content and sharded two levels
+# deep ("ab/cd/abcd...ef.pdf"), so no directory grows past a few hundred entries,
+# identical uploads are stored once and no client-supplied name reaches a path.
+HASH_CHUNK = 1024 * 1024
+_DIGEST_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+@dataclass
+class StoredFile:
+    ref: str  # what goes in the members table: an absolute path, or s3://bucket/key
+    digest: str
+    created: bool  # False when identical content was already stored (dedup)
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def shard_key(digest: str, extension: str) -> str:
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+class StorageBackend:
+    """Content-addressed file store with named namespaces (proofs, photos, thumbs).
+
+    ``put_file`` takes ownership of ``source`` (it is moved or deleted) unless
+    ``keep_source`` is set. ``digest`` overrides the content key, e.g. so a
+    thumbnail is stored under its photo's digest. Every put, including one that
+    deduplicates onto an existing file, refreshes ``last_used``: that keeps a
+    file a concurrent request has just claimed away from the janitor. Blocking;
+    run it on the file-I/O threads.
+    """
+
+    def put_file(
+        self, source: Path, namespace: str, extension: str, digest: Optional[str] = None, keep_source: bool = False
+    ) -> StoredFile:
+        raise NotImplementedError
+
+    def delete(self, ref: str):
+        """Remove a stored file (or a local temp file); FileNotFoundError if it is already gone."""
+        raise NotImplementedError
+
+    def exists(self, ref: str) -> bool:
+        raise NotImplementedError
+
+    def is_content_addressed(self, ref: str) -> bool:
+        raise NotImplementedError
+
+    def last_used(self, ref: str) -> Optional[float]:
+        """When the file was last stored or deduplicated onto (epoch seconds); None if gone."""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, namespaces: Dict[str, Path]):
+        self.namespaces = {name: Path(directory) for name, directory in namespaces.items()}
+
+    def path_for(self, namespace: str, digest: str, extension: str) -> Path:
+        return self.namespaces[namespace] / shard_key(digest, extension)
+
+    def put_file(self, source, namespace, extension, digest=None, keep_source=False):
+        source = Path(source)
+        digest = digest or file_digest(source)
+        final = self.path_for(namespace, digest, extension)
+        try:
+            os.utime(final)
+        except FileNotFoundError:
+            pass
+        else:
+            if not keep_source:
+                source.unlink(missing_ok=True)
+            return StoredFile(str(final), digest, created=False)
+
+        final.parent.mkdir(parents=True, exist_ok=True)
+        if keep_source:
+            self._link_or_copy(source, final)
+        else:
+            try:
+                os.replace(source, final)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                self._link_or_copy(source, final)  # temp dir on another filesystem
+                source.unlink(missing_ok=True)
+        os.utime(final)  # a rename keeps the upload's older mtime
+        return StoredFile(str(final), digest, created=True)
+
+    @staticmethod
+    def _link_or_copy(source: Path, final: Path):
+        # Staged beside the target and renamed, so readers never see a partial file.
+        staging = final.with_name(f".{uuid.uuid4().hex}.part")
+        try:
+            try:
+                os.link(source, staging)
+            except OSError:
+                shutil.copyfile(source, staging)
+            os.replace(staging, final)
+        except BaseException:
+            staging.unlink(missing_ok=True)
+            raise
+
+    def delete(self, ref):
+        os.remove(ref)
+
+    def exists(self, ref):
+        return os.path.exists(ref)
+
+    def last_used(self, ref):
+        try:
+            return os.stat(ref).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def is_content_addressed(self, ref):
+        path = Path(ref)
+        for directory in self.namespaces.values():
+            try:
+                relative = path.relative_to(directory)
+            except ValueError:
+                continue
+            if len(relative.parts) == 3 and _DIGEST_NAME.match(path.name.split(".", 1)[0]):
+                return True
+        return False
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible object storage (AWS, MinIO, Wasabi, ...). Needs boto3.
+
+    Objects are keyed ``<prefix><namespace>/<shard key>``; refs are
+    ``s3://bucket/key``. Plain paths passed to ``delete`` are local temp files.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package") from e
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client("s3", endpoint_url=endpoint_url)
+        self._client_error = ClientError
+
+    def _key(self, namespace, digest, extension):
+        return f"{self.prefix}{namespace}/{shard_key(digest, extension)}"
+
+    def _split(self, ref: str):
+        bucket, _, key = ref[len("s3://"):].partition("/")
+        return bucket, key
+
+    def _head(self, key) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, source, namespace, extension, digest=None, keep_source=False):
+        source = Path(source)
+        digest = digest or file_digest(source)
+        key = self._key(namespace, digest, extension)
+        created = not self._head(key)
+        if created:
+            # A single PUT is atomic: the object appears complete or not at all.
+            self._client.upload_file(str(source), self.bucket, key)
+        else:
+            # Copying an object onto itself is how S3 refreshes LastModified
+            self._client.copy_object(
+                Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": key}, MetadataDirective="REPLACE"
+            )
+        if not keep_source:
+            source.unlink(missing_ok=True)
+        return StoredFile(f"s3://{self.bucket}/{key}", digest, created)
+
+    def delete(self, ref):
+        if not ref.startswith("s3://"):
+            os.remove(ref)
+            return
+        bucket, key = self._split(ref)
+        self._client.delete_object(Bucket=bucket, Key=key)
+
+    def exists(self, ref):
+        if not ref.startswith("s3://"):
+            return os.path.exists(ref)
+        return self._head(self._split(ref)[1])
+
+    def last_used(self, ref):
+        if not ref.startswith("s3://"):
+            try:
+                return os.stat(ref).st_mtime
+            except FileNotFoundError:
+                return None
+        try:
+            return self._client.head_object(Bucket=self.bucket, Key=self._split(ref)[1])["LastModified"].timestamp()
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def is_content_addressed(self, ref):
+        return ref.startswith(f"s3://{self.bucket}/{self.prefix}")
+
+
+def create_storage(namespaces: Dict[str, Path]) -> StorageBackend:
+    backend = os.getenv("STORAGE_BACKEND", "local").lower()
+    if backend == "local":
+        return LocalStorage(namespaces)
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.environ["S3_BUCKET"],
+            prefix=os.getenv("S3_PREFIX", ""),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
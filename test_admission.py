@@ -0,0 +1,102 @@
+import pytest
+
+from admission import AdmissionControl, MemoryLimiterStore, RateLimited, SQLiteLimiterStore
+from extraction_pool import ExtractionQueueFull
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryLimiterStore()
+    return SQLiteLimiterStore(tmp_path / "admission.sqlite3")
+
+
+def control(store, **overrides):
+    options = dict(
+        ip_rate=1 / 60, ip_burst=3, epic_rate=1 / 60, epic_burst=2, max_extractions=2, extraction_lease=60,
+    )
+    options.update(overrides)
+    return AdmissionControl(store, **options)
+
+
+def test_bucket_admits_its_burst_then_reports_the_wait(store):
+    admission = control(store)
+    for _ in range(3):
+        admission.admit("ip", "10.0.0.1")
+    with pytest.raises(RateLimited) as limited:
+        admission.admit("ip", "10.0.0.1")
+    assert limited.value.scope == "ip" and 55 <= limited.value.retry_after <= 60
+    admission.admit("ip", "10.0.0.2")  # other clients are unaffected
+
+
+def test_ocr_is_charged_to_both_buckets_afterwards(store):
+    admission = control(store, ocr_cost=3)
+    admission.admit("ip", "10.0.0.1")
+    admission.admit("epic", "ABC1234567")
+    admission.charge_extraction("text", "10.0.0.1", "ABC1234567")
+    admission.admit("epic", "ABC1234567")  # text extractions cost nothing extra
+    admission.charge_extraction("ocr", "10.0.0.1", "ABC1234567")
+    with pytest.raises(RateLimited):
+        admission.admit("ip", "10.0.0.1")
+    with pytest.raises(RateLimited):
+        admission.admit("epic", "ABC1234567")
+
+
+def test_zero_rate_or_missing_key_disables_the_bucket(store):
+    admission = control(store, ip_rate=0, epic_burst=1)
+    for _ in range(5):
+        admission.admit("ip", "10.0.0.1")
+        admission.admit("epic", None)
+
+
+def test_extraction_slots_are_capped_and_released(store):
+    admission = control(store)
+    first = admission.acquire_extraction_slot()
+    with admission.extraction_slot():
+        with pytest.raises(ExtractionQueueFull):
+            admission.acquire_extraction_slot()
+    admission.release_extraction_slot(first)
+    assert admission.acquire_extraction_slot() is not None
+
+
+def test_expired_slot_leases_are_reclaimed(store):
+    admission = control(store, max_extractions=1)
+    admission.acquire_extraction_slot(lease=-1)  # its holder died
+    assert admission.acquire_extraction_slot() is not None
+
+
+def test_sqlite_limits_are_shared_between_workers(tmp_path):
+    path = tmp_path / "admission.sqlite3"
+    first, second = control(SQLiteLimiterStore(path)), control(SQLiteLimiterStore(path), max_extractions=1)
+    first.admit("epic", "ABC1234567")
+    second.admit("epic", "ABC1234567")
+    with pytest.raises(RateLimited):
+        first.admit("epic", "ABC1234567")
+    with first.extraction_slot():
+        with pytest.raises(ExtractionQueueFull):
+            second.acquire_extraction_slot()
+
+
+def test_backend_comes_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("ADMISSION_BACKEND", "sqlite")
+    monkeypatch.setenv("RATE_LIMIT_IP_PER_MINUTE", "120")
+    admission = AdmissionControl.from_env(tmp_path / "admission.sqlite3", extraction_lease=60)
+    assert isinstance(admission.store, SQLiteLimiterStore) and admission.buckets["ip"][0] == 2
+    monkeypatch.setenv("ADMISSION_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        AdmissionControl.from_env(tmp_path / "admission.sqlite3", extraction_lease=60)
+
+
+def test_verify_endpoint_answers_429_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.setenv("BASE_UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("PREWARM", "false")
+    import prod_main
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(prod_main, "ADMISSION", control(MemoryLimiterStore(), ip_burst=1))
+    client = TestClient(prod_main.app)
+    # The first request spends the token and is then refused for not being multipart
+    assert client.post("/verify-document/", data={"epic_number": "ABC1234567"}).status_code == 415
+    limited = client.post("/verify-document/", data={"epic_number": "ABC1234567"})
+    assert limited.status_code == 429 and 55 <= int(limited.headers["Retry-After"]) <= 60
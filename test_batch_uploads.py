@@ -0,0 +1,115 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+
+from batch_uploads import build_items, expand_zip, parse_manifest
+from extraction import EpicExtraction
+from uploads import PARTIAL_SUFFIX, StreamedFile
+
+PDF = b"%PDF-1.4\n%test\n"
+
+
+def test_manifest_skips_headers_and_blank_lines():
+    text = "filename,epic_number\nsub/a.pdf, abc1234567\n\n,XYZ\nb.pdf,BBB2222222\n"
+    assert parse_manifest(text) == {"a.pdf": "ABC1234567", "b.pdf": "BBB2222222"}
+
+
+def write_zip(path, members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    path.write_bytes(buffer.getvalue())
+    return path
+
+
+def test_zip_is_expanded_with_its_manifest_and_rejects(tmp_path):
+    archive = write_zip(tmp_path / "batch.zip", {
+        "AAA1111111.pdf": PDF,
+        "docs/named.pdf": PDF,
+        "manifest.csv": "named.pdf,BBB2222222\n",
+        "notes.txt": b"hello",
+        "big.pdf": PDF + b"x" * 100,
+        "__MACOSX/._AAA1111111.pdf": b"junk",
+    })
+    files, manifest, rejected = expand_zip(archive, tmp_path, max_items=10, max_bytes=64)
+    assert [f.filename for f in files] == ["AAA1111111.pdf", "named.pdf"]
+    assert all(f.path.name.endswith(PARTIAL_SUFFIX) and f.path.read_bytes() == PDF for f in files)
+    assert manifest == {"named.pdf": "BBB2222222"}
+    assert rejected == {"notes.txt": "is not a PDF file", "big.pdf": "exceeds the 0 MB limit"}
+
+    items = build_items(files, manifest, rejected)
+    assert [(i.index, i.epic_number, i.upload is None) for i in items] == [
+        (0, "AAA1111111", False), (1, "BBB2222222", False), (2, "NOTES", True), (3, "BIG", True),
+    ]
+
+
+def test_too_many_zip_members_leave_nothing_behind(tmp_path):
+    archive = write_zip(tmp_path / "batch.zip", {f"{n}.pdf": PDF for n in range(3)})
+    (tmp_path / "out").mkdir()
+    with pytest.raises(HTTPException) as error:
+        expand_zip(archive, tmp_path / "out", max_items=2, max_bytes=1024)
+    assert error.value.status_code == 413 and not list((tmp_path / "out").iterdir())
+
+
+@pytest.fixture
+def prod_main(tmp_path, monkeypatch):
+    # Read once, when prod_main is first imported
+    monkeypatch.setenv("BASE_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setenv("STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("PREWARM", "false")
+    import prod_main
+
+    monkeypatch.setattr(prod_main, "TEMP_UPLOAD_DIR", tmp_path / "temp")
+    monkeypatch.setattr(prod_main, "BATCH_CONCURRENCY", 1)
+    prod_main.TEMP_UPLOAD_DIR.mkdir()
+    return prod_main
+
+
+def batch_item(directory, index, epic):
+    path = directory / f".{index}{PARTIAL_SUFFIX}"
+    path.write_bytes(PDF)
+    return StreamedFile(f"{epic}.pdf", path, "pdf", len(PDF), f"{index:064d}")
+
+
+def test_batch_items_are_committed_in_turn_and_all_cleaned_up_on_disconnect(prod_main, monkeypatch):
+    temp_dir = prod_main.TEMP_UPLOAD_DIR
+    uploads = [batch_item(temp_dir, n, epic) for n, epic in enumerate(["AAA1111111", "BBB2222222", "CCC3333333"])]
+    committed_while_first_ran = []
+    stuck = asyncio.Event()
+
+    async def not_registered(epic):
+        return False
+
+    async def extract(pdf_path, digest, size, epic, client_ip=None):
+        if epic == "AAA1111111":
+            committed_while_first_ran.extend(p.suffix for p in temp_dir.iterdir())
+            return EpicExtraction(epic, "text")
+        await stuck.wait()
+
+    cleaned = []
+    monkeypatch.setattr(prod_main, "epic_already_registered", not_registered)
+    monkeypatch.setattr(prod_main, "extract_epic_cached", extract)
+    monkeypatch.setattr(prod_main, "cleanup_files", lambda paths: cleaned.extend(paths))
+
+    async def disconnect_after_first_result():
+        stream = prod_main.stream_batch_results(build_items(uploads, {}, {}))
+        first = json.loads(await stream.__anext__())
+        await asyncio.sleep(0.05)  # the second item is now extracting, the third waits on the gate
+        await stream.aclose()
+        await asyncio.sleep(0.05)  # let the cancelled items run their cleanup
+        return first
+
+    first = asyncio.run(disconnect_after_first_result())
+    assert first["status"] == "verified" and first["epic_number"] == "AAA1111111"
+    # Only the item being extracted was committed; the others were still uploads
+    assert sorted(committed_while_first_ran) == [".part", ".part", ".pdf"]
+    kept = prod_main.VERIFICATION_SESSIONS.pop(first["verification_token"])["temp_pdf_path"]
+    assert kept not in cleaned and kept.exists()
+    # The started-but-cancelled item and the one that never ran are both released
+    assert sorted(cleaned) == sorted(upload.path for upload in uploads[1:])
+    assert uploads[1].path.suffix == ".pdf" and uploads[2].path.name.endswith(PARTIAL_SUFFIX)
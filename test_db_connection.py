@@ -2,6 +2,9 @@ import os
 import mysql.connector
 from dotenv import load_dotenv
 
+import db
+from db import ConnectionPool, DatabaseBusy
+
 def test_database_connection():
     """
     Loads database credentials from a .env file and attempts to connect.
@@ -29,14 +32,10 @@ def test_database_connection():
 
     connection = None
     try:
-        # 3. Attempt to establish the connection
-        connection = mysql.connector.connect(
-            host=db_host,
-            database=db_name,
-            user=db_user,
-            password=db_pass,
-            connection_timeout=10 # Set a timeout of 10 seconds
-        )
+        # 3. Attempt to establish the connection through the same pool the API uses
+        pool = ConnectionPool.from_env(size=1, overflow=0, timeout=10)
+        print(f"Pool: size={pool.size}, connect timeout={pool.config['connection_timeout']}s")
+        connection = pool.acquire()
 
         # 4. Check if the connection is successful
         if connection.is_connected():
@@ -47,6 +46,10 @@ def test_database_connection():
             cursor.execute("SELECT DATABASE();")
             record = cursor.fetchone()
             print(f"You're connected to database: {record[0]}")
+            cursor.close()
+
+    except DatabaseBusy:
+        print("\n❌ FAILED: Timed out waiting for a free pooled connection.")
 
     except mysql.connector.Error as err:
         # 5. Print a detailed error message on failure
@@ -58,12 +61,13 @@ def test_database_connection():
         print("  - Incorrect credentials in the .env file.")
         print("  - The IP address of this machine is not whitelisted in cPanel's 'Remote MySQL'.")
         print("  - The database server is down or there is a network issue.")
+        print("  - DB_POOL_SIZE is larger than the account's allowed connections.")
 
     finally:
-        # 6. Ensure the connection is closed
-        if connection and connection.is_connected():
-            connection.close()
-            print("\nConnection closed.")
+        # 6. Ensure the connection is returned to the pool
+        if connection:
+            db.release(connection)
+            print("\nConnection released.")
 
 if __name__ == "__main__":
     test_database_connection()
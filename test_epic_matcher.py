@@ -0,0 +1,45 @@
+import time
+
+from epic_matcher import MIN_CONFIDENCE, best_epic, find_epic_candidates
+
+
+def test_labelled_number_beats_an_earlier_unlabelled_one():
+    text = "Ref ZZZ9999999 issued by ECI\nELECTION COMMISSION OF INDIA\nIdentity Card\nEPIC No: ABC1234567\nName: X"
+    best = best_epic(text)
+    assert best.epic == "ABC1234567"
+    assert best.confidence > dict((c.epic, c.confidence) for c in find_epic_candidates(text))["ZZZ9999999"]
+
+
+def test_ocr_lookalikes_are_mapped_back_and_cost_confidence():
+    clean = best_epic("EPIC No ABC1234567")
+    misread = best_epic("EPIC No ABC12O4S67")
+    assert misread.epic == "ABC1204567"
+    assert misread.corrections == 2
+    assert misread.confidence < clean.confidence
+
+
+def test_space_after_letters_and_repeats():
+    candidates = find_epic_candidates("ABC 1234567 front ... back ABC1234567")
+    assert [c.epic for c in candidates] == ["ABC1234567"]
+    assert candidates[0].position == 0
+    assert candidates[0].confidence > best_epic("ABC1234567").confidence
+
+
+def test_rejects_non_epic_tokens():
+    assert best_epic(None) is None
+    assert best_epic("") is None
+    # Lower-case letters, too few or too many digits, or glued to other text
+    assert best_epic("abc1234567 ABC123456 ABC12345678 XABC1234567") is None
+
+
+def test_long_text_without_a_match_stays_fast():
+    text = "EPIC No " + "ABC123 " * 50000
+    started = time.perf_counter()
+    assert best_epic(text) is None
+    assert time.perf_counter() - started < 1.0
+
+
+def test_heavily_corrected_numbers_fall_below_the_threshold():
+    # Four look-alikes and no label: 0.6 - 4 * 0.15 is under MIN_CONFIDENCE
+    assert find_epic_candidates("ABC12OIS0S") == []
+    assert best_epic("EPIC No ABC12OIS0S").confidence >= MIN_CONFIDENCE
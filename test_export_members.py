@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from mysql.connector.constants import FieldFlag, FieldType
+
+from benchmarks.sqlite_backend import SQLitePool
+from export_members import ENCODERS, EXPORT_COLUMNS, MemberExport, arrow_type, create_encoder, export_query
+from members import insert_member
+
+
+def column(name, type_code, flags=0):
+    # mysql.connector's description entry: (name, type_code, ..., null_ok, flags, charset)
+    return (name, type_code, None, None, None, None, 1, flags, 45)
+
+
+class FakeCursor:
+    def __init__(self, description, rows):
+        self.description = description
+        self._rows = list(rows)
+        self.closed = False
+
+    def execute(self, sql, params=()):
+        pass
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.closed = False
+
+    def cursor(self, **_options):
+        return self._cursor
+
+    def close(self):
+        self.closed = True
+
+
+def run(export) -> bytes:
+    return b"".join(export)
+
+
+def fake_export(fmt, description, rows, batch_size=1000):
+    encoder = ENCODERS[fmt]([field[0] for field in description])
+    return MemberExport(FakeConnection(FakeCursor(description, rows)), encoder, ("SELECT", ()), batch_size)
+
+
+def test_arrow_types_follow_the_mysql_column_types():
+    assert arrow_type(pa, FieldType.LONG) == pa.int64()
+    assert arrow_type(pa, FieldType.LONGLONG, FieldFlag.UNSIGNED) == pa.uint64()
+    assert arrow_type(pa, FieldType.TINY, FieldFlag.UNSIGNED) == pa.int64()
+    assert arrow_type(pa, FieldType.DOUBLE) == pa.float64()
+    assert arrow_type(pa, FieldType.DATE) == pa.date32()
+    assert arrow_type(pa, FieldType.TIMESTAMP) == pa.timestamp("us")
+    assert arrow_type(pa, FieldType.TIME) == pa.duration("us")
+    assert arrow_type(pa, FieldType.BLOB, FieldFlag.BINARY) == pa.binary()
+    assert arrow_type(pa, FieldType.BLOB) == pa.string()  # TEXT
+    assert arrow_type(pa, FieldType.NEWDECIMAL) == pa.string()
+    assert arrow_type(pa, None) == pa.string()
+
+
+def test_parquet_schema_is_built_from_the_result_columns():
+    description = [
+        column("id", FieldType.LONG, FieldFlag.UNSIGNED),
+        column("name", FieldType.VAR_STRING),
+        column("active_no", FieldType.LONGLONG),
+        column("dob", FieldType.DATE),
+        column("created_at", FieldType.TIMESTAMP),
+        column("fee", FieldType.NEWDECIMAL),
+    ]
+    created = datetime(2026, 1, 2, 3, 4, 5, 600000)
+    rows = [
+        (1, "a", 7, date(1990, 1, 1), created, Decimal("10.50")),
+        (2, None, None, None, created, None),
+        (3, "c", 9, date(2000, 2, 29), created, Decimal("0.01")),
+    ]
+    export = fake_export("parquet", description, rows, batch_size=2)
+    conn, cursor = export.conn, export.conn._cursor
+    data = run(export)
+    table = pq.read_table(io.BytesIO(data))
+
+    assert table.schema.types == [pa.int64(), pa.string(), pa.int64(), pa.date32(), pa.timestamp("us"), pa.string()]
+    assert table.column("active_no").to_pylist() == [7, None, 9]
+    assert table.column("dob").to_pylist() == [date(1990, 1, 1), None, date(2000, 2, 29)]
+    assert table.column("created_at").to_pylist() == [created] * 3
+    assert table.column("fee").to_pylist() == ["10.50", None, "0.01"]
+    assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 2
+    assert (export.rows, export.last_id, export.completed) == (3, 3, True)
+    assert cursor.closed and conn.closed
+
+
+def test_text_formats_export_and_resume(tmp_path):
+    pool = SQLitePool(tmp_path / "members.sqlite3")
+    conn = pool.acquire()
+    for i in range(3):
+        insert_member(conn, (
+            f"n{i}", None, None, "Mandal", None, "O+", "9876543210", None,
+            None, None, None, "active", None, f"AAA111111{i}",
+        ))
+    conn.close()
+
+    text = run(MemberExport(pool.acquire(), create_encoder("csv"), export_query(), batch_size=2)).decode()
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == list(EXPORT_COLUMNS) and [row[3] for row in rows[1:]] == ["n0", "n1", "n2"]
+
+    export = MemberExport(pool.acquire(), create_encoder("ndjson"), export_query(after_id=int(rows[1][0])))
+    lines = [json.loads(line) for line in run(export).decode().splitlines()]
+    assert [line["name"] for line in lines] == ["n1", "n2"] and export.last_id == lines[-1]["id"]
+
+
+def test_abandoned_export_closes_its_connection():
+    export = fake_export("csv", [column("id", FieldType.LONG)], [(1,), (2,), (3,)], batch_size=1)
+    conn = export.conn
+    chunks = iter(export)
+    next(chunks), next(chunks)
+    chunks.close()
+    assert conn.closed and not export.completed and export.rows == 1
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson", "parquet"])
+def test_empty_export_is_still_a_valid_file(fmt):
+    description = [column("id", FieldType.LONG), column("dob", FieldType.DATE)]
+    data = run(fake_export(fmt, description, []))
+    if fmt == "parquet":
+        assert pq.read_table(io.BytesIO(data)).schema.types == [pa.int64(), pa.date32()]
+    else:
+        assert data == {"csv": b"id,dob\r\n", "ndjson": b""}[fmt]
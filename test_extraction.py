@@ -0,0 +1,79 @@
+import fitz  # PyMuPDF
+import pytest
+
+import extraction
+from extraction import extract_epic_with_method, screen_pdf
+
+EPIC = "ABC1234567"
+
+
+def text_page(doc, text):
+    doc.new_page(width=595, height=842).insert_text((72, 72), text)
+
+
+def image_page(doc):
+    pix = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 32, 32), False)
+    pix.clear_with(255)
+    doc.new_page(width=595, height=842).insert_image(fitz.Rect(72, 72, 200, 200), pixmap=pix)
+
+
+def pdf(*pages):
+    doc = fitz.open()
+    for build, *args in pages:
+        build(doc, *args)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.fixture
+def ocr_text(monkeypatch):
+    # Tesseract isn't needed to test which pages get OCR'd: each page "reads" as the text it is given
+    rendered = []
+    texts = {}
+
+    def fake_ocr(page, dpi, timer):
+        rendered.append((page.number, dpi))
+        return texts.get(page.number, "")
+
+    monkeypatch.setattr(extraction, "_ocr_page", fake_ocr)
+    return texts, rendered
+
+
+def test_screening_orders_scans_before_font_only_pages():
+    with fitz.open(stream=pdf((text_page, "Cover letter"), (image_page,), (text_page, "Notes")), filetype="pdf") as doc:
+        screening = screen_pdf(doc)
+    assert screening.text_pages == (0, 2)
+    assert [number for number, _ in screening.ocr_pages] == [1, 0, 2]
+    assert screening.summary()["path"] == "text+ocr"
+
+
+def test_ocr_pages_are_capped(monkeypatch):
+    monkeypatch.setattr(extraction, "OCR_MAX_PAGES", 2)
+    with fitz.open(stream=pdf(*[(text_page, "Page")] * 3, (image_page,)), filetype="pdf") as doc:
+        screening = screen_pdf(doc)
+    assert [number for number, _ in screening.ocr_pages] == [3, 0]
+
+
+def test_text_layer_hit_skips_ocr(ocr_text):
+    _, rendered = ocr_text
+    result = extract_epic_with_method(pdf((text_page, f"EPIC No: {EPIC}")))
+    assert (result.epic, result.method) == (EPIC, "text")
+    assert rendered == []
+
+
+def test_font_page_with_unreadable_text_layer_is_ocr_d(ocr_text):
+    # e.g. a font without a usable encoding: the text layer has no EPIC, the rendered page does
+    texts, rendered = ocr_text
+    texts[0] = f"EPIC No: {EPIC}"
+    result = extract_epic_with_method(pdf((text_page, "Elector Photo Identity Card")))
+    assert (result.epic, result.method) == (EPIC, "ocr")
+    assert rendered and all(number == 0 for number, _ in rendered)
+
+
+def test_scans_are_ocr_d_before_font_only_pages(ocr_text):
+    texts, rendered = ocr_text
+    texts[1] = f"EPIC No: {EPIC}"
+    result = extract_epic_with_method(pdf((text_page, "Cover letter"), (image_page,)))
+    assert (result.epic, result.method, result.pages_scanned) == (EPIC, "ocr", 1)
+    assert {number for number, _ in rendered} == {1}
@@ -0,0 +1,52 @@
+import time
+
+from extraction import EpicExtraction
+from extraction_cache import ExtractionCache
+
+
+def test_results_are_cached_without_their_run_stats():
+    cache = ExtractionCache()
+    cache.put("d1", EpicExtraction("ABC1234567", "ocr", pages_scanned=2, timings={"ocr": 1.5}, confidence=91.0))
+    assert cache.get("d1") == EpicExtraction("ABC1234567", "ocr")
+    assert cache.get("d2") is None
+
+
+def test_failures_and_rejections_are_not_cached():
+    cache = ExtractionCache()
+    cache.put("d1", EpicExtraction(None, "error"))
+    cache.put("d2", EpicExtraction(None, "rejected", detail="too many pages"))
+    assert cache.get("d1") is None and cache.get("d2") is None and len(cache) == 0
+
+
+def test_least_recently_used_entry_is_dropped():
+    cache = ExtractionCache(max_entries=2)
+    cache.put("d1", EpicExtraction("AAA1111111", "text"))
+    cache.put("d2", EpicExtraction("BBB2222222", "text"))
+    cache.get("d1")
+    cache.put("d3", EpicExtraction("CCC3333333", "text"))
+    assert cache.get("d2") is None and cache.get("d1") is not None and len(cache) == 2
+
+
+def test_entries_expire(monkeypatch):
+    cache = ExtractionCache(ttl=60)
+    cache.put("d1", EpicExtraction("ABC1234567", "text"))
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("d1") is None and len(cache) == 0
+
+
+def test_disk_tier_is_shared_and_survives_restarts(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    ExtractionCache(path=path).put("d1", EpicExtraction(None, "text"))
+    restarted = ExtractionCache(path=path)
+    assert len(restarted) == 0
+    # A PDF with no EPIC is a result too
+    assert restarted.get("d1") == EpicExtraction(None, "text") and len(restarted) == 1
+
+
+def test_expired_disk_entries_are_not_served(tmp_path, monkeypatch):
+    path = tmp_path / "cache.sqlite3"
+    ExtractionCache(ttl=60, path=path).put("d1", EpicExtraction("ABC1234567", "ocr"))
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert ExtractionCache(ttl=60, path=path).get("d1") is None
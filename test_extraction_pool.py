@@ -0,0 +1,32 @@
+import os
+import threading
+
+import pytest
+
+from extraction_pool import ExtractionPool, ExtractionQueueFull
+
+
+def test_workers_are_not_forked_from_the_app():
+    pool = ExtractionPool(workers=1, max_pending=1, timeout=60)
+    try:
+        assert pool.run_sync(os.getpid) != os.getpid()
+        assert pool.start()._mp_context.get_start_method() == "forkserver"
+    finally:
+        pool.shutdown()
+
+
+def test_fork_is_refused():
+    with pytest.raises(ValueError):
+        ExtractionPool(workers=1, max_pending=1, timeout=1, start_method="fork")
+
+
+def test_queue_bound_counts_running_jobs():
+    pool = ExtractionPool(workers=1, max_pending=1, timeout=5, mode="thread")
+    release = threading.Event()
+    try:
+        pool._submit(release.wait)
+        with pytest.raises(ExtractionQueueFull):
+            pool._submit(release.wait)
+    finally:
+        release.set()
+        pool.shutdown()
@@ -0,0 +1,89 @@
+import time
+
+from file_ops import FileJanitor
+
+
+def journalled(janitor):
+    return {
+        row["path"]: row
+        for row in janitor._db.connect().execute("SELECT * FROM pending_deletions").fetchall()
+    }
+
+
+def journal(janitor, *paths):
+    # What enqueue hands over, journalled here instead of on the janitor thread
+    janitor._incoming.extend(str(path) for path in paths)
+    janitor.journal()
+
+
+def make_files(tmp_path, *names):
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        paths.append(path)
+    return paths
+
+
+def test_journalled_paths_are_deleted_and_missing_ones_forgotten(tmp_path):
+    janitor = FileJanitor(tmp_path / "janitor.sqlite3")
+    kept, = make_files(tmp_path, "kept.pdf")
+    doomed, = make_files(tmp_path, "doomed.pdf")
+    journal(janitor, doomed, tmp_path / "gone.pdf")
+    assert janitor.pending() == 2
+    assert janitor.drain() == 2
+    assert not doomed.exists() and kept.exists() and janitor.pending() == 0
+
+
+def test_only_shared_paths_are_held(tmp_path):
+    asked = []
+
+    def hold(paths):
+        asked.append(sorted(paths))
+        return {path: None for path in paths if path.endswith("in-use.jpg")}
+
+    janitor = FileJanitor(tmp_path / "janitor.sqlite3", hold=hold, shared=lambda path: "/store/" in path)
+    (tmp_path / "store").mkdir()
+    temp, free, in_use = make_files(tmp_path, "temp.pdf", "store/free.jpg", "store/in-use.jpg")
+    journal(janitor, temp, free, in_use)
+    janitor.drain()
+    assert asked == [sorted([str(free), str(in_use)])]
+    # Held for good: kept on disk, dropped from the journal
+    assert not temp.exists() and not free.exists() and in_use.exists() and janitor.pending() == 0
+
+
+def test_held_until_later_is_rescheduled(tmp_path):
+    later = time.time() + 600
+    janitor = FileJanitor(tmp_path / "janitor.sqlite3", hold=lambda paths: dict.fromkeys(paths, later))
+    shared, = make_files(tmp_path, "shared.jpg")
+    journal(janitor, shared)
+    janitor.drain()
+    assert shared.exists() and journalled(janitor)[str(shared)]["next_attempt"] == later
+    assert janitor.drain() == 0
+
+
+def test_a_failing_hold_only_delays_the_paths_it_cannot_answer(tmp_path):
+    def hold(paths):
+        if any(path.endswith("broken.jpg") for path in paths):
+            raise RuntimeError("database unavailable")
+        return {}
+
+    janitor = FileJanitor(tmp_path / "janitor.sqlite3", hold=hold)
+    ok, broken = make_files(tmp_path, "ok.jpg", "broken.jpg")
+    journal(janitor, ok, broken)
+    janitor.drain()
+    assert not ok.exists() and broken.exists()
+    entry = journalled(janitor)[str(broken)]
+    assert entry["attempts"] == 1 and entry["last_error"] == "database unavailable"
+    assert entry["next_attempt"] > time.time()
+
+
+def test_failed_deletions_back_off_and_stop_after_max_attempts(tmp_path):
+    def remove(path):
+        raise PermissionError("read-only")
+
+    janitor = FileJanitor(tmp_path / "janitor.sqlite3", interval=0, max_attempts=2, remove=remove)
+    journal(janitor, tmp_path / "stuck.pdf")
+    assert janitor.drain() == 1 and janitor.drain() == 1 and janitor.drain() == 0
+    entry = journalled(janitor)[str(tmp_path / "stuck.pdf")]
+    assert entry["attempts"] == 2 and entry["last_error"] == "read-only"
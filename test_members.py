@@ -0,0 +1,120 @@
+import pytest
+
+from benchmarks.sqlite_backend import SQLitePool
+from members import (
+    DuplicateEpic, InvalidCursor, bulk_insert_members, decode_cursor, encode_cursor, insert_member,
+    membership_prefix, search_members,
+)
+
+
+def member_row(epic, name="Test Member", mandal="Mandal", status="active"):
+    return (
+        name, None, None, mandal, None, "O+", "9876543210", None,
+        None, None, None, status, None, epic,
+    )
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = SQLitePool(tmp_path / "members.sqlite3").acquire()
+    yield conn
+    conn.close()
+
+
+def stored(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, membership_no, name FROM members ORDER BY id")
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def test_bulk_import_stamps_each_row_with_its_own_number(conn, monkeypatch):
+    monkeypatch.setattr("members.BULK_INSERT_CHUNK", 2)
+    # An earlier row, so the import doesn't start at id 1
+    insert_member(conn, member_row("OLD0000000", name="old"))
+    rows = [member_row("AAA1111111", "a"), member_row(None, "b"), member_row("CCC3333333", "c")]
+
+    created = bulk_insert_members(conn, rows)
+    prefix = membership_prefix()
+    numbers = {member_id: number for member_id, number, _ in stored(conn)}
+    names = {member_id: name for member_id, _, name in stored(conn)}
+    assert [names[member_id] for member_id, _ in created] == ["a", "b", "c"]
+    assert all(numbers[member_id] == number == f"{prefix}{member_id:06d}" for member_id, number in created)
+    assert len(numbers) == 4
+
+
+def test_bulk_import_leaves_rows_it_did_not_insert_alone(conn):
+    # Another writer's row still waiting for its number (insert_member stamps it next)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO members (name, epic) VALUES (%s, %s)", ("other", "OTH0000000"))
+    conn.commit()
+    cursor.close()
+
+    created = bulk_insert_members(conn, [member_row("AAA1111111")])
+    assert [row[1] for row in stored(conn)] == [None, created[0][1]]
+
+
+def test_repeated_epic_rolls_back_the_whole_import(conn):
+    insert_member(conn, member_row("AAA1111111"))
+    with pytest.raises(DuplicateEpic):
+        bulk_insert_members(conn, [member_row("BBB2222222"), member_row(None), member_row("AAA1111111")])
+    assert len(stored(conn)) == 1
+    with pytest.raises(DuplicateEpic):
+        bulk_insert_members(conn, [member_row("BBB2222222"), member_row("BBB2222222")])
+    assert len(stored(conn)) == 1
+
+
+def test_cursor_round_trips_and_rejects_anything_else():
+    assert decode_cursor(encode_cursor(42)) == 42
+    for bad in ("not base64!", encode_cursor(42)[:-3], "e30", "eyJpZCI6ICJ4In0"):  # e30 = {}, then {"id": "x"}
+        with pytest.raises(InvalidCursor):
+            decode_cursor(bad)
+
+
+def test_search_pages_through_matches_in_id_order(conn):
+    for i in range(5):
+        insert_member(conn, member_row(f"AAA111111{i}", name=f"n{i}", mandal="North" if i % 2 == 0 else "South"))
+
+    page, cursor = search_members(conn, {"mandal": "North"}, ["name"], limit=2)
+    assert [row["name"] for row in page] == ["n0", "n2"] and set(page[0]) == {"id", "name"}
+    # The cursor is an id, not an offset: a row inserted meanwhile neither shifts nor repeats the pages
+    insert_member(conn, member_row("BBB2222222", name="late", mandal="North"))
+    page, cursor = search_members(conn, {"mandal": "North"}, ["name"], limit=2, cursor=cursor)
+    assert [row["name"] for row in page] == ["n4", "late"] and cursor is None
+
+    page, cursor = search_members(conn, {"mandal": "South", "status": "active"}, ["id", "name"], limit=2)
+    assert [row["name"] for row in page] == ["n1", "n3"] and cursor is None
+
+
+def test_search_refuses_unknown_columns_and_unindexed_filters(conn):
+    with pytest.raises(ValueError, match="pdf_proof_path"):
+        search_members(conn, {}, ["name", "pdf_proof_path"], limit=10)
+    with pytest.raises(ValueError, match="name"):
+        search_members(conn, {"name": "x"}, ["name"], limit=10)
+
+
+def test_search_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setenv("BASE_UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("PREWARM", "false")
+    monkeypatch.setenv("ADMIN_API_KEY", "secret")
+    import prod_main
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(prod_main, "DB_POOL", SQLitePool(tmp_path / "members.sqlite3"))
+    conn = prod_main.DB_POOL.acquire()
+    for i in range(3):
+        insert_member(conn, member_row(f"AAA111111{i}", name=f"n{i}"))
+    conn.close()
+    client = TestClient(prod_main.app)
+    headers = {"X-Admin-Key": "secret"}
+
+    first = client.get("/members/", params={"mandal": "Mandal", "limit": 2, "fields": "name"}, headers=headers)
+    assert first.status_code == 200
+    assert [row["name"] for row in first.json()["members"]] == ["n0", "n1"]
+    rest = client.get("/members/", params={"limit": 2, "cursor": first.json()["next_cursor"]}, headers=headers)
+    assert [row["name"] for row in rest.json()["members"]] == ["n2"] and rest.json()["next_cursor"] is None
+    assert client.get("/members/", params={"cursor": "bogus"}, headers=headers).status_code == 400
+    assert client.get("/members/", params={"fields": "pdf_proof_path"}, headers=headers).status_code == 400
+    assert client.get("/members/", headers={"X-Admin-Key": "wrong"}).status_code == 401
@@ -0,0 +1,34 @@
+import metrics
+
+
+def test_sampled_gauge_is_read_by_the_sampler_not_the_scrape():
+    calls = []
+    sampler = metrics.GaugeSampler()
+    gauge = metrics.Gauge("bsp_test_backlog", "Test.", sampler.cached(lambda: calls.append(1) or len(calls)))
+
+    assert "# error reading bsp_test_backlog: not sampled yet" in gauge.render()
+    sampler.refresh()
+    assert gauge.render().endswith("bsp_test_backlog 1\n")
+    gauge.render()
+    assert len(calls) == 1
+
+
+def test_failed_sample_keeps_the_previous_value():
+    values = iter([3])
+    sampler = metrics.GaugeSampler()
+    gauge = metrics.Gauge("bsp_test_pending", "Test.", sampler.cached(lambda: next(values)))
+    sampler.refresh()
+    sampler.refresh()  # StopIteration: the database is unavailable, say
+    assert gauge.render().endswith("bsp_test_pending 3\n")
+
+
+def test_sampler_thread_refreshes_until_stopped():
+    sampler = metrics.GaugeSampler(interval=60)
+    read = sampler.cached(lambda: 7)
+    sampler.start()
+    sampler.start()
+    sampler._thread.join(0.5)
+    assert read() == 7
+    sampler.stop()
+    sampler._thread.join(1)
+    assert not sampler._thread.is_alive()
@@ -0,0 +1,78 @@
+import sys
+import types
+
+import pytest
+
+import ocr_engine
+
+
+class FakeApi:
+    accepts = (bytes, memoryview)
+    images = []
+
+    def __init__(self, lang, psm):
+        self.variables = {}
+
+    def SetVariable(self, name, value):
+        self.variables[name] = value
+
+    def SetImageBytes(self, imagedata, width, height, bytes_per_pixel, bytes_per_line):
+        if not isinstance(imagedata, self.accepts):
+            raise TypeError(f"expected bytes, {type(imagedata).__name__} found")
+        self.images.append(imagedata)
+
+    def SetSourceResolution(self, dpi):
+        pass
+
+    def GetUTF8Text(self):
+        return "ABC1234567\n"
+
+    def Clear(self):
+        pass
+
+
+@pytest.fixture
+def tesserocr(monkeypatch):
+    module = types.SimpleNamespace(PyTessBaseAPI=FakeApi, tesseract_version=lambda: "tesseract 5.3.0\n leptonica")
+    monkeypatch.setitem(sys.modules, "tesserocr", module)
+    monkeypatch.delenv("OCR_ENGINE", raising=False)
+    FakeApi.images = []
+    return module
+
+
+def page(size=8):
+    return memoryview(bytearray([255]) * size * size)
+
+
+def test_pixmap_buffer_reaches_tesseract_uncopied(tesserocr):
+    engine = ocr_engine.TesserocrEngine(psm=6, whitelist="ABC0123456789")
+    samples = page()
+    assert engine.recognise(samples, 8, 8, 8, 300) == "ABC1234567\n"
+    assert FakeApi.images == [samples]
+
+
+def test_builds_that_only_take_bytes_get_one_copy(tesserocr, monkeypatch):
+    monkeypatch.setattr(FakeApi, "accepts", bytes)
+    engine = ocr_engine.TesserocrEngine(psm=6, whitelist="ABC0123456789")
+    engine.recognise(page(), 8, 8, 8, 300)
+    engine.recognise(page(), 8, 8, 8, 300)
+    assert [type(image) for image in FakeApi.images] == [bytes, bytes]
+
+
+def test_engine_choice_comes_from_the_environment(tesserocr, monkeypatch):
+    assert isinstance(ocr_engine.create_ocr_engine(6, "A", "--psm 6"), ocr_engine.TesserocrEngine)
+    assert ocr_engine.tesseract_version() == "tesserocr tesseract 5.3.0"
+    monkeypatch.setenv("OCR_ENGINE", "pytesseract")
+    assert isinstance(ocr_engine.create_ocr_engine(6, "A", "--psm 6"), ocr_engine.PytesseractEngine)
+    monkeypatch.setenv("OCR_ENGINE", "easyocr")
+    with pytest.raises(ValueError):
+        ocr_engine.create_ocr_engine(6, "A", "--psm 6")
+
+
+def test_auto_falls_back_to_pytesseract_when_tesserocr_is_missing(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tesserocr", None)  # import fails
+    monkeypatch.delenv("OCR_ENGINE", raising=False)
+    assert isinstance(ocr_engine.create_ocr_engine(6, "A", "--psm 6"), ocr_engine.PytesseractEngine)
+    monkeypatch.setenv("OCR_ENGINE", "tesserocr")
+    with pytest.raises(ImportError):
+        ocr_engine.create_ocr_engine(6, "A", "--psm 6")
@@ -0,0 +1,138 @@
+import pytest
+
+from benchmarks.sqlite_backend import SQLitePool
+from members import DuplicateEpic, epic_registered, insert_member
+from payments import apply_payment, reconcile_payments
+
+EPIC = "ABC1234567"
+
+
+def member_row(epic=EPIC, status="pending_payment"):
+    return (
+        "Test Member", None, None, "Mandal", None, "O+", "9876543210", None,
+        "/proofs/a.pdf", "/photos/a.jpg", "/photos/a.thumb.jpg", status, None, epic,
+    )
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = SQLitePool(tmp_path / "members.sqlite3").acquire()
+    yield conn
+    conn.close()
+
+
+def member_status(conn, member_id):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT status, epic, pdf_proof_path FROM members WHERE id = %s", (member_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row
+
+
+def test_replayed_callback_is_answered_from_its_key(conn):
+    member_id, _ = insert_member(conn, member_row())
+    first = apply_payment(conn, member_id, "successful", "tx-1")
+    assert (first.outcome, first.member_status, first.replayed) == ("applied", "active", False)
+
+    again = apply_payment(conn, member_id, "successful", "tx-1")
+    assert (again.outcome, again.member_status, again.replayed) == ("applied", "active", True)
+    # A retry without the key finds the transition already made
+    assert apply_payment(conn, member_id, "successful").outcome == "unchanged"
+
+
+def test_key_reused_for_another_callback_is_refused(conn):
+    a, _ = insert_member(conn, member_row("AAA1111111"))
+    b, _ = insert_member(conn, member_row("BBB2222222"))
+    apply_payment(conn, a, "successful", "tx-1")
+
+    other_member = apply_payment(conn, b, "successful", "tx-1")
+    assert (other_member.outcome, other_member.member_status, other_member.replayed) == ("key_reused", None, False)
+    assert apply_payment(conn, a, "failed", "tx-1").outcome == "key_reused"
+    assert member_status(conn, b)["status"] == "pending_payment"
+    assert member_status(conn, a)["status"] == "active"
+
+
+def test_late_failure_does_not_undo_an_active_member(conn):
+    member_id, _ = insert_member(conn, member_row())
+    apply_payment(conn, member_id, "successful", "tx-1")
+
+    late = apply_payment(conn, member_id, "failed", "tx-2")
+    assert (late.outcome, late.member_status, late.files) == ("conflict", "active", ())
+    assert member_status(conn, member_id) == {"status": "active", "epic": EPIC, "pdf_proof_path": "/proofs/a.pdf"}
+
+
+def test_failed_payment_frees_the_epic_for_registration(conn):
+    member_id, _ = insert_member(conn, member_row())
+    with pytest.raises(DuplicateEpic):
+        insert_member(conn, member_row())
+
+    failed = apply_payment(conn, member_id, "failed", "tx-1")
+    assert (failed.outcome, failed.epic) == ("applied", EPIC)
+    assert set(failed.files) == {"/proofs/a.pdf", "/photos/a.jpg", "/photos/a.thumb.jpg"}
+    assert member_status(conn, member_id) == {"status": "failed", "epic": None, "pdf_proof_path": None}
+    assert not epic_registered(conn, EPIC)
+
+    new_id, _ = insert_member(conn, member_row())
+    assert new_id != member_id and epic_registered(conn, EPIC)
+    # The old row stays failed: a success arriving for it now is a conflict
+    assert apply_payment(conn, member_id, "successful").outcome == "conflict"
+
+
+def test_reconcile_applies_in_order_and_replays_known_keys(conn):
+    a, _ = insert_member(conn, member_row("AAA1111111"))
+    b, _ = insert_member(conn, member_row("BBB2222222"))
+    apply_payment(conn, a, "successful", "tx-a")
+
+    outcomes = reconcile_payments(conn, [
+        (a, "successful", "tx-a"),
+        (b, "successful", "tx-b"),
+        (b, "failed", "tx-b2"),
+        (999, "failed", None),
+        (b, "successful", "tx-a"),
+        (a, "failed", "tx-b"),
+        (b, "successful", "tx-b"),
+    ])
+    assert [(o.outcome, o.member_status, o.replayed) for o in outcomes] == [
+        ("applied", "active", True),
+        ("applied", "active", False),
+        ("conflict", "active", False),
+        ("not_found", None, False),
+        ("key_reused", None, False),
+        ("key_reused", None, False),
+        ("applied", "active", True),
+    ]
+    assert member_status(conn, b)["status"] == "active"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # Read once, when prod_main is first imported
+    monkeypatch.setenv("BASE_UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("PREWARM", "false")
+    import prod_main
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(prod_main, "DB_POOL", SQLitePool(tmp_path / "members.sqlite3"))
+    return prod_main, TestClient(prod_main.app)
+
+
+def test_update_payment_endpoint_reports_conflicts(client):
+    prod_main, client = client
+    conn = prod_main.DB_POOL.acquire()
+    member_id, _ = insert_member(conn, member_row(epic=None))
+    conn.close()
+
+    paid = client.post("/update-payment/", json={"member_id": member_id, "status": "successful"},
+                       headers={"Idempotency-Key": "tx-1"})
+    assert paid.status_code == 200 and paid.json()["outcome"] == "applied"
+    replayed = client.post("/update-payment/", json={"member_id": member_id, "status": "successful"},
+                           headers={"Idempotency-Key": "tx-1"})
+    assert replayed.status_code == 200 and replayed.json()["replayed"] is True
+    reused = client.post("/update-payment/", json={"member_id": member_id, "status": "failed"},
+                         headers={"Idempotency-Key": "tx-1"})
+    assert reused.status_code == 409 and "Idempotency key" in reused.json()["detail"]
+    late = client.post("/update-payment/", json={"member_id": member_id, "status": "failed"})
+    assert late.status_code == 409
+    missing = client.post("/update-payment/", json={"member_id": member_id + 1, "status": "failed"})
+    assert missing.status_code == 404
@@ -0,0 +1,52 @@
+import pytest
+from PIL import Image
+
+from photos import InvalidPhoto, PhotoSettings, normalise_photo
+
+
+def test_photo_is_downscaled_and_thumbnailed(tmp_path):
+    source = tmp_path / "upload"
+    Image.new("RGB", (4000, 3000), "red").save(source, "PNG")
+    settings = PhotoSettings(max_size=800, thumb_size=100)
+
+    photo, thumb = normalise_photo(source, tmp_path / "photo.jpg", tmp_path / "thumbs" / "thumb.jpg", settings)
+    with Image.open(photo) as image:
+        assert (image.format, image.size, image.mode) == ("JPEG", (800, 600), "RGB")
+    with Image.open(thumb) as image:
+        assert image.size == (100, 75)
+    assert not list(tmp_path.glob("**/*.part"))
+
+
+def test_exif_orientation_is_applied_and_metadata_stripped(tmp_path):
+    source = tmp_path / "upload.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90° clockwise to display
+    exif[0x010F] = "Camera Maker"
+    Image.new("RGB", (400, 200), "blue").save(source, "JPEG", exif=exif)
+
+    photo, _ = normalise_photo(source, tmp_path / "photo.jpg", tmp_path / "thumb.jpg", PhotoSettings())
+    with Image.open(photo) as image:
+        assert image.size == (200, 400) and not image.getexif()
+
+
+def test_transparency_is_flattened_onto_white(tmp_path):
+    source = tmp_path / "upload.png"
+    Image.new("RGBA", (10, 10), (0, 0, 0, 0)).save(source, "PNG")
+    photo, _ = normalise_photo(source, tmp_path / "photo.webp", tmp_path / "thumb.webp", PhotoSettings(format="WEBP"))
+    with Image.open(photo) as image:
+        assert image.format == "WEBP" and image.convert("RGB").getpixel((5, 5)) > (250, 250, 250)
+
+
+def test_undecodable_upload_is_rejected(tmp_path):
+    source = tmp_path / "upload.jpg"
+    source.write_bytes(b"not an image")
+    with pytest.raises(InvalidPhoto):
+        normalise_photo(source, tmp_path / "photo.jpg", tmp_path / "thumb.jpg", PhotoSettings())
+
+
+def test_settings_refuse_unknown_formats(monkeypatch):
+    monkeypatch.setenv("PHOTO_FORMAT", "gif")
+    with pytest.raises(ValueError):
+        PhotoSettings.from_env()
+    monkeypatch.setenv("PHOTO_FORMAT", "webp")
+    assert PhotoSettings.from_env().extension == ".webp"
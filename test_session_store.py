@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from session_store import MemorySessionStore, SessionReaper, SQLiteSessionStore, create_session_store
+
+
+def session(minutes=5, name="a.pdf"):
+    return {
+        "temp_pdf_path": Path("/tmp") / name,
+        "epic": "ABC1234567",
+        "expiry": datetime.utcnow() + timedelta(minutes=minutes),
+        "pdf_digest": "ab" * 32,
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    evicted = []
+    if request.param == "memory":
+        store = MemorySessionStore(on_evict=evicted.append)
+    else:
+        store = SQLiteSessionStore(tmp_path / "sessions.sqlite3", on_evict=evicted.append)
+    return store, evicted
+
+
+def test_a_session_is_claimed_once(store):
+    store, _ = store
+    store.put("t", session())
+    assert "t" in store and len(store) == 1
+    claimed = store.pop("t")
+    assert claimed["epic"] == "ABC1234567" and claimed["temp_pdf_path"] == Path("/tmp/a.pdf")
+    assert claimed["pdf_digest"] == "ab" * 32
+    assert store.pop("t") is None and "t" not in store
+
+
+def test_expired_sessions_are_swept_and_their_files_released(store):
+    store, evicted = store
+    store.put("old", session(minutes=1, name="old.pdf"))
+    store.put("new", session(minutes=10, name="new.pdf"))
+    assert store.sweep(now=datetime.utcnow() + timedelta(minutes=5)) == 1
+    assert [s["temp_pdf_path"].name for s in evicted] == ["old.pdf"]
+    assert store.get("old") is None and store.get("new") is not None and len(store) == 1
+
+
+def test_memory_store_is_bounded():
+    evicted = []
+    store = MemorySessionStore(max_entries=2, on_evict=evicted.append)
+    for n in range(3):
+        store.put(str(n), session(name=f"{n}.pdf"))
+    assert len(store) == 2 and [s["temp_pdf_path"].name for s in evicted] == ["0.pdf"]
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    # Two workers opening the same file
+    first = SQLiteSessionStore(tmp_path / "sessions.sqlite3")
+    second = SQLiteSessionStore(tmp_path / "sessions.sqlite3")
+    first.put("t", session())
+    assert second.pop("t") is not None and first.pop("t") is None
+
+
+def test_sqlite_store_adds_the_digest_column_to_an_old_file(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE verification_sessions (token TEXT PRIMARY KEY, epic TEXT NOT NULL, "
+            "temp_pdf_path TEXT NOT NULL, expiry REAL NOT NULL)"
+        )
+    store = SQLiteSessionStore(path)
+    store.put("t", session())
+    assert store.get("t")["pdf_digest"] == "ab" * 32
+
+
+def test_backend_comes_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("SESSION_STORE_BACKEND", raising=False)
+    assert isinstance(create_session_store(tmp_path / "s.sqlite3"), MemorySessionStore)
+    assert isinstance(create_session_store(tmp_path / "s.sqlite3", default_backend="sqlite"), SQLiteSessionStore)
+    monkeypatch.setenv("SESSION_STORE_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        create_session_store(tmp_path / "s.sqlite3")
+
+
+def test_reaper_removes_orphaned_temp_files_and_stale_parts(tmp_path):
+    temp_dir, photo_dir = tmp_path / "tmp", tmp_path / "photos"
+    temp_dir.mkdir()
+    photo_dir.mkdir()
+    old = time.time() - 3600
+    for path in (temp_dir / "orphan.pdf", photo_dir / ".upload.part", photo_dir / "kept.jpg"):
+        path.write_bytes(b"x")
+        os.utime(path, (old, old))
+    (temp_dir / "fresh.pdf").write_bytes(b"x")
+
+    store = MemorySessionStore()
+    store.put("live", session())
+    reaper = SessionReaper(store, temp_dir, timedelta(minutes=15), interval=60, partial_dirs=[photo_dir])
+    assert reaper.reap() == 2 and "live" in store
+    assert sorted(p.name for p in temp_dir.iterdir()) == ["fresh.pdf"]
+    assert sorted(p.name for p in photo_dir.iterdir()) == ["kept.jpg"]
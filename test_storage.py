@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+
+from benchmarks.sqlite_backend import SQLitePool
+from migrate_storage import migrate
+from storage import LocalStorage, file_digest
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage({
+        "proofs": tmp_path / "proofs", "photos": tmp_path / "photos", "thumbs": tmp_path / "photos" / "thumbs",
+    })
+
+
+def upload(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    return path
+
+
+def test_files_are_stored_once_under_their_digest(tmp_path, storage):
+    first = storage.put_file(upload(tmp_path, "a.pdf", b"proof"), "proofs", ".pdf")
+    digest = file_digest(first.ref)
+    assert first.created and first.digest == digest
+    assert first.ref == str(tmp_path / "proofs" / digest[:2] / digest[2:4] / f"{digest}.pdf")
+    # A rename keeps the upload's mtime; the stored file must look freshly used
+    assert storage.last_used(first.ref) > time.time() - 60
+
+    second = storage.put_file(upload(tmp_path, "b.pdf", b"proof"), "proofs", ".pdf")
+    assert (second.ref, second.created) == (first.ref, False)
+    assert not (tmp_path / "a.pdf").exists() and not (tmp_path / "b.pdf").exists()
+
+
+def test_digest_override_and_keep_source(tmp_path, storage):
+    source = upload(tmp_path, "thumb.jpg", b"thumb")
+    stored = storage.put_file(source, "thumbs", ".jpg", digest="ab" * 32, keep_source=True)
+    assert stored.ref.endswith(f"/thumbs/ab/ab/{'ab' * 32}.jpg") and source.exists()
+
+
+def test_only_sharded_digest_paths_are_content_addressed(tmp_path, storage):
+    stored = storage.put_file(upload(tmp_path, "p.jpg", b"photo"), "photos", ".jpg")
+    thumb = storage.put_file(upload(tmp_path, "t.jpg", b"thumb"), "thumbs", ".jpg", digest=stored.digest)
+    assert storage.is_content_addressed(stored.ref) and storage.is_content_addressed(thumb.ref)
+    assert not storage.is_content_addressed(str(tmp_path / "photos" / "legacy.jpg"))
+    assert not storage.is_content_addressed(str(tmp_path / "tmp" / "ab" / "cd" / f"{'ab' * 32}.pdf"))
+
+    storage.delete(stored.ref)
+    assert not storage.exists(stored.ref) and storage.last_used(stored.ref) is None
+    with pytest.raises(FileNotFoundError):
+        storage.delete(stored.ref)
+
+
+def test_migration_moves_flat_files_and_is_resumable(tmp_path, storage):
+    pool = SQLitePool(tmp_path / "members.sqlite3")
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    proof, photo, thumb = (upload(legacy, name, name.encode()) for name in ("1.pdf", "1.JPG", "1_thumb.jpg"))
+    conn = pool.acquire()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO members (name, pdf_proof_path, photo_path, photo_thumb_path) VALUES (%s, %s, %s, %s)",
+        ("a", str(proof), str(photo), str(thumb)),
+    )
+    cursor.execute("INSERT INTO members (name, pdf_proof_path) VALUES (%s, %s)", ("b", str(legacy / "gone.pdf")))
+    conn.commit()
+
+    assert migrate(pool, storage, batch=1, dry_run=True) == {"rows": 1, "files": 3, "missing": 1}
+    assert proof.exists()
+    assert migrate(pool, storage, batch=1, dry_run=False) == {"rows": 1, "files": 3, "missing": 1}
+    cursor.execute("SELECT pdf_proof_path, photo_path, photo_thumb_path FROM members WHERE name = 'a'")
+    refs = cursor.fetchone()
+    assert all(storage.is_content_addressed(ref) and os.path.exists(ref) for ref in refs)
+    assert refs[1].endswith(".jpg") and refs[2].split("/")[-1].startswith(file_digest(refs[1]))
+    assert not any(path.exists() for path in (proof, photo, thumb))
+    # Re-running finds nothing left to move
+    assert migrate(pool, storage, batch=10, dry_run=False) == {"rows": 0, "files": 0, "missing": 1}
+    conn.close()
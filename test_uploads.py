@@ -0,0 +1,107 @@
+import hashlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from uploads import FileRule, discard_files, read_streaming_form, sniff_kind
+
+PDF = b"%PDF-1.4\n" + b"x" * 4000
+PNG = b"\x89PNG\r\n\x1a\n" + b"y" * 100
+
+
+@pytest.fixture
+def upload(tmp_path):
+    rules = {
+        "pdf_file": FileRule(tmp_path, max_bytes=8000, kinds=("pdf",), memory_bytes=1000),
+        "photos": FileRule(tmp_path, max_bytes=1000, kinds=("png", "jpeg"), max_files=2, memory_bytes=1000),
+    }
+    app = FastAPI()
+    received = {}
+
+    @app.post("/")
+    async def endpoint(request: Request):
+        fields, files = await read_streaming_form(request, rules, max_field_bytes=64)
+        received.update(files)
+        return {"fields": fields, "files": sorted(files)}
+
+    client = TestClient(app)
+
+    def post(files, data=None):
+        return client.post("/", files=files, data=data or {})
+
+    return post, received, tmp_path
+
+
+def partial_files(directory):
+    return sorted(directory.glob(".*.part"))
+
+
+def test_sniff_kind():
+    assert sniff_kind(PDF[:8]) == "pdf"
+    assert sniff_kind(PNG[:8]) == "png"
+    assert sniff_kind(b"\xff\xd8\xff\xe0") == "jpeg"
+    assert sniff_kind(b"PK\x03\x04") == "zip"
+    assert sniff_kind(b"GIF89a") is None
+
+
+def test_fields_and_files_in_one_pass(upload):
+    post, received, directory = upload
+    response = post(
+        [("pdf_file", ("card.pdf", PDF)), ("photos", ("a.png", PNG)), ("photos", ("b.png", PNG))],
+        {"epic_number": "ABC1234567"},
+    )
+    assert response.json() == {"fields": {"epic_number": "ABC1234567"}, "files": ["pdf_file", "photos"]}
+
+    pdf = received["pdf_file"]
+    assert (pdf.filename, pdf.kind, pdf.size) == ("card.pdf", "pdf", len(PDF))
+    assert pdf.sha256 == hashlib.sha256(PDF).hexdigest()
+    # Over memory_bytes: spilled to a .part file in the rule's directory, then renamed in place
+    assert pdf.data is None and pdf.source == pdf.path
+    assert pdf.path.parent == directory and pdf.path.read_bytes() == PDF
+    committed = pdf.commit(directory / "card.pdf")
+    assert committed.read_bytes() == PDF and pdf.path == committed
+
+    # A rule allowing several files returns them as a list, in upload order
+    photos = received["photos"]
+    assert [(photo.filename, photo.kind) for photo in photos] == [("a.png", "png"), ("b.png", "png")]
+    # Within memory_bytes: nothing on disk until commit
+    assert all(photo.path is None and photo.source == PNG for photo in photos)
+    for photo in photos:
+        assert photo.commit(directory / photo.filename).read_bytes() == PNG
+        assert photo.data is None
+    assert partial_files(directory) == []
+
+
+def test_empty_file_input_is_treated_as_missing(upload):
+    post, received, _ = upload
+    assert post([("pdf_file", ("", b""))]).json()["files"] == []
+
+
+@pytest.mark.parametrize(
+    "files, status",
+    [
+        ([("pdf_file", ("card.pdf", PNG))], 415),  # content, not the name, decides the type
+        ([("pdf_file", ("card.pdf", PDF + b"z" * 8000))], 413),
+        ([("photos", (f"{n}.png", PNG)) for n in range(3)], 413),
+        ([("pdf_file", ("a.pdf", PDF)), ("pdf_file", ("b.pdf", PDF))], 400),
+        ([("other", ("x.pdf", PDF))], 400),
+    ],
+)
+def test_rejected_uploads_leave_nothing_behind(upload, files, status):
+    post, _, directory = upload
+    assert post(files).status_code == status
+    assert partial_files(directory) == []
+
+
+def test_oversized_field_and_non_multipart_bodies(upload):
+    post, _, _ = upload
+    assert post([("pdf_file", ("card.pdf", PDF))], {"note": "n" * 100}).status_code == 413
+    assert post(None, {"epic_number": "x"}).status_code == 415
+
+
+def test_discard_files_ignores_missing_paths(tmp_path):
+    kept = tmp_path / "kept"
+    kept.write_bytes(b"x")
+    discard_files([None, tmp_path / "missing", kept])
+    assert not kept.exists()
@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from extraction import EpicExtraction
+from verification_jobs import JobWorker, RetryJob, VerificationJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return VerificationJobQueue(tmp_path / "jobs.sqlite3", lease=60, max_attempts=2)
+
+
+def enqueue(queue, epic="ABC1234567"):
+    return queue.enqueue(epic, "/tmp/job.pdf", "ab" * 32, 123, "10.0.0.1")
+
+
+def expire_lease(queue, job_id):
+    queue._db.connect().execute("UPDATE verification_jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_jobs_are_claimed_in_order_and_finished(queue):
+    first, second = enqueue(queue), enqueue(queue)
+    assert queue.position(second) == 1 and queue.backlog() == 2
+
+    job = queue.claim()
+    assert (job["id"], job["status"], job["attempts"], job["client_ip"]) == (first, "queued", 1, "10.0.0.1")
+    assert queue.get(first)["status"] == "running"
+    assert queue.finish(first, "verified", {"verification_token": "t"}, job["lease_until"])
+    assert queue.get(first)["result"] == {"verification_token": "t"} and queue.backlog() == 1
+    assert queue.get("missing") is None
+
+
+def test_expired_lease_is_reclaimed_and_the_stale_worker_cannot_overwrite_it(queue):
+    job_id = enqueue(queue)
+    stale = queue.claim()
+    assert queue.claim() is None  # leased
+    expire_lease(queue, job_id)
+    fresh = queue.claim()
+    assert fresh["attempts"] == 2
+
+    assert queue.finish(job_id, "verified", {"verification_token": "new"}, fresh["lease_until"])
+    assert not queue.finish(job_id, "rejected", {"detail": "old"}, stale["lease_until"])
+    assert queue.retry(job_id, stale["attempts"], "old error", stale["lease_until"]) is None
+    assert queue.get(job_id)["result"] == {"verification_token": "new"}
+
+
+def test_retry_backs_off_then_fails(queue):
+    job_id = enqueue(queue)
+    job = queue.claim()
+    assert queue.retry(job_id, job["attempts"], "busy", job["lease_until"]) is True
+    assert queue.get(job_id)["status"] == "queued" and queue.claim() is None  # backing off
+    queue._db.connect().execute("UPDATE verification_jobs SET available_at = 0 WHERE id = ?", (job_id,))
+    job = queue.claim()
+    assert queue.retry(job_id, job["attempts"], "busy", job["lease_until"]) is False
+    assert queue.get(job_id)["status"] == "failed" and queue.get(job_id)["result"] == {"detail": "busy"}
+
+
+def test_finished_jobs_are_pruned_after_retention(tmp_path):
+    queue = VerificationJobQueue(tmp_path / "jobs.sqlite3", retention=-1)
+    done, waiting = enqueue(queue), enqueue(queue)
+    queue.finish(done, "rejected", {"detail": "mismatch"})
+    assert queue.prune() == 1 and queue.get(done) is None and queue.get(waiting) is not None
+
+
+def test_worker_outcomes(queue):
+    outcomes = iter([("verified", {"verification_token": "t"}), RetryJob("busy"), RuntimeError("boom")])
+    released = []
+
+    def handler(job):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    worker = JobWorker(queue, handler, threads=0, on_failed=released.append)
+    verified, retried = enqueue(queue), enqueue(queue)
+    assert worker.run_once() and queue.get(verified)["status"] == "verified"
+    assert worker.run_once() and queue.get(retried)["status"] == "queued"
+    queue._db.connect().execute("UPDATE verification_jobs SET available_at = 0 WHERE id = ?", (retried,))
+    assert worker.run_once() and queue.get(retried)["status"] == "failed"
+    assert [job["id"] for job in released] == [retried]
+    assert not worker.run_once()
+
+
+def test_worker_keeps_the_newer_result_when_its_lease_was_lost(queue):
+    job_id = enqueue(queue)
+    released = []
+
+    def slow_handler(job):
+        # Meanwhile the lease expires and another worker verifies the job
+        expire_lease(queue, job_id)
+        other = queue.claim()
+        queue.finish(job_id, "verified", {"verification_token": "other"}, other["lease_until"])
+        raise RuntimeError("stalled")
+
+    JobWorker(queue, slow_handler, threads=0, on_failed=released.append).run_once()
+    assert queue.get(job_id)["result"] == {"verification_token": "other"} and released == []
+
+
+def test_job_handler_opens_a_session_for_a_matching_document(tmp_path, monkeypatch):
+    monkeypatch.setenv("STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("BASE_UPLOAD_DIR", str(tmp_path))
+    import verification_service
+
+    monkeypatch.setattr(verification_service, "TEMP_UPLOAD_DIR", tmp_path)
+    cleaned = []
+    monkeypatch.setattr(verification_service, "cleanup_files", cleaned.extend)
+    digest = "cd" * 32
+    verification_service.EXTRACTION_CACHE.put(digest, EpicExtraction("ABC1234567", "text"))
+    job_dir = tmp_path / "jobs"
+    job_dir.mkdir()
+
+    def job(epic, name):
+        (job_dir / name).write_bytes(b"%PDF")
+        return {"pdf_path": str(job_dir / name), "pdf_digest": digest, "pdf_size": 4, "epic": epic, "client_ip": None}
+
+    status, result = verification_service.run_verification_job(job("ABC1234567", "a.pdf"))
+    assert status == "verified"
+    session = verification_service.VERIFICATION_SESSIONS.pop(result["verification_token"])
+    assert session["temp_pdf_path"] == tmp_path / "a.pdf" and session["temp_pdf_path"].exists()
+
+    status, result = verification_service.run_verification_job(job("XYZ9876543", "b.pdf"))
+    assert status == "rejected" and "Mismatch" in result["detail"] and cleaned == [job_dir / "b.pdf"]
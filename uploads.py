@@ -0,0 +1,293 @@
+import os
+import uuid
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request
+
+from file_ops import run_file_io
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Leading bytes that identify each accepted upload type.
+MAGIC_BYTES = {
+    "pdf": (b"%PDF",),
+    "jpeg": (b"\xff\xd8\xff",),
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "zip": (b"PK\x03\x04",),
+}
+SNIFF_BYTES = max(len(magic) for signatures in MAGIC_BYTES.values() for magic in signatures)
+PARTIAL_SUFFIX = ".part"
+
+
+def sniff_kind(head: bytes) -> Optional[str]:
+    for kind, signatures in MAGIC_BYTES.items():
+        if any(head.startswith(magic) for magic in signatures):
+            return kind
+    return None
+
+
+@dataclass
+class FileRule:
+    directory: Path
+    max_bytes: int  # per file
+    kinds: Tuple[str, ...]
+    max_files: int = 1  # above 1 the field is returned as a list
+    memory_bytes: int = 0  # files up to this size stay in memory instead of going to disk
+
+
+@dataclass
+class StreamedFile:
+    filename: str  # basename supplied by the client
+    path: Optional[Path]  # "<directory>/.<uuid>.part" until commit(); None while held in memory
+    kind: str
+    size: int
+    sha256: str
+    data: Optional[bytes] = None  # the content, for files within the rule's memory_bytes
+
+    @property
+    def source(self) -> Union[bytes, Path]:
+        return self.data if self.data is not None else self.path
+
+    def commit(self, final_path: Path) -> Path:
+        """Blocking. A spilled file is renamed (same directory, no second copy) and
+        its mtime reset, so age-based sweeps count from the commit; an in-memory
+        one is written here for the first time."""
+        if self.data is not None:
+            partial = final_path.with_name(f".{uuid.uuid4().hex}{PARTIAL_SUFFIX}")
+            try:
+                partial.write_bytes(self.data)
+                os.replace(partial, final_path)
+            except BaseException:
+                partial.unlink(missing_ok=True)
+                raise
+            self.data = None
+        else:
+            os.replace(self.path, final_path)
+            os.utime(final_path)
+        self.path = final_path
+        return final_path
+
+
+@dataclass
+class _Part:
+    name: str = ""
+    filename: Optional[str] = None
+    rule: Optional[FileRule] = None
+    head: bytearray = field(default_factory=bytearray)  # everything received while not yet on disk
+    value: bytearray = field(default_factory=bytearray)
+    buffer: Optional[object] = None
+    path: Optional[Path] = None
+    kind: Optional[str] = None
+    size: int = 0
+    digest: Optional[object] = None
+
+
+class _StreamingForm:
+    """Multipart callbacks that write file parts straight into their target
+    directory, checking type and size before any byte reaches the disk. Files
+    within their rule's ``memory_bytes`` are kept in memory and never written."""
+
+    def __init__(self, rules: Dict[str, FileRule], max_field_bytes: int):
+        self.rules = rules
+        self.max_field_bytes = max_field_bytes
+        self.fields: Dict[str, str] = {}
+        self.files: Dict[str, List[StreamedFile]] = {}
+        self._part = _Part()
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._headers: Dict[bytes, bytes] = {}
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": lambda data, start, end: self._header_field.extend(data[start:end]),
+            "on_header_value": lambda data, start, end: self._header_value.extend(data[start:end]),
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._part = _Part()
+        self._headers = {}
+
+    def on_header_end(self):
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        part = self._part
+        part.name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" in options:
+            part.filename = Path(options[b"filename"].decode("utf-8", "replace")).name
+            part.rule = self.rules.get(part.name)
+            if part.rule is None:
+                raise HTTPException(status_code=400, detail=f"Unexpected file field '{part.name}'.")
+            if len(self.files.get(part.name, ())) >= part.rule.max_files:
+                if part.rule.max_files == 1:
+                    raise HTTPException(status_code=400, detail=f"Only one file is allowed for '{part.name}'.")
+                raise HTTPException(
+                    status_code=413, detail=f"At most {part.rule.max_files} files are allowed for '{part.name}'."
+                )
+            part.digest = hashlib.sha256()
+
+    def on_part_data(self, data, start, end):
+        part = self._part
+        chunk = data[start:end]
+        if part.rule is None:
+            part.value.extend(chunk)
+            if len(part.value) > self.max_field_bytes:
+                raise HTTPException(status_code=413, detail=f"Form field '{part.name}' is too large.")
+            return
+        if not part.filename:
+            return  # empty file input; treated as missing
+        part.size += len(chunk)
+        if part.size > part.rule.max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"'{part.name}' exceeds the {part.rule.max_bytes // (1024 * 1024)} MB limit.",
+            )
+        part.digest.update(chunk)
+        if part.buffer is None:
+            part.head.extend(chunk)
+            if part.kind is None and len(part.head) >= SNIFF_BYTES:
+                self._sniff(part)
+            if part.kind is not None and part.size > part.rule.memory_bytes:
+                self._spill(part)
+        else:
+            part.buffer.write(chunk)
+
+    def _sniff(self, part: _Part):
+        part.kind = sniff_kind(bytes(part.head[:SNIFF_BYTES]))
+        if part.kind not in part.rule.kinds:
+            allowed = " or ".join(kind.upper() for kind in part.rule.kinds)
+            raise HTTPException(status_code=415, detail=f"'{part.name}' must be a {allowed} file.")
+
+    def _spill(self, part: _Part):
+        part.path = part.rule.directory / f".{uuid.uuid4().hex}{PARTIAL_SUFFIX}"
+        part.buffer = part.path.open("wb")
+        part.buffer.write(part.head)
+        part.head = bytearray()
+
+    def on_part_end(self):
+        part = self._part
+        if part.rule is None:
+            self.fields[part.name] = part.value.decode("utf-8", "replace")
+            return
+        if not part.filename or part.size == 0:
+            return
+        if part.kind is None:
+            self._sniff(part)
+        if part.buffer is None and part.size > part.rule.memory_bytes:
+            self._spill(part)
+        if part.buffer is None:
+            streamed = StreamedFile(
+                part.filename, None, part.kind, part.size, part.digest.hexdigest(), data=bytes(part.head)
+            )
+        else:
+            part.buffer.close()
+            streamed = StreamedFile(part.filename, part.path, part.kind, part.size, part.digest.hexdigest())
+        self.files.setdefault(part.name, []).append(streamed)
+        self._part = _Part()
+
+    def discard(self):
+        part = self._part
+        if part.buffer is not None:
+            part.buffer.close()
+        paths = [part.path] + [streamed.path for uploads in self.files.values() for streamed in uploads]
+        discard_files(paths)
+
+    def result(self):
+        files = {
+            name: uploads if self.rules[name].max_files > 1 else uploads[0]
+            for name, uploads in self.files.items()
+        }
+        return self.fields, files
+
+
+def discard_files(paths):
+    for path in paths:
+        try:
+            if path:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error deleting upload {path}: {e}")
+
+
+async def read_streaming_form(
+    request: Request,
+    rules: Dict[str, FileRule],
+    max_field_bytes: int = 64 * 1024,
+    max_total_bytes: Optional[int] = None,
+) -> Tuple[Dict[str, str], Dict[str, Union[StreamedFile, List[StreamedFile]]]]:
+    """Parse a multipart body in one pass without FastAPI's spooled temp files.
+
+    Returns (text fields, uploaded files), with a list of files for rules that
+    allow more than one. Files are left under a ``.part`` name in their rule's
+    directory (or in memory, see FileRule.memory_bytes); callers ``commit()``
+    the ones they keep and ``discard_files()`` the rest.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data upload.")
+
+    limit = max_total_bytes or sum(rule.max_bytes * rule.max_files for rule in rules.values()) + 16 * max_field_bytes
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(status_code=413, detail="Upload is too large.")
+
+    form = _StreamingForm(rules, max_field_bytes)
+    parser = MultipartParser(params[b"boundary"], form.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit:
+                raise HTTPException(status_code=413, detail="Upload is too large.")
+            # The callbacks write file parts to disk, so parse on the file-I/O threads
+            await run_file_io(parser.write, chunk)
+        await run_file_io(parser.finalize)
+    except MultipartParseError:
+        await run_file_io(form.discard)
+        raise HTTPException(status_code=400, detail="Malformed multipart body.")
+    except BaseException:
+        await run_file_io(form.discard)
+        raise
+    return form.result()
+
+
+def multipart_openapi(
+    fields: Dict[str, str], files: Tuple[str, ...], optional: Tuple[str, ...] = (), multiple: Tuple[str, ...] = ()
+) -> dict:
+    """requestBody schema for endpoints that read their form via read_streaming_form."""
+    properties = {name: {"type": "string", "description": description} for name, description in fields.items()}
+    for name in files:
+        binary = {"type": "string", "format": "binary"}
+        properties[name] = {"type": "array", "items": binary} if name in multiple else binary
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": [name for name in properties if name not in optional],
+                        "properties": properties,
+                    },
+                },
+            },
+        },
+    }
@@ -0,0 +1,272 @@
+import json
+import sqlite3
+import time
+import uuid
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from sqlite_util import LocalSQLite
+
+# Job lifecycle: queued -> running -> verified | rejected | failed.
+# "rejected" means the document was processed but did not match; "failed" means
+# it could not be processed after every attempt.
+FINISHED = ("verified", "rejected", "failed")
+
+
+class RetryJob(Exception):
+    """Raised by a job handler for transient errors; the job is retried with backoff."""
+
+
+class VerificationJobQueue:
+    """Durable queue of asynchronous /verify-document/ jobs in a SQLite file.
+
+    Jobs are claimed with a lease: a worker that dies mid-job (restart, OOM)
+    simply lets the lease expire and another worker picks the job up, so the
+    backlog survives restarts. Finished jobs are kept for ``retention`` seconds
+    so clients can still fetch their result.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS verification_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            epic TEXT NOT NULL,
+            pdf_path TEXT NOT NULL,
+            pdf_digest TEXT NOT NULL,
+            pdf_size INTEGER NOT NULL,
+            client_ip TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,
+            lease_until REAL,
+            result TEXT,
+            created REAL NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_verification_jobs_claim ON verification_jobs (status, available_at);
+    """
+
+    def __init__(self, path: Path, lease: float = 900.0, max_attempts: int = 3, retention: float = 86400.0):
+        self.path = Path(path)
+        self._db = LocalSQLite(path, self.SCHEMA)
+        self._add_column("client_ip", "TEXT")  # queues created before jobs were rate-limited
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retention = retention
+
+    def _add_column(self, name: str, definition: str):
+        conn = self._db.connect()
+        if name in {row["name"] for row in conn.execute("PRAGMA table_info(verification_jobs)")}:
+            return
+        try:
+            conn.execute(f"ALTER TABLE verification_jobs ADD COLUMN {name} {definition}")
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e):  # another worker added it first
+                raise
+
+    def enqueue(self, epic: str, pdf_path: Path, pdf_digest: str, pdf_size: int, client_ip: Optional[str] = None) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self._db.connect().execute(
+            "INSERT INTO verification_jobs "
+            "(id, status, epic, pdf_path, pdf_digest, pdf_size, client_ip, available_at, created, updated) "
+            "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, epic, str(pdf_path), pdf_digest, pdf_size, client_ip, now, now, now),
+        )
+        return job_id
+
+    def claim(self) -> Optional[dict]:
+        """Lease the oldest runnable job: queued, or running with an expired lease."""
+        now = time.time()
+        conn = self._db.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM verification_jobs "
+                "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY available_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE verification_jobs SET status = 'running', attempts = attempts + 1, "
+                    "lease_until = ?, updated = ? WHERE id = ?",
+                    (now + self.lease, now, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if not row:
+            return None
+        job = dict(row)
+        job["attempts"] += 1
+        job["lease_until"] = now + self.lease  # identifies this claim to finish() and retry()
+        return job
+
+    def finish(self, job_id: str, status: str, result: dict, lease_until: Optional[float] = None) -> bool:
+        """Record the outcome. With ``lease_until`` (from claim) only while that lease
+        is still the job's own: a worker whose lease expired and whose job was claimed
+        again must not overwrite the newer run. Returns whether the row was updated."""
+        sql = "UPDATE verification_jobs SET status = ?, result = ?, lease_until = NULL, updated = ? WHERE id = ?"
+        params = [status, json.dumps(result), time.time(), job_id]
+        if lease_until is not None:
+            sql += " AND status = 'running' AND lease_until = ?"
+            params.append(lease_until)
+        return self._db.connect().execute(sql, params).rowcount == 1
+
+    def retry(self, job_id: str, attempts: int, error: str, lease_until: Optional[float] = None) -> Optional[bool]:
+        """Requeue with exponential backoff; returns False once attempts are used up,
+        None if the lease was lost (see finish)."""
+        if attempts >= self.max_attempts:
+            return False if self.finish(job_id, "failed", {"detail": error}, lease_until) else None
+        now = time.time()
+        sql = (
+            "UPDATE verification_jobs SET status = 'queued', available_at = ?, lease_until = NULL, "
+            "result = ?, updated = ? WHERE id = ?"
+        )
+        params = [now + min(30 * 2 ** attempts, 900), json.dumps({"detail": error}), now, job_id]
+        if lease_until is not None:
+            sql += " AND status = 'running' AND lease_until = ?"
+            params.append(lease_until)
+        return True if self._db.connect().execute(sql, params).rowcount == 1 else None
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._db.connect().execute(
+            "SELECT id, status, attempts, result, created, updated FROM verification_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def position(self, job_id: str) -> int:
+        """Jobs ahead of this one in the queue."""
+        return self._db.connect().execute(
+            "SELECT COUNT(*) FROM verification_jobs WHERE status = 'queued' "
+            "AND available_at < (SELECT available_at FROM verification_jobs WHERE id = ?)",
+            (job_id,),
+        ).fetchone()[0]
+
+    def backlog(self) -> int:
+        return self._db.connect().execute(
+            "SELECT COUNT(*) FROM verification_jobs WHERE status IN ('queued', 'running')"
+        ).fetchone()[0]
+
+    def prune(self) -> int:
+        cursor = self._db.connect().execute(
+            "DELETE FROM verification_jobs WHERE status IN ('verified', 'rejected', 'failed') AND updated < ?",
+            (time.time() - self.retention,),
+        )
+        return cursor.rowcount
+
+
+class JobWorker:
+    """Daemon threads draining a VerificationJobQueue.
+
+    ``handler(job)`` returns (status, result) with status "verified" or
+    "rejected", or raises RetryJob for transient failures. ``on_failed(job)``
+    runs when a job gives up, to release its upload. Run in the web workers
+    (started lazily, like the janitor) or in a standalone process via
+    ``verification_worker.py``.
+    """
+
+    def __init__(
+        self,
+        queue: VerificationJobQueue,
+        handler: Callable[[dict], Tuple[str, dict]],
+        threads: int = 1,
+        interval: float = 2.0,
+        on_failed: Optional[Callable[[dict], None]] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.on_failed = on_failed
+        self.threads = threads
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def start(self):
+        with self._lock:
+            self._workers = [thread for thread in self._workers if thread.is_alive()]
+            if self._workers or self.threads <= 0:
+                return
+            self._stop.clear()
+            for index in range(self.threads):
+                thread = threading.Thread(target=self._run, name=f"verification-job-{index}", daemon=True)
+                thread.start()
+                self._workers.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def run_forever(self):
+        # Foreground mode for a standalone worker process; returns after stop()
+        self.start()
+        while not self._stop.wait(1.0):
+            self.start()  # replace any thread that died
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                while not self._stop.is_set() and self.run_once():
+                    pass
+                if time.time() - self._last_prune > 3600:
+                    self._last_prune = time.time()
+                    self.queue.prune()
+            except Exception as e:
+                print(f"Verification job worker error: {e}")
+            self._wake.wait(self.interval)
+
+    def run_once(self) -> bool:
+        job = self.queue.claim()
+        if job is None:
+            return False
+        if job["attempts"] > self.queue.max_attempts:
+            # Its lease expired every time: the job keeps killing or stalling its worker
+            self._give_up(job, "Document processing kept failing.")
+            return True
+        try:
+            status, result = self.handler(job)
+        except RetryJob as e:
+            self._retry(job, str(e))
+        except Exception as e:
+            print(f"Verification job {job['id']} failed: {e}")
+            self._retry(job, "Document processing failed.")
+        else:
+            if not self.queue.finish(job["id"], status, result, job["lease_until"]):
+                self._lease_lost(job)
+        return True
+
+    def _retry(self, job: dict, error: str):
+        requeued = self.queue.retry(job["id"], job["attempts"], error, job["lease_until"])
+        if requeued is None:
+            self._lease_lost(job)
+        elif not requeued:
+            self._released(job)
+
+    def _give_up(self, job: dict, error: str):
+        if self.queue.finish(job["id"], "failed", {"detail": error}, job["lease_until"]):
+            self._released(job)
+        else:
+            self._lease_lost(job)
+
+    @staticmethod
+    def _lease_lost(job: dict):
+        # Another worker claimed the job after this lease expired; its outcome stands
+        print(f"Verification job {job['id']} outlived its lease; result discarded")
+
+    def _released(self, job: dict):
+        if self.on_failed:
+            self.on_failed(job)
@@ -0,0 +1,183 @@
+"""Verification state shared by the web app (prod_main) and verification_worker.py:
+the extraction pools and cache, admission control, stored files and their
+janitor, the job queue and verification sessions, plus the job handler itself.
+Built from the environment on import; nothing here imports the web app.
+"""
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import db
+import metrics
+from admission import AdmissionControl
+from db import ConnectionPool
+from extraction import extract_epic_with_method
+from extraction_cache import ExtractionCache
+from extraction_pool import ExtractionPool, ExtractionQueueFull, ExtractionTimeout
+from file_ops import FileJanitor
+from members import referenced_files
+from metrics import log_event
+from session_store import SessionReaper, create_session_store
+from settings import PHOTO_UPLOAD_DIR, STATE_DIR, STORAGE_NAMESPACES, TEMP_UPLOAD_DIR
+from storage import create_storage
+from verification_jobs import JobWorker, RetryJob, VerificationJobQueue
+
+# PDF text extraction/OCR runs here instead of on the event loop
+EXTRACTION_POOL = ExtractionPool.from_env()
+# Results keyed by SHA-256 of the PDF bytes, so re-uploads of the same file skip extraction
+EXTRACTION_CACHE = ExtractionCache.from_env()
+# Per-IP/per-EPIC token buckets and a global extraction cap (ADMISSION_BACKEND=sqlite shares them across workers)
+ADMISSION = AdmissionControl.from_env(STATE_DIR / "admission.sqlite3", extraction_lease=EXTRACTION_POOL.timeout + 60)
+
+# Kept files live in content-addressed, hash-sharded directories (or S3, see storage.py)
+STORAGE = create_storage(STORAGE_NAMESPACES)
+
+# Durable background deletion of uploads (see cleanup_files)
+FILE_JANITOR = FileJanitor(
+    Path(os.getenv("JANITOR_DB_PATH", STATE_DIR / "janitor.sqlite3")),
+    interval=float(os.getenv("JANITOR_INTERVAL_SECONDS", "30")),
+    remove=STORAGE.delete,
+    hold=lambda paths: held_files(paths),
+    shared=STORAGE.is_content_addressed,  # temp uploads are deleted without asking the database
+)
+# Stored files are shared by identical uploads; one used by a request this recently is never deleted
+SHARED_FILE_GRACE_SECONDS = float(os.getenv("SHARED_FILE_GRACE_SECONDS", "600"))
+
+# Asynchronous verification: PDFs wait in JOB_UPLOAD_DIR (outside the reaper's reach)
+# while the durable job queue holds them; a separate extraction pool with a long
+# timeout keeps OCR backlogs away from the interactive pool.
+JOB_EXTRACTION_POOL = ExtractionPool.from_env("JOB_EXTRACTION", default_workers=1, default_timeout=600)
+VERIFICATION_JOBS = VerificationJobQueue(
+    Path(os.getenv("JOB_QUEUE_PATH", STATE_DIR / "jobs.sqlite3")),
+    lease=JOB_EXTRACTION_POOL.timeout + 60,
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+)
+VERIFY_ASYNC_ENABLED = os.getenv("VERIFY_ASYNC_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Verification sessions (token -> verified temp PDF), expired by the reaper. A job's
+# token is issued by whichever process ran it, so async verification needs the
+# shared SQLite store; the per-process memory store would lose it between workers.
+SESSION_TTL = timedelta(minutes=int(os.getenv("SESSION_TTL_MINUTES", "15")))
+if VERIFY_ASYNC_ENABLED and os.getenv("SESSION_STORE_BACKEND", "sqlite").lower() != "sqlite":
+    raise ValueError("Asynchronous verification needs SESSION_STORE_BACKEND=sqlite (or set VERIFY_ASYNC_ENABLED=false).")
+VERIFICATION_SESSIONS = create_session_store(
+    STATE_DIR / "sessions.sqlite3",
+    on_evict=lambda session: cleanup_files([session["temp_pdf_path"]]),
+    default_backend="sqlite" if VERIFY_ASYNC_ENABLED else "memory",
+)
+SESSION_REAPER = SessionReaper(
+    VERIFICATION_SESSIONS, TEMP_UPLOAD_DIR, SESSION_TTL,
+    interval=float(os.getenv("SESSION_REAP_INTERVAL_SECONDS", "60")),
+    partial_dirs=[PHOTO_UPLOAD_DIR],
+)
+
+# In-app job threads; set JOB_WORKER_THREADS=0 when verification_worker.py runs separately
+JOB_WORKER = JobWorker(
+    VERIFICATION_JOBS,
+    handler=lambda job: run_verification_job(job),
+    threads=int(os.getenv("JOB_WORKER_THREADS", "1")),
+    on_failed=lambda job: cleanup_files([Path(job["pdf_path"])]),
+)
+
+# Shared MySQL connection pool (DB_POOL_SIZE / DB_POOL_OVERFLOW / DB_POOL_TIMEOUT_SECONDS)
+DB_POOL = ConnectionPool.from_env()
+
+
+
+def record_extraction(extraction, source: str, elapsed: float):
+    metrics.EXTRACTIONS.inc(method=extraction.method, source=source)
+    if source == "cache":
+        return
+    metrics.EXTRACTION_SECONDS.observe(elapsed, method=extraction.method)
+    metrics.EXTRACTION_PAGES.observe(extraction.pages_scanned, method=extraction.method)
+    for stage, seconds in (extraction.timings or {}).items():
+        metrics.EXTRACTION_STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def cleanup_files(files_to_delete: List[Path]):
+    # Handed to the janitor thread in memory, which journals and deletes them;
+    # the caller never waits on SQLite or the filesystem.
+    FILE_JANITOR.enqueue(files_to_delete)
+
+
+def held_files(paths: List[str]) -> Dict[str, Optional[float]]:
+    """FileJanitor hook, on its thread. A content-addressed file is kept while a
+    member row points at it, or for SHARED_FILE_GRACE_SECONDS after a request
+    last stored or deduplicated onto it (that request may not have inserted its
+    row yet). Raises if the database can't answer; the janitor retries later."""
+    refs = list(paths)
+    conn = DB_POOL.acquire()
+    try:
+        held = dict.fromkeys(referenced_files(conn, refs))
+    finally:
+        db.release(conn)
+    for ref in refs:
+        used = None if ref in held else STORAGE.last_used(ref)
+        if used is not None and used > time.time() - SHARED_FILE_GRACE_SECONDS:
+            held[ref] = used + SHARED_FILE_GRACE_SECONDS
+    return held
+
+
+def report_extraction(extraction, source: str, elapsed: float, pdf_size: int, entered_epic: str):
+    record_extraction(extraction, source, elapsed)
+    log_event(
+        "epic_extraction", source=source, method=extraction.method, pages=extraction.pages_scanned,
+        confidence=extraction.confidence, seconds=round(elapsed, 4), bytes=pdf_size,
+        matched=bool(extraction.epic and extraction.epic == entered_epic),
+        stages={stage: round(seconds, 4) for stage, seconds in (extraction.timings or {}).items()},
+        screening=extraction.screening, rejected=extraction.detail,
+    )
+
+
+def epic_mismatch_detail(entered_epic: str, extraction) -> Optional[str]:
+    if extraction.method == "rejected":
+        return extraction.detail
+    extracted_epic = extraction.epic
+    if extracted_epic and extracted_epic == entered_epic:
+        return None
+    if extracted_epic:
+        return f"Mismatch: Entered EPIC '{entered_epic}' does not match PDF EPIC '{extracted_epic}'."
+    return "Could not extract a matching EPIC number from the PDF."
+
+
+def open_verification_session(temp_pdf_path: Path, epic: str, pdf_digest: str) -> Tuple[str, datetime]:
+    # The digest was computed during the upload; submit stores the PDF under it without rereading
+    token = str(uuid.uuid4())
+    expiry = datetime.utcnow() + SESSION_TTL
+    VERIFICATION_SESSIONS.put(
+        token, {"temp_pdf_path": temp_pdf_path, "epic": epic, "expiry": expiry, "pdf_digest": pdf_digest}
+    )
+    return token, expiry
+
+
+def run_verification_job(job: dict) -> Tuple[str, dict]:
+    # Runs on a JobWorker thread, so it blocks on the job extraction pool
+    pdf_path = Path(job["pdf_path"])
+    started = time.perf_counter()
+    extraction, source = EXTRACTION_CACHE.get(job["pdf_digest"]), "cache"
+    if extraction is None:
+        # Same global cap and OCR weighting as synchronous uploads
+        try:
+            with ADMISSION.extraction_slot(lease=JOB_EXTRACTION_POOL.timeout + 60):
+                extraction, source = JOB_EXTRACTION_POOL.run_sync(extract_epic_with_method, pdf_path), "job"
+        except ExtractionQueueFull:
+            raise RetryJob("Document verification is busy.")
+        except ExtractionTimeout:
+            raise RetryJob("Document processing timed out.")
+        EXTRACTION_CACHE.put(job["pdf_digest"], extraction)
+        ADMISSION.charge_extraction(extraction.method, job.get("client_ip"), job["epic"])
+    report_extraction(extraction, source, time.perf_counter() - started, job["pdf_size"], job["epic"])
+
+    detail = epic_mismatch_detail(job["epic"], extraction)
+    if detail:
+        cleanup_files([pdf_path])
+        return "rejected", {"detail": detail}
+    # Back into the temp dir so the session behaves exactly like a synchronous one
+    temp_pdf_path = TEMP_UPLOAD_DIR / pdf_path.name
+    os.replace(pdf_path, temp_pdf_path)
+    os.utime(temp_pdf_path)  # the reaper ages temp files by mtime; a queued job's upload can be old
+    token, expiry = open_verification_session(temp_pdf_path, extraction.epic, job["pdf_digest"])
+    return "verified", {"verification_token": token, "expires_at": expiry.isoformat() + "Z"}
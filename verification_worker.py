@@ -0,0 +1,37 @@
+"""Drain the asynchronous verification queue outside the web workers.
+
+    python verification_worker.py --threads 2
+
+Uses the same environment as the app but never imports it: the queue, the
+extraction pool and the job handler come from verification_service. Run it
+under a process supervisor and set JOB_WORKER_THREADS=0 for the web app.
+Sessions use the shared SQLite store (required while async verification is
+enabled), so the tokens it issues are visible to the web workers.
+"""
+import argparse
+
+from verification_service import FILE_JANITOR, JOB_EXTRACTION_POOL, JOB_WORKER, VERIFICATION_JOBS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain the verification job queue.")
+    parser.add_argument(
+        "--threads", type=int, default=JOB_EXTRACTION_POOL.workers,
+        help="jobs in flight at once (default: JOB_EXTRACTION_WORKERS)",
+    )
+    args = parser.parse_args()
+
+    JOB_WORKER.threads = max(1, args.threads)
+    FILE_JANITOR.start()
+    print(f"Verification worker: {JOB_WORKER.threads} thread(s) on {VERIFICATION_JOBS.path}")
+    try:
+        JOB_WORKER.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        JOB_WORKER.stop()
+        JOB_EXTRACTION_POOL.shutdown()
+
+
+if __name__ == "__main__":
+    main()
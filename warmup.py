@@ -0,0 +1,53 @@
+import time
+import threading
+from typing import Callable, Dict, List, Tuple
+
+
+class Prewarmer:
+    """Runs named warm-up steps (heavy imports, Tesseract, the DB pool) on a
+    daemon thread and records how each went, for the readiness probe.
+
+    Nothing waits on it: a request that needs a component before its step has
+    run just loads it itself, so every step must be idempotent. Failed steps
+    are retried by the next ``start`` at most every ``retry_interval`` seconds.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], object]]], retry_interval: float = 30.0):
+        self.steps = steps
+        self.retry_interval = retry_interval
+        self.status: Dict[str, dict] = {name: {"state": "pending"} for name, _ in steps}
+        self._thread = None
+        self._last_run = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return all(entry["state"] == "ready" for entry in self.status.values())
+
+    def start(self):
+        with self._lock:
+            if self.ready or (self._thread is not None and self._thread.is_alive()):
+                return
+            if self._thread is not None and time.monotonic() - self._last_run < self.retry_interval:
+                return
+            self._last_run = time.monotonic()
+            self._thread = threading.Thread(target=self.run, name="prewarm", daemon=True)
+            self._thread.start()
+
+    def run(self):
+        for name, step in self.steps:
+            if self.status[name]["state"] == "ready":
+                continue
+            self.status[name] = {"state": "warming"}
+            started = time.perf_counter()
+            try:
+                detail = step()
+            except Exception as e:
+                entry = {"state": "failed", "error": str(e)}
+            else:
+                entry = {"state": "ready"}
+                if detail is not None:
+                    entry["detail"] = detail
+            entry["seconds"] = round(time.perf_counter() - started, 3)
+            self.status[name] = entry
+        print("Prewarm: " + ", ".join(f"{name} {entry['state']} ({entry['seconds']}s)" for name, entry in self.status.items()))